@@ -0,0 +1,237 @@
+"""
+TTS Guard — Equipment Failure Analytics
+Failure rates by equipment type, building, area, client, technician and
+month, rolling monthly rates and repeat-failure detection over the recorded
+per-item inspection results (inspection_items).
+
+The item checks are loaded once and each dimension is factorized into an
+integer code array; every aggregate is then a bincount over those arrays,
+so the cost stays linear in the number of checks.
+"""
+
+import numpy as np
+import pandas as pd
+
+from database import get_all_buildings, get_all_clients, get_inspection_item_results
+
+# Dimension name -> column of get_inspection_item_results()
+DIMENSIONS = {
+    "type": "equipment_type",
+    "building": "building_id",
+    "area": "area",
+    "client": "client_id",
+    "technician": "technician",
+    "month": "month",
+    "equipment": "equipment_id",
+}
+
+UNKNOWN = "Unknown"   # group label for checks with no area / technician recorded
+
+
+class FailureAnalytics:
+    """Vectorized failure statistics over a set of item checks."""
+
+    def __init__(self, items):
+        self.items = items.reset_index(drop=True)
+        self.failed = self.items["failed"].to_numpy(dtype=np.int64)
+        self._codes = {}
+
+    @classmethod
+    def load(cls, since=None, client_id=None):
+        """Load item checks (optionally since a date / for one client)."""
+        return cls(get_inspection_item_results(since=since, client_id=client_id))
+
+    def __len__(self):
+        return len(self.failed)
+
+    def _column(self, dim):
+        """A dimension's values, with missing text labels shown as UNKNOWN."""
+        if dim not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension {dim!r}; expected one of {sorted(DIMENSIONS)}")
+        values = self.items[DIMENSIONS[dim]]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = values.fillna(UNKNOWN)
+        return values
+
+    def _factorize(self, dim):
+        """Return (codes, uniques) for a dimension, computed once."""
+        if dim not in self._codes:
+            # NULLs must get a code of their own: -1 breaks the bincounts
+            codes, uniques = pd.factorize(self._column(dim), sort=True, use_na_sentinel=False)
+            self._codes[dim] = (codes.astype(np.int64), uniques)
+        return self._codes[dim]
+
+    def _group(self, dims):
+        """Combine the codes of several dimensions into one group index."""
+        factorized = [self._factorize(dim) for dim in dims]
+        key = np.ravel_multi_index(
+            [codes for codes, _ in factorized],
+            [max(len(uniques), 1) for _, uniques in factorized],
+        )
+        groups, inverse = np.unique(key, return_inverse=True)
+        labels = np.unravel_index(groups, [max(len(u), 1) for _, u in factorized])
+        columns = {
+            dim: np.asarray(uniques)[codes]
+            for dim, (_, uniques), codes in zip(dims, factorized, labels)
+        }
+        return inverse, columns
+
+    def filter(self, **equals):
+        """
+        Restrict to checks matching every dimension=value (or list of values),
+        e.g. filter(type="Smoke Detector", area="Al Reef").
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for dim, value in equals.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            mask &= self._column(dim).isin(values).to_numpy()
+        return FailureAnalytics(self.items[mask])
+
+    def failure_rates(self, by):
+        """
+        Failure rate per group.
+
+        Args:
+            by: Dimension name or list of names (see DIMENSIONS)
+
+        Returns:
+            DataFrame with the group columns, checks, failures and
+            failure_rate (%), sorted by failure rate then failures.
+        """
+        dims = [by] if isinstance(by, str) else list(by)
+        columns = {dim: [] for dim in dims}
+        if len(self) == 0:
+            return pd.DataFrame({**columns, "checks": [], "failures": [], "failure_rate": []})
+        inverse, columns = self._group(dims)
+        checks = np.bincount(inverse)
+        failures = np.bincount(inverse, weights=self.failed).astype(np.int64)
+        df = pd.DataFrame({
+            **columns,
+            "checks": checks,
+            "failures": failures,
+            "failure_rate": np.round(100.0 * failures / checks, 2),
+        })
+        return df.sort_values(
+            ["failure_rate", "failures"], ascending=False
+        ).reset_index(drop=True)
+
+    def rolling_failure_rates(self, by=None, window=3):
+        """
+        Monthly failure rate with a trailing window of `window` months.
+
+        Returns a DataFrame indexed by month (every month in range, gaps
+        included) with one column per group of `by` (or a single "all"
+        column), holding the failure rate (%) over the window; NaN where the
+        window has no checks.
+        """
+        month_codes, months = self._factorize("month")
+        if len(self) == 0:
+            return pd.DataFrame()
+        if by is None:
+            group_codes, groups = np.zeros(len(self), dtype=np.int64), np.array(["all"])
+        else:
+            group_codes, groups = self._factorize(by)
+        shape = (len(months), len(groups))
+        flat = month_codes * shape[1] + group_codes
+        checks = np.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape)
+        failures = np.bincount(
+            flat, weights=self.failed, minlength=shape[0] * shape[1]
+        ).reshape(shape)
+
+        full_range = pd.period_range(min(months), max(months), freq="M").astype(str)
+        checks = pd.DataFrame(checks, index=months, columns=groups).reindex(full_range, fill_value=0)
+        failures = pd.DataFrame(failures, index=months, columns=groups).reindex(full_range, fill_value=0)
+        window_checks = checks.rolling(window, min_periods=1).sum()
+        window_failures = failures.rolling(window, min_periods=1).sum()
+        rates = 100.0 * window_failures / window_checks.where(window_checks > 0)
+        rates.index.name = "month"
+        return rates.round(2)
+
+    def repeat_failures(self, min_failures=2, last_checks=None):
+        """
+        Equipment units that keep failing.
+
+        Args:
+            min_failures: Failures needed to be reported
+            last_checks: Only count failures among each unit's most recent
+                N checks (None = full history)
+
+        Returns:
+            DataFrame per unit: equipment_id, equipment_type, building_id,
+            checks, failures, current_streak (consecutive failures up to the
+            latest check), longest_streak and last_failure date; worst first.
+        """
+        columns = ["equipment_id", "equipment_type", "building_id", "checks",
+                   "failures", "current_streak", "longest_streak", "last_failure"]
+        if len(self) == 0:
+            return pd.DataFrame(columns=columns)
+        items = self.items
+        equipment = items["equipment_id"].to_numpy(dtype=np.int64)
+        date_codes, dates = pd.factorize(items["inspection_date"], sort=True)
+        inspection_codes, inspections = pd.factorize(items["inspection_id"], sort=True)
+        key_sizes = [int(equipment.max()) + 1, len(dates), len(inspections)]
+        if np.prod(key_sizes, dtype=float) < 2 ** 62:
+            # One int64 sort key is much faster than a three-key lexsort
+            order = np.argsort(
+                np.ravel_multi_index((equipment, date_codes, inspection_codes), key_sizes),
+                kind="stable",
+            )
+        else:
+            order = np.lexsort((inspection_codes, date_codes, equipment))
+        equipment = equipment[order]
+        failed = self.failed[order]
+        date_codes = date_codes[order]
+        n = len(order)
+
+        # Group boundaries of the sorted units
+        starts = np.flatnonzero(np.r_[True, equipment[1:] != equipment[:-1]])
+        ends = np.r_[starts[1:], n]
+        sizes = ends - starts
+        group = np.repeat(np.arange(len(starts)), sizes)
+        position_from_end = np.repeat(ends, sizes) - np.arange(n)  # 1 = latest
+
+        counted = failed if last_checks is None else failed * (position_from_end <= last_checks)
+        failures = np.bincount(group, weights=counted).astype(np.int64)
+        checks = sizes if last_checks is None else np.minimum(sizes, last_checks)
+
+        # Failure streaks: distance back to the last pass in the same unit
+        # (or to just before the unit's first check).
+        index = np.arange(n)
+        last_pass = np.maximum.accumulate(np.where(failed == 0, index, -1))
+        last_break = np.maximum(last_pass, np.repeat(starts - 1, sizes))
+        streak = np.where(failed == 1, index - last_break, 0)
+        longest = np.maximum.reduceat(streak, starts)
+        current = streak[ends - 1]
+
+        last_failure_code = np.maximum.reduceat(np.where(failed == 1, date_codes, -1), starts)
+        last_failure = np.where(
+            last_failure_code >= 0, np.asarray(dates, dtype=object)[last_failure_code], None
+        )
+
+        first = order[starts]
+        df = pd.DataFrame({
+            "equipment_id": equipment[starts],
+            "equipment_type": items["equipment_type"].to_numpy()[first],
+            "building_id": items["building_id"].to_numpy()[first],
+            "checks": checks,
+            "failures": failures,
+            "current_streak": current,
+            "longest_streak": longest,
+            "last_failure": last_failure,
+        })
+        df = df[df["failures"] >= min_failures]
+        return df.sort_values(
+            ["current_streak", "failures", "longest_streak"], ascending=False
+        ).reset_index(drop=True)
+
+    def with_names(self, df):
+        """Add building_name / client_name columns for building and client IDs."""
+        df = df.copy()
+        if "building_id" in df.columns or "building" in df.columns:
+            col = "building_id" if "building_id" in df.columns else "building"
+            names = get_all_buildings().set_index("id")["name"]
+            df.insert(df.columns.get_loc(col) + 1, "building_name", df[col].map(names))
+        if "client" in df.columns:
+            names = get_all_clients().set_index("id")["name"]
+            df.insert(df.columns.get_loc("client") + 1, "client_name", df["client"].map(names))
+        return df
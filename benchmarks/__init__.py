@@ -0,0 +1,6 @@
+"""
+TTS Guard — Benchmarks
+Standalone performance scripts. Run from the repository root, e.g.:
+
+    python -m benchmarks.storage
+"""
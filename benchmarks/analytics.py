@@ -0,0 +1,113 @@
+"""
+TTS Guard — Failure Analytics Benchmark
+Times FailureAnalytics group-bys, rolling rates and repeat-failure detection
+over synthetic item checks, and checks every failure_rates() result against
+a plain pandas groupby. Some buildings have no area and some inspections no
+technician (both columns are nullable), so those checks must come out under
+the "Unknown" label rather than break the bincounts.
+
+    python -m benchmarks.analytics --sizes 100000 1000000
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from analytics import DIMENSIONS, UNKNOWN, FailureAnalytics
+
+SIZES = (100_000, 1_000_000)
+TYPES = ["Smoke Detector", "Fire Extinguisher DCP", "Emergency Light", "Exit Sign", "Hose Reel"]
+AREAS = ["Al Reef", "Khalifa City", "Mussafah", "Yas Island", None]
+TECHNICIANS = ["Ahmed", "Ravi", "Joseph", None]
+
+
+def make_items(n, seed=0):
+    """Synthetic checks shaped like get_inspection_item_results()."""
+    rng = np.random.default_rng(seed)
+    buildings = max(n // 500, 5)
+    units = max(n // 20, 10)
+    inspections = max(n // 50, 10)
+    building_area = np.array(AREAS, dtype=object)[np.arange(buildings) % len(AREAS)]
+    dates = pd.date_range("2024-01-01", periods=24 * 30, freq="D").strftime("%Y-%m-%d")
+
+    inspection_id = rng.integers(1, inspections + 1, n)
+    inspection_date = np.asarray(dates)[inspection_id % len(dates)]
+    equipment_id = rng.integers(1, units + 1, n)
+    building_id = equipment_id % buildings
+    return pd.DataFrame({
+        "inspection_id": inspection_id,
+        "inspection_date": inspection_date,
+        "month": [d[:7] for d in inspection_date],
+        "technician": np.array(TECHNICIANS, dtype=object)[inspection_id % len(TECHNICIANS)],
+        "equipment_id": equipment_id,
+        "equipment_type": np.array(TYPES)[equipment_id % len(TYPES)],
+        "building_id": building_id,
+        "client_id": building_id % 7,
+        "area": building_area[building_id],
+        "failed": (rng.random(n) < 0.08).astype(np.int64),
+    })
+
+
+def reference_rates(items, dim):
+    """failure_rates(dim) the slow way, for comparison."""
+    column = DIMENSIONS[dim]
+    grouped = items.assign(**{column: items[column].fillna(UNKNOWN)}).groupby(column)["failed"]
+    return pd.DataFrame({"checks": grouped.size(), "failures": grouped.sum()})
+
+
+def check_rates(items):
+    """True when every dimension matches the pandas groupby."""
+    analytics = FailureAnalytics(items)
+    ok = True
+    for dim in DIMENSIONS:
+        rates = analytics.failure_rates(dim).set_index(dim)[["checks", "failures"]]
+        expected = reference_rates(items, dim)
+        matches = rates.sort_index().equals(expected.sort_index().astype(rates.dtypes))
+        ok &= matches
+        print(f"  failure_rates({dim!r}): {len(rates)} groups, "
+              f"{'matches groupby' if matches else 'MISMATCH'}")
+    for by in ("area", "technician"):
+        rolling = analytics.rolling_failure_rates(by=by)
+        has_unknown = UNKNOWN in rolling.columns
+        ok &= has_unknown
+        print(f"  rolling_failure_rates(by={by!r}): {rolling.shape}, "
+              f"{UNKNOWN!r} column: {has_unknown}")
+    return ok
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ok = True
+    for n in args.sizes:
+        items = make_items(n)
+        print(f"== {n:,} checks ==")
+        ok &= check_rates(items)
+        for label, fn in (
+            ("failure_rates(['area', 'type'])",
+             lambda: FailureAnalytics(items).failure_rates(["area", "type"])),
+            ("rolling_failure_rates(by='type')",
+             lambda: FailureAnalytics(items).rolling_failure_rates(by="type")),
+            ("repeat_failures()", lambda: FailureAnalytics(items).repeat_failures()),
+        ):
+            print(f"  {label:<36} {timed(fn, args.repeat):9.1f} ms")
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+TTS Guard — Checklist Render Benchmark
+Per-rerun cost of the Inspect page checklist bookkeeping for buildings of
+50, 500 and 5,000 items: the old per-item DataFrame filter over a
+GROUP_CONCAT split versus the session-held Checklist model. Widget rendering
+itself is excluded; this is the work the page script does around it.
+
+    python -m benchmarks.checklist --repeat 5
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import pandas as pd
+
+from checklist import Checklist
+
+SIZES = (50, 500, 5000)
+TYPES = [
+    "Smoke Detector", "Fire Extinguisher DCP", "Fire Extinguisher CO2",
+    "Emergency Light", "Exit Sign", "Hose Reel", "Sprinkler System", "FM200 System",
+]
+
+
+def make_equipment(n):
+    """Synthetic equipment rows shaped like get_equipment_by_building()."""
+    rng = random.Random(n)
+    df = pd.DataFrame({
+        "id": range(1, n + 1),
+        "building_id": 1,
+        "type": [rng.choice(TYPES) for _ in range(n)],
+        "status": "OK",
+    })
+    return df.sort_values(["type", "id"]).reset_index(drop=True)
+
+
+def group_concat(equipment_df):
+    """What get_equipment_grouped_by_type() returned."""
+    return (
+        equipment_df.groupby("type", sort=True)["id"]
+        .agg(count="count", item_ids=lambda ids: ",".join(map(str, ids)))
+        .reset_index()
+    )
+
+
+def legacy_rerun(equipment_df, grouped_df, equip_status):
+    """One rerun of the old checklist loop (minus the widgets)."""
+    passed = sum(1 for v in equip_status.values() if v)
+    for _, group in grouped_df.iterrows():
+        item_ids = group["item_ids"].split(",")
+        group_passed = sum(1 for eid in item_ids if equip_status.get(eid, True))
+        _ = group["count"] - group_passed
+        for eid in item_ids:
+            equip_row = equipment_df[equipment_df["id"] == int(eid)].iloc[0]
+            equip_status[eid] = equip_status.get(eid, True) and equip_row is not None
+    passed = sum(1 for v in equip_status.values() if v)
+    return passed
+
+
+def model_rerun(checklist):
+    """One rerun of the Checklist-driven loop (minus the widgets)."""
+    passed = checklist.passed
+    for eq_type, item_ids in checklist.groups.items():
+        _ = checklist.group_failed(eq_type)
+        for eid in item_ids:
+            checklist.set(eid, checklist.results[eid])
+    passed = checklist.passed
+    return passed
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    args = parser.parse_args()
+
+    print(f"{'items':>6}  {'legacy rerun':>13}  {'model build':>12}  {'model rerun':>12}  speed-up")
+    for n in args.sizes:
+        equipment_df = make_equipment(n)
+        grouped_df = group_concat(equipment_df)
+        equip_status = {str(eid): True for eid in equipment_df["id"]}
+        # The legacy loop is quadratic; cap its repeats on large buildings.
+        legacy = timed(lambda: legacy_rerun(equipment_df, grouped_df, equip_status),
+                       1 if n >= 5000 else args.repeat)
+        build = timed(lambda: Checklist(1, equipment_df), args.repeat)
+        checklist = Checklist(1, equipment_df)
+        rerun = timed(lambda: model_rerun(checklist), args.repeat)
+        print(f"{n:>6}  {legacy:>10.2f} ms  {build:>9.2f} ms  {rerun:>9.3f} ms  "
+              f"{legacy / rerun:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""
+TTS Guard — Query & Page Benchmark Harness
+Times every cached read function in database.py, cold (query cache cleared)
+and warm (served from the cache), and every page script run headlessly
+through Streamlit's AppTest, against databases at several scales: the demo
+seed and 1k / 10k / 100k generated buildings (see seed_data.seed_scale).
+
+Results are written as JSON. With --baseline, any timing that is slower than
+the baseline by more than --tolerance (and --min-delta-ms) is reported and
+the run exits non-zero, so numbers can be compared before and after every
+performance change:
+
+    python -m benchmarks.harness --scales seed 1k --save-baseline benchmarks/baseline.json
+    python -m benchmarks.harness --scales seed 1k --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import glob
+import inspect
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+import database
+from seed_data import seed, seed_scale
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "tts_guard_bench")
+
+# Scale name -> seed_scale() arguments (None = the demo seed)
+SCALES = {
+    "seed": None,
+    "1k": {"clients": 20, "buildings": 1000, "years": 5},
+    "10k": {"clients": 200, "buildings": 10000, "years": 5},
+    "100k": {"clients": 2000, "buildings": 100000, "years": 10},
+}
+
+# Arguments for read functions whose defaults would not reflect page use
+QUERY_KWARGS = {
+    "get_inspection_item_results": lambda s: {"since": s["since_90_days"]},
+    "get_report_artifacts": lambda s: {"limit": 200},
+}
+
+
+def build_database(scale, data_dir, rebuild=False):
+    """Return the path of the scale's database, generating it if needed."""
+    path = os.path.join(data_dir, f"{scale}.db")
+    if rebuild:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    if os.path.exists(path):
+        return path
+    os.makedirs(data_dir, exist_ok=True)
+    use_database(path)
+    started = time.perf_counter()
+    if SCALES[scale] is None:
+        database.init_db()
+        if not database.has_data():
+            seed()
+    else:
+        seed_scale(**SCALES[scale])
+    database.close_all()
+    print(f"built {scale} database in {time.perf_counter() - started:.0f}s", file=sys.stderr)
+    return path
+
+
+def use_database(path):
+    """Point database.py (and every page) at another database file."""
+    database.close_all()
+    database.DB_PATH = path
+    database._db_initialized = True  # never auto-seed a benchmark database
+    database.invalidate_cache()
+
+
+def row_counts(path):
+    conn = sqlite3.connect(path)
+    counts = {
+        table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        for table in ("buildings", "equipment", "inspections", "inspection_items",
+                      "complaints", "payments")
+    }
+    conn.close()
+    return counts
+
+
+def sample_arguments():
+    """Representative argument values drawn from the current database."""
+    with database._connection() as conn:
+        client_id = conn.execute(
+            "SELECT client_id FROM buildings GROUP BY client_id ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()[0]
+        building_id = conn.execute(
+            "SELECT building_id FROM inspections GROUP BY building_id "
+            "ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()[0]
+        inspection_id = conn.execute("SELECT MAX(id) FROM inspections").fetchone()[0]
+    today = date.today()
+    return {
+        "client_id": client_id,
+        "building_id": building_id,
+        "inspection_id": inspection_id,
+        "year": today.year,
+        "month": today.month,
+        "since_90_days": date.fromordinal(today.toordinal() - 90).isoformat(),
+    }
+
+
+def query_functions():
+    """Every cached read function in database.py, by name."""
+    return {
+        name: fn for name, fn in sorted(vars(database).items())
+        if callable(fn) and not name.startswith("_") and hasattr(fn, "__wrapped__")
+    }
+
+
+def call_arguments(name, fn, samples):
+    """kwargs for one call, or None when a required argument has no sample."""
+    kwargs = {}
+    for param in inspect.signature(fn).parameters.values():
+        if param.default is not inspect.Parameter.empty:
+            continue
+        if param.name not in samples:
+            return None
+        kwargs[param.name] = samples[param.name]
+    if name in QUERY_KWARGS:
+        kwargs.update(QUERY_KWARGS[name](samples))
+    return kwargs
+
+
+def timed_ms(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_queries(repeat):
+    samples = sample_arguments()
+    results = {}
+    for name, fn in query_functions().items():
+        kwargs = call_arguments(name, fn, samples)
+        if kwargs is None:
+            continue
+        cold, warm = [], []
+        fn(**kwargs)  # warm the page cache and connection before timing
+        for _ in range(repeat):
+            database.invalidate_cache()
+            cold.append(timed_ms(lambda: fn(**kwargs)))
+            warm.append(timed_ms(lambda: fn(**kwargs)))
+        results[name] = {"cold_ms": round(statistics.median(cold), 3),
+                         "warm_ms": round(statistics.median(warm), 3)}
+        print(f"  {name:<34} cold {results[name]['cold_ms']:>10.2f} ms   "
+              f"warm {results[name]['warm_ms']:>8.3f} ms", file=sys.stderr)
+    return results
+
+
+def page_files():
+    return ["app.py"] + sorted(
+        os.path.relpath(p, REPO_ROOT) for p in glob.glob(os.path.join(REPO_ROOT, "pages", "*.py"))
+    )
+
+
+def bench_pages(repeat, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    results = {}
+    for page in page_files():
+        cold, warm, errors = [], [], []
+        for _ in range(repeat):
+            database.invalidate_cache()
+            at = AppTest.from_file(os.path.join(REPO_ROOT, page), default_timeout=timeout)
+            cold.append(timed_ms(at.run))
+            warm.append(timed_ms(at.run))
+            errors.extend(e.value for e in at.exception)
+        results[page] = {"cold_ms": round(statistics.median(cold), 1),
+                         "warm_ms": round(statistics.median(warm), 1)}
+        if errors:
+            results[page]["errors"] = sorted(set(errors))
+        print(f"  {page:<34} cold {results[page]['cold_ms']:>10.1f} ms   "
+              f"warm {results[page]['warm_ms']:>8.1f} ms"
+              + ("   ERROR" if errors else ""), file=sys.stderr)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """List timings slower than the baseline beyond both thresholds."""
+    regressions = []
+    for scale, kinds in results["scales"].items():
+        for kind in ("queries", "pages"):
+            for name, metrics in kinds.get(kind, {}).items():
+                base = baseline.get("scales", {}).get(scale, {}).get(kind, {}).get(name)
+                if not base:
+                    continue
+                for metric in ("cold_ms", "warm_ms"):
+                    now, before = metrics.get(metric), base.get(metric)
+                    if now is None or before is None:
+                        continue
+                    if now > before * (1 + tolerance) and now - before > min_delta_ms:
+                        regressions.append({
+                            "scale": scale, "kind": kind, "name": name, "metric": metric,
+                            "baseline_ms": before, "current_ms": now,
+                            "change": f"{now / before - 1:+.0%}" if before else "new",
+                        })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scales", nargs="+", choices=list(SCALES), default=["seed", "1k", "10k"])
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR,
+                        help="where generated databases are kept between runs")
+    parser.add_argument("--rebuild", action="store_true", help="regenerate the databases")
+    parser.add_argument("--repeat", type=int, default=5, help="query timing repeats")
+    parser.add_argument("--page-repeat", type=int, default=1)
+    parser.add_argument("--page-timeout", type=float, default=600)
+    parser.add_argument("--skip-pages", action="store_true")
+    parser.add_argument("--json", default=None, help="write results here (default: stdout)")
+    parser.add_argument("--baseline", default=None, help="baseline results to compare with")
+    parser.add_argument("--save-baseline", default=None, help="also write results here")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown relative to the baseline (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    os.chdir(REPO_ROOT)
+    results = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "machine": platform.machine(),
+            "repeat": args.repeat,
+        },
+        "scales": {},
+    }
+    for scale in args.scales:
+        path = build_database(scale, args.data_dir, args.rebuild)
+        use_database(path)
+        database.migrate()   # databases kept from earlier runs may predate a migration
+        print(f"== {scale}: {row_counts(path)} ==", file=sys.stderr)
+        scale_results = {"rows": row_counts(path), "queries": bench_queries(args.repeat)}
+        if not args.skip_pages:
+            scale_results["pages"] = bench_pages(args.page_repeat, args.page_timeout)
+        results["scales"][scale] = scale_results
+        database.close_all()
+
+    output = json.dumps(results, indent=2)
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(output)
+
+    failed = False
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        for r in regressions:
+            print(f"REGRESSION {r['scale']} {r['kind']} {r['name']} {r['metric']}: "
+                  f"{r['baseline_ms']:.2f} -> {r['current_ms']:.2f} ms ({r['change']})",
+                  file=sys.stderr)
+        failed = bool(regressions)
+        if not failed:
+            print("no regressions against the baseline", file=sys.stderr)
+    page_errors = [
+        page for s in results["scales"].values()
+        for page, r in s.get("pages", {}).items() if r.get("errors")
+    ]
+    raise SystemExit(1 if failed or page_errors else 0)
+
+
+if __name__ == "__main__":
+    main()
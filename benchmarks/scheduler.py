@@ -0,0 +1,67 @@
+"""
+TTS Guard — Weekly Planner Benchmark
+Plans a week over synthetic portfolios of 100 to 1,000 due buildings spread
+across Abu Dhabi areas and compares the greedy plan with greedy + local
+search: run time, buildings planned, travel, area changes, workload spread
+and plan cost.
+
+    python -m benchmarks.scheduler --sizes 100 300 1000
+"""
+
+import argparse
+import random
+from datetime import date
+
+import pandas as pd
+
+from scheduler import plan_week
+
+SIZES = (100, 300, 600, 1000)
+AREAS = [
+    "Al Reem Island", "Yas Island", "Saadiyat", "Khalifa City", "Mussafah", "ICAD",
+    "Al Wahda", "Tourist Club", "Corniche", "Al Khalidiya", "Al Bateen", "Mohammed Bin Zayed City",
+]
+BUILDINGS_PER_TECHNICIAN = 20  # about one technician-week of visits
+
+
+def make_candidates(n, seed=0):
+    """Synthetic rows shaped like load_candidates()."""
+    rng = random.Random(seed + n)
+    overdue = [rng.random() < 0.7 for _ in range(n)]
+    return pd.DataFrame({
+        "building_id": range(1, n + 1),
+        "building_name": [f"Building {i}" for i in range(1, n + 1)],
+        "client_name": [f"Client {rng.randint(1, max(n // 10, 1))}" for _ in range(n)],
+        "area": [rng.choice(AREAS) for _ in range(n)],
+        "equipment_count": [rng.randint(5, 45) for _ in range(n)],
+        "days_until_next": [
+            -rng.randint(1, 90) if late else rng.randint(0, 7) for late in overdue
+        ],
+        "status": ["overdue" if late else "due_soon" for late in overdue],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--search-seconds", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = date(2026, 10, 19)  # a Monday
+    print(f"{'buildings':>9} {'techs':>5}  {'phase':<14} {'ms':>7} {'planned':>7} "
+          f"{'travel':>7} {'areas':>6} {'spread':>7} {'cost':>10}")
+    for n in args.sizes:
+        candidates = make_candidates(n, args.seed)
+        technicians = [f"Tech {i}" for i in range(1, max(n // BUILDINGS_PER_TECHNICIAN, 2) + 1)]
+        for phase, seconds in (("greedy", 0), ("+ local search", args.search_seconds)):
+            stats = plan_week(candidates, technicians, start=start, as_of=start,
+                              search_seconds=seconds).stats
+            print(f"{n:>9} {len(technicians):>5}  {phase:<14} {stats['elapsed_ms']:>7.0f} "
+                  f"{stats['planned']:>7} {stats['travel_minutes']:>7} "
+                  f"{stats['area_changes']:>6} {stats['load_spread_minutes']:>7.0f} "
+                  f"{stats['cost']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
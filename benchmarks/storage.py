@@ -0,0 +1,123 @@
+"""
+TTS Guard — Storage Benchmark
+Read latency (p50/p95/p99) while concurrent sessions submit inspections,
+comparing SQLite's default rollback journal against the tuned WAL profile.
+
+    python -m benchmarks.storage --readers 8 --writers 4 --seconds 5
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date
+
+import database
+from seed_data import seed
+
+# SQLite defaults, i.e. what init_db() ran with before the storage profile.
+DEFAULT_PROFILE = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "mmap_size": 0,
+    "cache_size": -2000,
+    "temp_store": "DEFAULT",
+    "busy_timeout": 0,
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    k = max(int(round(pct / 100 * len(ordered))) - 1, 0)
+    return ordered[k]
+
+
+def run_profile(name, profile, readers, writers, seconds):
+    """Run the mixed read/write load against a fresh database."""
+    database.DB_PATH = os.path.join(tempfile.mkdtemp(prefix="tts_bench_"), "bench.db")
+    database.set_storage_profile(**profile)
+    database.init_db()
+    if not database.has_data():
+        seed()
+    building_ids = database.get_all_buildings()["id"].tolist()
+
+    stop = threading.Event()
+    read_latencies = []
+    write_latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def reader():
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                database.get_overdue_inspections()
+                database.get_financial_summary()
+            except Exception as exc:  # pandas re-raises sqlite errors as DatabaseError
+                with lock:
+                    errors.append(f"read: {exc}")
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            read_latencies.extend(local)
+
+    def writer():
+        local = []
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                database.insert_inspection(
+                    random.choice(building_ids), date.today().isoformat(),
+                    random.choice(database.TECHNICIANS), 10, 9, 1, "benchmark",
+                )
+            except Exception as exc:
+                with lock:
+                    errors.append(f"write: {exc}")
+                continue
+            local.append(time.perf_counter() - start)
+        with lock:
+            write_latencies.extend(local)
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    database.close_all()
+
+    print(f"\n== {name} ==")
+    if read_latencies:
+        ms = [x * 1000 for x in read_latencies]
+        print(f"reads:  {len(ms):>6}  p50 {statistics.median(ms):7.2f} ms  "
+              f"p95 {percentile(ms, 95):7.2f} ms  p99 {percentile(ms, 99):7.2f} ms")
+    if write_latencies:
+        ms = [x * 1000 for x in write_latencies]
+        print(f"writes: {len(ms):>6}  p50 {statistics.median(ms):7.2f} ms  "
+              f"p99 {percentile(ms, 99):7.2f} ms  ({len(ms) / seconds:.0f}/s)")
+    print(f"errors: {len(errors)}" + (f"  e.g. {errors[0]}" if errors else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    tuned = dict(database.STORAGE_PROFILE)
+    run_profile("default (rollback journal)", DEFAULT_PROFILE,
+                args.readers, args.writers, args.seconds)
+    run_profile("tuned (WAL profile)", tuned,
+                args.readers, args.writers, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+TTS Guard — Complaint Ticket Sequence Check
+Fires many parallel insert_complaint() calls from several processes (each
+with several threads) at one fresh database and checks that every ticket
+number is unique and the year's sequence has no gaps. Then times ticket
+allocation against a large complaints table: the old COUNT(*) ... LIKE scan
+versus the ticket_sequences counter, and shows the old scheme colliding
+after a deletion.
+
+    python -m benchmarks.tickets --processes 4 --threads 4 --inserts 50
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+import database
+from seed_data import seed
+
+
+def legacy_ticket_number(cursor, year):
+    """How insert_complaint() allocated ticket numbers before ticket_sequences."""
+    cursor.execute(
+        "SELECT COUNT(*) FROM complaints WHERE ticket_number LIKE ?", (f"TTS-{year}-%",)
+    )
+    return f"TTS-{year}-{cursor.fetchone()[0] + 1:04d}"
+
+
+def fresh_database():
+    database.DB_PATH = os.path.join(tempfile.mkdtemp(prefix="tts_bench_"), "bench.db")
+    database.init_db()
+    if not database.has_data():
+        seed()
+    return database.DB_PATH
+
+
+def _insert_worker(db_path, threads, inserts):
+    """One process: `threads` threads each inserting `inserts` complaints."""
+    database.DB_PATH = db_path
+    tickets, errors = [], []
+    lock = threading.Lock()
+
+    def run():
+        local = []
+        for i in range(inserts):
+            try:
+                local.append(database.insert_complaint(1, 1, f"load {i}", "low"))
+            except Exception as exc:
+                with lock:
+                    errors.append(f"{type(exc).__name__}: {exc}")
+        with lock:
+            tickets.extend(local)
+
+    pool = [threading.Thread(target=run) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    database.close_all()
+    return tickets, errors
+
+
+def check_concurrency(processes, threads, inserts):
+    db_path = fresh_database()
+    year = date.today().year
+    conn = sqlite3.connect(db_path)
+    before = conn.execute(
+        "SELECT last_value FROM ticket_sequences WHERE year = ?", (year,)
+    ).fetchone()
+    start_value = before[0] if before else 0
+    database.close_all()
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        results = list(pool.map(_insert_worker, [db_path] * processes,
+                                [threads] * processes, [inserts] * processes))
+    elapsed = time.perf_counter() - started
+    tickets = [t for batch, _ in results for t in batch]
+    errors = [e for _, batch in results for e in batch]
+    expected = {database.format_ticket_number(year, n)
+                for n in range(start_value + 1, start_value + len(tickets) + 1)}
+    stored = conn.execute(
+        "SELECT COUNT(*) FROM complaints WHERE message LIKE 'load %'"
+    ).fetchone()[0]
+    conn.close()
+
+    print(f"== concurrency: {processes} processes x {threads} threads x {inserts} inserts ==")
+    print(f"inserted {len(tickets)} ({stored} rows) in {elapsed:.2f}s, errors: {len(errors)}"
+          + (f"  e.g. {errors[0]}" if errors else ""))
+    print(f"unique: {len(set(tickets)) == len(tickets)}, gap-free: {set(tickets) == expected}")
+    return not errors and set(tickets) == expected and len(set(tickets)) == len(tickets)
+
+
+def compare_allocation(existing, repeat):
+    db_path = fresh_database()
+    year = date.today().year
+    conn = sqlite3.connect(db_path)
+    # Bulk-load the history without the per-row building_stats refresh (it
+    # re-counts the building's open complaints on every insert).
+    conn.execute("DROP TRIGGER trg_complaints_stats_insert")
+    conn.executemany(
+        "INSERT INTO complaints (ticket_number, client_id, building_id, message, priority, status) "
+        "VALUES (?, 1, 1, 'history', 'low', 'resolved')",
+        # Past years of history, 20,000 tickets a year
+        ((database.format_ticket_number(year - 1 - n // 20000, n % 20000 + 1),)
+         for n in range(existing)),
+    )
+    for statement in database._building_stats_triggers():
+        conn.execute(statement)
+    conn.commit()
+    cursor = conn.cursor()
+
+    def timed(fn):
+        samples = []
+        for _ in range(repeat):
+            cursor.execute("BEGIN IMMEDIATE")
+            start = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - start) * 1000)
+            conn.rollback()
+        return statistics.median(samples)
+
+    legacy = timed(lambda: legacy_ticket_number(cursor, year))
+    sequence = timed(lambda: database._reserve_ticket_numbers(cursor, year, 1))
+    print(f"\n== allocation with {existing:,} past tickets ==")
+    print(f"COUNT(*) LIKE scan: {legacy:8.3f} ms   ticket_sequences: {sequence:8.3f} ms")
+
+    # Deleting a ticket makes the old scheme re-issue the newest number.
+    last = conn.execute(
+        "SELECT MAX(ticket_number) FROM complaints WHERE ticket_number LIKE ?",
+        (f"TTS-{year}-%",),
+    ).fetchone()[0]
+    conn.execute("DELETE FROM complaints WHERE ticket_number = 'TTS-%d-0001'" % year)
+    conn.commit()
+    print(f"after deleting TTS-{year}-0001 (newest {last}): "
+          f"legacy issues {legacy_ticket_number(cursor, year)}, "
+          f"sequence issues {database.insert_complaint(1, 1, 'after delete', 'low')}")
+    conn.close()
+    database.close_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--inserts", type=int, default=50, help="per thread")
+    parser.add_argument("--existing", type=int, nargs="+", default=[10000, 200000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    ok = check_concurrency(args.processes, args.threads, args.inserts)
+    for existing in args.existing:
+        compare_allocation(existing, args.repeat)
+    raise SystemExit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+TTS Guard — Inspection Checklist Model
+Pass/fail state for one building's equipment, built from a single equipment
+read and kept in Streamlit session state across reruns.
+
+Items are indexed by equipment ID and grouped by type up front, and the
+passed/failed counters are maintained on every change, so a rerun touches
+each item once instead of re-filtering the equipment DataFrame per item.
+"""
+
+from database import get_equipment_by_building
+
+
+class Checklist:
+    """Equipment checklist for one inspection: ID index, type groups, results."""
+
+    def __init__(self, building_id, equipment_df):
+        self.building_id = building_id
+        ids = [int(eid) for eid in equipment_df["id"].tolist()]
+        types = equipment_df["type"].tolist()
+        self.items = dict(zip(ids, types))          # equipment ID -> type
+        self.groups = {}                            # type -> [equipment IDs]
+        for eid, eq_type in zip(ids, types):
+            self.groups.setdefault(eq_type, []).append(eid)
+        self.results = dict.fromkeys(ids, True)     # equipment ID -> passed
+        self._failed_by_type = dict.fromkeys(self.groups, 0)
+        self.failed = 0
+
+    @classmethod
+    def for_building(cls, building_id):
+        """Build the checklist from one read of the building's equipment."""
+        return cls(building_id, get_equipment_by_building(building_id))
+
+    def __len__(self):
+        return len(self.results)
+
+    @property
+    def passed(self):
+        return len(self.results) - self.failed
+
+    def set(self, equipment_id, passed):
+        """Record one item's result, updating the counters if it changed."""
+        passed = bool(passed)
+        if self.results[equipment_id] == passed:
+            return
+        self.results[equipment_id] = passed
+        delta = -1 if passed else 1
+        self.failed += delta
+        self._failed_by_type[self.items[equipment_id]] += delta
+
+    def group_failed(self, eq_type):
+        """Failed items of one equipment type."""
+        return self._failed_by_type[eq_type]
+
+    def item_results(self):
+        """Mapping equipment ID -> passed, as taken by insert_inspection()."""
+        return dict(self.results)
@@ -1,24 +1,271 @@
 """
 TTS Guard — Database Layer
-SQLite schema (8 tables) and all query functions.
+SQLite schema (8 tables), connection pool and all query functions.
 """
 
+import collections
+import contextlib
+import dataclasses
+import functools
+import json
+import logging
 import sqlite3
+import sys
+import threading
+import time
+import types
 import pandas as pd
 from datetime import date, datetime, timedelta
 import os
 
-DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_guard.db")
+# TTS_GUARD_DB points the app at another database, e.g. a scale-test one
+# generated with `python -m seed_data --buildings 100000 -o scale.db`.
+DB_PATH = os.environ.get(
+    "TTS_GUARD_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "tts_guard.db"),
+)
 
 _db_initialized = False
 
 
+# ---------------------------------------------------------------------------
+# CONNECTION POOL
+# ---------------------------------------------------------------------------
+# Query functions check out a connection with `with _connection() as conn:`;
+# leaving the block (normally or via an exception) hands it back to a bounded,
+# process-wide pool instead of tearing it down. A checked-out connection that
+# is never released keeps its slot for good, so every checkout must go through
+# _connection() or release in a finally. Streamlit runs every session (and every rerun) on its own
+# thread, so connections are shared across threads rather than thread-local.
+
+POOL_SIZE = 8               # max open connections per process
+POOL_TIMEOUT = 10.0         # seconds to wait for a free connection
+POOL_MAX_AGE = 600.0        # recycle connections older than this (seconds)
+POOL_HEALTH_CHECK_IDLE = 30.0  # ping connections idle longer than this (seconds)
+
+# Pragmas applied to every new connection. WAL lets readers on other sessions
+# keep going while an inspection is being written; busy_timeout makes SQLite
+# wait for the write lock instead of failing immediately.
+STORAGE_PROFILE = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,   # bytes
+    "cache_size": -32000,             # negative = KiB (~32 MB)
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,             # ms
+}
+
+WRITE_RETRIES = 5           # retries after SQLITE_BUSY before giving up
+WRITE_RETRY_BACKOFF = 0.05  # seconds, doubled per attempt
+
+
+# Handed to a waiter when a connection was discarded: "you may open a new one".
+_OPEN_SLOT = object()
+
+
+class _PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() returns it to the pool."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.db_path = None
+        self.opened_at = time.monotonic()
+        self.released_at = self.opened_at
+
+    def close(self):
+        _pool.release(self)
+
+    def discard(self):
+        """Really close the underlying sqlite3 connection."""
+        super().close()
+
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections shared by all Streamlit sessions."""
+
+    def __init__(self, max_size=POOL_SIZE, timeout=POOL_TIMEOUT,
+                 max_age=POOL_MAX_AGE, health_check_idle=POOL_HEALTH_CHECK_IDLE):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_age = max_age
+        self.health_check_idle = health_check_idle
+        self._idle = []
+        self._waiters = collections.deque()
+        self._open_count = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "hits": 0, "waits": 0, "opens": 0, "recycled": 0,
+            "health_failures": 0, "closed": 0,
+        }
+
+    def _open(self, db_path):
+        conn = sqlite3.connect(
+            db_path, factory=_connection_class(), check_same_thread=False,
+        )
+        conn.db_path = db_path
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON")
+        _apply_storage_profile(conn)
+        return conn
+
+    def _is_usable(self, conn, db_path):
+        """Return False if an idle connection must be recycled instead of reused."""
+        now = time.monotonic()
+        if (conn.db_path != db_path or now - conn.opened_at > self.max_age
+                or type(conn) is not _connection_class()):
+            self._stats["recycled"] += 1
+            return False
+        if now - conn.released_at > self.health_check_idle:
+            try:
+                conn.execute("SELECT 1").fetchone()
+            except sqlite3.Error:
+                self._stats["health_failures"] += 1
+                return False
+        return True
+
+    def _take_idle(self, db_path):
+        """Pop a reusable idle connection, discarding stale ones. Caller holds the lock."""
+        while self._idle:
+            conn = self._idle.pop()
+            if self._is_usable(conn, db_path):
+                self._stats["hits"] += 1
+                return conn
+            self._open_count -= 1
+            conn.discard()
+        return None
+
+    def _hand_off(self, item):
+        """Give a connection (or an open slot) to the longest waiter. Caller holds the lock."""
+        if self._waiters:
+            self._waiters.popleft()["conn"] = item
+            self._cond.notify_all()
+        elif item is _OPEN_SLOT:
+            self._open_count -= 1
+        else:
+            self._idle.append(item)
+
+    def acquire(self, db_path):
+        """Check out a connection, opening a new one while under max_size.
+
+        When the pool is exhausted callers queue in FIFO order and released
+        connections are handed straight to the longest waiter, so a steady
+        stream of readers cannot starve a writer.
+        """
+        with self._cond:
+            conn = None
+            if not self._waiters:
+                conn = self._take_idle(db_path)
+                if conn is None and self._open_count < self.max_size:
+                    self._open_count += 1
+                    conn = _OPEN_SLOT
+            if conn is None:
+                slot = {"conn": None}
+                self._waiters.append(slot)
+                self._stats["waits"] += 1
+                deadline = time.monotonic() + self.timeout
+                while slot["conn"] is None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiters.remove(slot)
+                        raise sqlite3.OperationalError(
+                            f"Timed out waiting for a database connection "
+                            f"({self.max_size} in use)"
+                        )
+                    self._cond.wait(remaining)
+                conn = slot["conn"]
+                if conn is not _OPEN_SLOT:
+                    if self._is_usable(conn, db_path):
+                        self._stats["hits"] += 1
+                    else:
+                        conn.discard()
+                        conn = _OPEN_SLOT
+        if conn is not _OPEN_SLOT:
+            return conn
+        try:
+            conn = self._open(db_path)
+        except Exception:
+            with self._cond:
+                self._hand_off(_OPEN_SLOT)
+            raise
+        with self._cond:
+            self._stats["opens"] += 1
+        return conn
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back any open transaction."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            healthy = True
+        except sqlite3.Error:
+            healthy = False
+        with self._cond:
+            if healthy and time.monotonic() - conn.opened_at <= self.max_age:
+                conn.released_at = time.monotonic()
+                self._hand_off(conn)
+            else:
+                self._stats["recycled"] += 1
+                conn.discard()
+                self._hand_off(_OPEN_SLOT)
+
+    def close_all(self):
+        """Close every idle connection (checked-out ones close on release)."""
+        with self._cond:
+            for conn in self._idle:
+                conn.discard()
+                self._stats["closed"] += 1
+            self._open_count -= len(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+
+    def stats(self):
+        """Return a snapshot of pool counters."""
+        with self._cond:
+            return dict(
+                self._stats,
+                open=self._open_count,
+                idle=len(self._idle),
+                in_use=self._open_count - len(self._idle),
+                max_size=self.max_size,
+            )
+
+
+_pool = ConnectionPool()
+
+
+def _apply_storage_profile(conn):
+    """Apply STORAGE_PROFILE pragmas to a freshly opened connection."""
+    for pragma, value in STORAGE_PROFILE.items():
+        conn.execute(f"PRAGMA {pragma} = {value}").fetchall()
+
+
+def set_storage_profile(**pragmas):
+    """Override storage pragmas for connections opened from now on.
+
+    Idle pooled connections are closed so they reopen with the new pragmas;
+    connections checked out at the time keep the old ones until recycled.
+    """
+    STORAGE_PROFILE.update(pragmas)
+    close_all()
+
+
+def close_all():
+    """Close all pooled connections (used by tests and after DB_PATH changes)."""
+    _pool.close_all()
+
+
+def get_pool_stats():
+    """Return connection pool statistics: hits, waits, opens, recycled, ..."""
+    return _pool.stats()
+
+
 def get_connection():
-    """Return a sqlite3 connection with Row factory for dict-like access."""
+    """Return a pooled sqlite3 connection with Row factory for dict-like access.
+
+    Calling close() on the returned connection releases it back to the pool.
+    """
     global _db_initialized
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON")
+    conn = _pool.acquire(DB_PATH)
     if not _db_initialized:
         # Set flag first to prevent recursion (init_db also calls get_connection)
         _db_initialized = True
@@ -26,6 +273,580 @@ def get_connection():
     return conn
 
 
+@contextlib.contextmanager
+def _connection():
+    """Check out a pooled connection for a with block, released even on error."""
+    conn = get_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# WRITE PATH
+# ---------------------------------------------------------------------------
+# All application writes go through _execute_write(). A process-wide lock
+# queues writers so concurrent sessions never race for SQLite's single write
+# lock; BEGIN IMMEDIATE takes that lock up front, and SQLITE_BUSY from another
+# process (e.g. a seed run) is retried with backoff.
+
+_write_lock = threading.RLock()
+
+
+def _is_busy_error(exc):
+    code = getattr(exc, "sqlite_errorcode", None)
+    if code is not None:
+        return code in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    msg = str(exc).lower()
+    return "locked" in msg or "busy" in msg
+
+
+def _execute_write(work, tables):
+    """Run work(cursor) in one serialized write transaction and return its result.
+
+    `tables` names the tables the write touches; their cached reads are
+    invalidated once the transaction commits.
+    """
+    with _write_lock:
+        for attempt in range(WRITE_RETRIES + 1):
+            conn = get_connection()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                result = work(conn.cursor())
+                conn.commit()
+                invalidate_cache(tables)
+                return result
+            except sqlite3.OperationalError as exc:
+                if not _is_busy_error(exc) or attempt == WRITE_RETRIES:
+                    raise
+            finally:
+                conn.close()
+            time.sleep(WRITE_RETRY_BACKOFF * (2 ** attempt))
+
+
+# ---------------------------------------------------------------------------
+# QUERY CACHE
+# ---------------------------------------------------------------------------
+# Streamlit re-runs the whole page script on every widget interaction, so the
+# same reads repeat constantly. Read functions decorated with @_cached(...)
+# share one LRU cache per process, keyed by function, arguments, database
+# path and today's date (several queries are relative to date.today()).
+# Each entry is tagged with the tables it reads; writes invalidate by table.
+# Writes from other processes (CLI rebuilds, seed_scale, report-batch workers,
+# a second Streamlit server) never reach that invalidation, so lookups also
+# poll PRAGMA data_version on a side connection and clear the whole cache
+# when anything has committed since the last poll.
+
+CACHE_MAX_ENTRIES = 512
+CACHE_FRESHNESS_INTERVAL = 1.0   # seconds between PRAGMA data_version polls
+
+# Tables updated by triggers when the key table is written.
+_TRIGGER_DEPENDENTS = {
+    "clients": {"ledger_summary"},
+    "buildings": {"building_stats", "ledger_summary"},
+    "contracts": {"ledger_summary"},
+    "payments": {"ledger_summary"},
+    "inspections": {"building_stats", "report_artifacts", "scheduled_inspections"},
+    "equipment": {"building_stats"},
+    "complaints": {"building_stats", "ticket_sequences"},
+}
+
+
+class QueryCache:
+    """Thread-safe LRU cache of query results with table-level invalidation."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()   # key -> (value, tables, expires_at)
+        self._by_table = collections.defaultdict(set)
+        self._generations = collections.defaultdict(int)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0,
+                       "expirations": 0}
+
+    def get(self, key):
+        """Return (True, value) on a hit, (False, None) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and time.monotonic() > entry[2]:
+                self._drop(key)
+                self._stats["expirations"] += 1
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, entry[0]
+
+    def generation(self, tables):
+        """Snapshot of the tables' write generations, taken before a read."""
+        with self._lock:
+            return tuple(self._generations[t] for t in tables)
+
+    def put(self, key, value, tables, generation, ttl=None):
+        """Store a result unless one of its tables was written since `generation`.
+
+        With `ttl` (seconds) the entry also expires after that long.
+        """
+        with self._lock:
+            if tuple(self._generations[t] for t in tables) != generation:
+                return
+            expires_at = None if ttl is None else time.monotonic() + ttl
+            self._entries[key] = (value, tables, expires_at)
+            self._entries.move_to_end(key)
+            for table in tables:
+                self._by_table[table].add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def _drop(self, key):
+        """Remove one entry and its table tags. Caller holds the lock."""
+        _, tables, _ = self._entries.pop(key)
+        for table in tables:
+            self._by_table[table].discard(key)
+
+    def invalidate(self, tables=None):
+        """Drop entries reading any of `tables` (all entries when None)."""
+        with self._lock:
+            if tables is None:
+                self._stats["invalidations"] += len(self._entries)
+                self._entries.clear()
+                self._by_table.clear()
+                self._generations["*"] += 1
+                return
+            for table in tables:
+                self._generations[table] += 1
+                for key in self._by_table.pop(table, ()):
+                    entry = self._entries.pop(key, None)
+                    if entry is not None:
+                        self._stats["invalidations"] += 1
+                        for other in entry[1]:
+                            if other != table:
+                                self._by_table[other].discard(key)
+
+    def stats(self):
+        """Return hit/miss/eviction/invalidation/expiration counters and current size."""
+        with self._lock:
+            return dict(self._stats, size=len(self._entries), max_entries=self.max_entries)
+
+
+class _DataVersionWatch:
+    """Notice commits to a database file made through any other connection."""
+
+    def __init__(self, interval=CACHE_FRESHNESS_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._path = None
+        self._conn = None
+        self._version = None
+        self._polled_at = 0.0
+
+    def changed(self, path):
+        """True if `path` saw a commit since the last poll (or can't be watched).
+
+        Polls at most once per `interval` seconds; in between it reports no
+        change. PRAGMA data_version counts every other connection's commits,
+        so this process's own pooled writes register here too.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if path == self._path and now - self._polled_at < self.interval:
+                return False
+            self._polled_at = now
+            try:
+                if path != self._path:
+                    self._close()
+                    if not os.path.exists(path):
+                        return True
+                    self._conn = sqlite3.connect(path, check_same_thread=False)
+                    self._path = path
+                    self._version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                    return True
+                version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            except sqlite3.Error:
+                self._close()
+                return True
+            changed = version != self._version
+            self._version = version
+            return changed
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = self._path = self._version = None
+
+
+_cache = QueryCache()
+_data_version = _DataVersionWatch()
+
+
+def _expand_tables(tables):
+    expanded = set(tables)
+    for table in tables:
+        expanded |= _TRIGGER_DEPENDENTS.get(table, set())
+    return expanded
+
+
+# Table -> time.time() of this process's latest write ("*" for clear-all).
+# precompute.load_snapshot() compares it with when a snapshot was computed.
+_last_write = {}
+
+
+def invalidate_cache(tables=None):
+    """Invalidate cached reads of `tables` (plus trigger-maintained dependents).
+
+    With no argument the whole cache is cleared (reset, seed, migrations).
+    """
+    expanded = None if tables is None else _expand_tables(tables)
+    now = time.time()
+    for table in ("*",) if expanded is None else expanded:
+        _last_write[table] = now
+    _cache.invalidate(expanded)
+
+
+def last_write_time(tables):
+    """time.time() of this process's latest write to any of `tables`, or 0.0."""
+    return max(_last_write.get(table, 0.0) for table in (*tables, "*"))
+
+
+def get_cache_stats():
+    """Return query cache statistics: hits, misses, evictions, invalidations, size."""
+    return _cache.stats()
+
+
+def _copy_result(value):
+    """Callers mutate returned DataFrames/dicts, so hand out copies."""
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: _copy_result(v) for k, v in value.items()}
+    return value
+
+
+def _cached(*tables, ttl=None):
+    """Cache a read function's result, tagged with the tables it reads.
+
+    `ttl` (seconds) additionally expires the result. Writes made by other
+    processes clear the cache on the next lookup after they commit, at most
+    CACHE_FRESHNESS_INTERVAL seconds late.
+    """
+    # "*" ties every entry to the clear-all generation as well
+    tags = tuple(sorted(tables)) + ("*",)
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (fn.__name__, args, tuple(sorted(kwargs.items())),
+                   DB_PATH, date.today().toordinal())
+            if _data_version.changed(DB_PATH):
+                _cache.invalidate()
+            try:
+                hit, value = _cache.get(key)
+            except TypeError:  # unhashable argument, e.g. a DataFrame
+                return fn(*args, **kwargs)
+            if hit:
+                return _copy_result(value)
+            generation = _cache.generation(tags)
+            value = fn(*args, **kwargs)
+            _cache.put(key, value, tags, generation, ttl)
+            return _copy_result(value)
+
+        wrapper.tables = frozenset(tables)
+        return wrapper
+
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# QUERY INSTRUMENTATION
+# ---------------------------------------------------------------------------
+# With TTS_GUARD_QUERY_STATS=1 (or enable_query_stats()) the pool opens
+# connections whose cursors time every statement: wall time across execute
+# and fetch, rows returned, the function that issued it and the page script
+# it ran for. Timings land in per-statement rolling windows (p50/p95/p99 on
+# the Diagnostics page); statements slower than SLOW_QUERY_MS are logged with
+# their EXPLAIN QUERY PLAN. When off, the pool hands out plain
+# _PooledConnections and nothing is measured.
+
+SLOW_QUERY_MS = float(os.environ.get("TTS_GUARD_SLOW_QUERY_MS", 100))
+QUERY_STATS_WINDOW = 1000   # most recent timings kept per statement
+SLOW_QUERY_LOG_SIZE = 200   # most recent slow queries kept in memory
+
+_query_log = logging.getLogger("tts_guard.queries")
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _explain_query_plan(conn, sql, parameters):
+    """EXPLAIN QUERY PLAN for a statement as an indented tree, or None."""
+    try:
+        # A bare sqlite3.Cursor, so the EXPLAIN itself is not instrumented
+        rows = sqlite3.Cursor(conn).execute(
+            "EXPLAIN QUERY PLAN " + sql, parameters
+        ).fetchall()
+    except (sqlite3.Error, ValueError):
+        return None
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return "\n".join(lines) or None
+
+
+class QueryStats:
+    """Rolling per-statement timings plus a log of slow queries."""
+
+    def __init__(self, window=QUERY_STATS_WINDOW, slow_ms=SLOW_QUERY_MS,
+                 log_size=SLOW_QUERY_LOG_SIZE):
+        self.window = window
+        self.slow_ms = slow_ms
+        self._series = {}   # (function, sql) -> counters and recent timings
+        self._slow = collections.deque(maxlen=log_size)
+        self._lock = threading.Lock()
+
+    def record(self, conn, sql, parameters, elapsed_ms, rows, function, page):
+        statement = " ".join(sql.split())
+        with self._lock:
+            series = self._series.get((function, statement))
+            if series is None:
+                series = self._series[(function, statement)] = {
+                    "calls": 0, "rows": 0, "total_ms": 0.0, "max_ms": 0.0,
+                    "pages": collections.Counter(),
+                    "recent": collections.deque(maxlen=self.window),
+                }
+            series["calls"] += 1
+            series["rows"] += rows
+            series["total_ms"] += elapsed_ms
+            series["max_ms"] = max(series["max_ms"], elapsed_ms)
+            series["pages"][page] += 1
+            series["recent"].append(elapsed_ms)
+        if elapsed_ms < self.slow_ms:
+            return
+        plan = None if parameters is None else _explain_query_plan(conn, sql, parameters)
+        self._slow.append({
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "elapsed_ms": elapsed_ms, "rows": rows, "function": function,
+            "page": page, "sql": statement, "plan": plan,
+        })
+        _query_log.warning(
+            "slow query %.1f ms, %d rows, %s (page %s): %s\n%s",
+            elapsed_ms, rows, function, page or "-", statement, plan or "(no plan)",
+        )
+
+    def summary(self):
+        """Per-statement calls, rows and p50/p95/p99 over the rolling window."""
+        with self._lock:
+            items = [
+                (key, dict(s, pages=dict(s["pages"]), recent=sorted(s["recent"])))
+                for key, s in self._series.items()
+            ]
+        summary = []
+        for (function, statement), s in items:
+            recent = s["recent"]
+            summary.append({
+                "function": function,
+                "pages": ", ".join(sorted(p for p in s["pages"] if p)) or None,
+                "sql": statement,
+                "calls": s["calls"],
+                "rows_per_call": s["rows"] / s["calls"],
+                "p50_ms": _percentile(recent, 50),
+                "p95_ms": _percentile(recent, 95),
+                "p99_ms": _percentile(recent, 99),
+                "max_ms": s["max_ms"],
+                "total_ms": s["total_ms"],
+            })
+        return sorted(summary, key=lambda row: row["total_ms"], reverse=True)
+
+    def slow_queries(self):
+        """Logged slow queries, newest first."""
+        return list(reversed(self._slow))
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._slow.clear()
+
+
+_query_stats = (
+    QueryStats() if os.environ.get("TTS_GUARD_QUERY_STATS", "") not in ("", "0") else None
+)
+
+
+def _query_origin():
+    """(function, page) that issued the statement being executed."""
+    function = page = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if function is None:
+            module = frame.f_globals.get("__name__", "")
+            if not module.startswith(("pandas", "sqlite3")) and not code.co_qualname.startswith("_Instrumented"):
+                name = code.co_qualname.split(".<locals>")[0]
+                function = name if module == __name__ else f"{module}.{name}"
+        filename = code.co_filename
+        if filename.endswith(".py") and (
+            os.path.basename(filename) == "app.py"
+            or os.path.basename(os.path.dirname(filename)) == "pages"
+        ):
+            page = os.path.basename(filename)[:-3]
+            break
+        frame = frame.f_back
+    return function, page
+
+
+class _InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement's wall time and rows to _query_stats.
+
+    A statement is timed from execute() through its fetches and recorded once
+    it is exhausted, closed, superseded by the next execute() or collected.
+    """
+
+    _pending = None   # [sql, parameters, seconds, rows, (function, page)]
+
+    def _finish(self, rows=None):
+        pending, self._pending = self._pending, None
+        stats = _query_stats
+        if pending is None or stats is None:
+            return
+        sql, parameters, seconds, fetched, (function, page) = pending
+        try:
+            stats.record(self.connection, sql, parameters, seconds * 1000,
+                         fetched if rows is None else rows, function, page)
+        except Exception:
+            pass  # never let instrumentation break a query
+
+    def _run(self, method, sql, parameters, explainable):
+        self._finish()
+        origin = _query_origin()
+        start = time.perf_counter()
+        try:
+            return method(sql, parameters)
+        finally:
+            self._pending = [sql, parameters if explainable else None,
+                             time.perf_counter() - start, 0, origin]
+            if self.description is None:   # no result rows to fetch
+                self._finish(rows=max(self.rowcount, 0))
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters, True)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._run(super().executemany, sql, seq_of_parameters, False)
+
+    def _fetched(self, start, rows, exhausted):
+        pending = self._pending
+        if pending is not None:
+            pending[2] += time.perf_counter() - start
+            pending[3] += rows
+            if exhausted:
+                self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        self._finish()
+
+
+class _InstrumentedConnection(_PooledConnection):
+    """Pooled connection whose cursors (including execute()'s) are instrumented."""
+
+    def cursor(self, factory=_InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _connection_class():
+    return _PooledConnection if _query_stats is None else _InstrumentedConnection
+
+
+def enable_query_stats(slow_ms=None):
+    """Start instrumenting queries (idle pooled connections are reopened)."""
+    global _query_stats
+    if _query_stats is None:
+        _query_stats = QueryStats()
+        close_all()
+    if slow_ms is not None:
+        _query_stats.slow_ms = slow_ms
+
+
+def disable_query_stats():
+    """Stop instrumenting queries and drop the collected statistics."""
+    global _query_stats
+    _query_stats = None
+    close_all()
+
+
+def query_stats_enabled():
+    return _query_stats is not None
+
+
+def get_query_stats():
+    """Per-statement timings (p50/p95/p99), slowest total first; [] when off."""
+    stats = _query_stats
+    return [] if stats is None else stats.summary()
+
+
+def get_slow_queries():
+    """Queries slower than the threshold with their plans, newest first."""
+    stats = _query_stats
+    return [] if stats is None else stats.slow_queries()
+
+
+def get_slow_query_threshold():
+    stats = _query_stats
+    return SLOW_QUERY_MS if stats is None else stats.slow_ms
+
+
+def reset_query_stats():
+    stats = _query_stats
+    if stats is not None:
+        stats.reset()
+
+
 def _ensure_tables_exist():
     """Auto-create tables and seed if DB is empty (handles direct page navigation)."""
     init_db()
@@ -36,126 +857,648 @@ def _ensure_tables_exist():
 
 def init_db():
     """Create all 8 tables if they don't exist."""
-    conn = get_connection()
-    cursor = conn.cursor()
+    with _connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.executescript("""
+            CREATE TABLE IF NOT EXISTS clients (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                short_name TEXT NOT NULL,
+                contact_person TEXT,
+                phone TEXT,
+                email TEXT
+            );
+
+            CREATE TABLE IF NOT EXISTS buildings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                client_id INTEGER NOT NULL,
+                name TEXT NOT NULL,
+                area TEXT,
+                FOREIGN KEY (client_id) REFERENCES clients(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS contracts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                building_id INTEGER NOT NULL,
+                start_date TEXT NOT NULL,
+                end_date TEXT NOT NULL,
+                visits_per_year INTEGER DEFAULT 4,
+                annual_value REAL NOT NULL,
+                payment_terms TEXT DEFAULT 'quarterly',
+                status TEXT DEFAULT 'active',
+                FOREIGN KEY (building_id) REFERENCES buildings(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS equipment (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                building_id INTEGER NOT NULL,
+                type TEXT NOT NULL,
+                status TEXT DEFAULT 'OK',
+                FOREIGN KEY (building_id) REFERENCES buildings(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS inspections (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                building_id INTEGER NOT NULL,
+                inspection_date TEXT NOT NULL,
+                technician TEXT NOT NULL,
+                items_checked INTEGER DEFAULT 0,
+                items_passed INTEGER DEFAULT 0,
+                items_failed INTEGER DEFAULT 0,
+                notes TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (building_id) REFERENCES buildings(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS complaints (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ticket_number TEXT NOT NULL UNIQUE,
+                client_id INTEGER NOT NULL,
+                building_id INTEGER NOT NULL,
+                message TEXT NOT NULL,
+                priority TEXT DEFAULT 'medium',
+                status TEXT DEFAULT 'open',
+                assigned_technician TEXT,
+                inspection_id INTEGER,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (client_id) REFERENCES clients(id),
+                FOREIGN KEY (building_id) REFERENCES buildings(id),
+                FOREIGN KEY (inspection_id) REFERENCES inspections(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS scheduled_inspections (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                building_id INTEGER NOT NULL,
+                scheduled_date TEXT NOT NULL,
+                assigned_technician TEXT NOT NULL,
+                status TEXT DEFAULT 'scheduled',
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (building_id) REFERENCES buildings(id)
+            );
+
+            CREATE TABLE IF NOT EXISTS payments (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                contract_id INTEGER NOT NULL,
+                payment_date TEXT NOT NULL,
+                amount REAL NOT NULL,
+                method TEXT DEFAULT 'bank_transfer',
+                reference_number TEXT,
+                status TEXT DEFAULT 'received',
+                notes TEXT,
+                created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (contract_id) REFERENCES contracts(id)
+            );
+        """)
+
+        conn.commit()
+    migrate()
 
-    cursor.executescript("""
-        CREATE TABLE IF NOT EXISTS clients (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            short_name TEXT NOT NULL,
-            contact_person TEXT,
-            phone TEXT,
-            email TEXT
-        );
-
-        CREATE TABLE IF NOT EXISTS buildings (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            client_id INTEGER NOT NULL,
-            name TEXT NOT NULL,
-            area TEXT,
-            FOREIGN KEY (client_id) REFERENCES clients(id)
-        );
 
-        CREATE TABLE IF NOT EXISTS contracts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            building_id INTEGER NOT NULL,
-            start_date TEXT NOT NULL,
-            end_date TEXT NOT NULL,
-            visits_per_year INTEGER DEFAULT 4,
-            annual_value REAL NOT NULL,
-            payment_terms TEXT DEFAULT 'quarterly',
-            status TEXT DEFAULT 'active',
-            FOREIGN KEY (building_id) REFERENCES buildings(id)
-        );
+# ---------------------------------------------------------------------------
+# SCHEMA MIGRATIONS
+# ---------------------------------------------------------------------------
+# init_db() creates the baseline tables; everything after that is an ordered
+# migration step tracked in PRAGMA user_version. Each step runs in its own
+# transaction and is either a list of SQL statements or a callable taking a
+# cursor. Append new steps — never edit one that has already shipped.
+#
+# Index comments show the EXPLAIN QUERY PLAN line before -> after for the
+# query each index serves.
+
+# building_stats: one row per building, kept current by triggers so reads do
+# not re-aggregate the whole inspection history. _BUILDING_STATS_SELECT
+# computes the row(s) from scratch for the buildings matching {where}; the
+# triggers run it for the single affected building.
+_BUILDING_STATS_COLUMNS = (
+    "building_id", "last_inspection_date", "last_pass_rate", "inspection_count",
+    "equipment_count", "equipment_by_type", "open_complaint_count",
+)
+
+_BUILDING_STATS_SELECT = """
+    SELECT
+        b.id,
+        (SELECT MAX(i.inspection_date) FROM inspections i WHERE i.building_id = b.id),
+        (SELECT CASE WHEN i.items_checked > 0
+                     THEN 100.0 * i.items_passed / i.items_checked END
+         FROM inspections i WHERE i.building_id = b.id
+         ORDER BY i.inspection_date DESC, i.id DESC LIMIT 1),
+        (SELECT COUNT(*) FROM inspections i WHERE i.building_id = b.id),
+        (SELECT COUNT(*) FROM equipment e WHERE e.building_id = b.id),
+        (SELECT COALESCE(json_group_object(type, n), '{{}}') FROM (
+            SELECT e.type, COUNT(*) as n FROM equipment e
+            WHERE e.building_id = b.id GROUP BY e.type ORDER BY e.type
+        )),
+        (SELECT COUNT(*) FROM complaints comp
+         WHERE comp.building_id = b.id AND comp.status NOT IN ('resolved', 'closed'))
+    FROM buildings b
+    WHERE {where}
+"""
 
-        CREATE TABLE IF NOT EXISTS equipment (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            building_id INTEGER NOT NULL,
-            type TEXT NOT NULL,
-            status TEXT DEFAULT 'OK',
-            FOREIGN KEY (building_id) REFERENCES buildings(id)
-        );
+_BUILDING_STATS_REFRESH = (
+    f"INSERT OR REPLACE INTO building_stats ({', '.join(_BUILDING_STATS_COLUMNS)})"
+    + _BUILDING_STATS_SELECT
+)
 
-        CREATE TABLE IF NOT EXISTS inspections (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            building_id INTEGER NOT NULL,
-            inspection_date TEXT NOT NULL,
-            technician TEXT NOT NULL,
-            items_checked INTEGER DEFAULT 0,
-            items_passed INTEGER DEFAULT 0,
-            items_failed INTEGER DEFAULT 0,
-            notes TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (building_id) REFERENCES buildings(id)
-        );
 
-        CREATE TABLE IF NOT EXISTS complaints (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ticket_number TEXT NOT NULL UNIQUE,
-            client_id INTEGER NOT NULL,
-            building_id INTEGER NOT NULL,
-            message TEXT NOT NULL,
-            priority TEXT DEFAULT 'medium',
-            status TEXT DEFAULT 'open',
-            assigned_technician TEXT,
-            inspection_id INTEGER,
+def _building_stats_triggers():
+    """Trigger DDL keeping building_stats in sync with its source tables."""
+    sources = {
+        "inspections": "building_id, inspection_date, items_checked, items_passed",
+        "equipment": "building_id, type",
+        "complaints": "building_id, status",
+    }
+    statements = [
+        "CREATE TRIGGER IF NOT EXISTS trg_buildings_stats_insert "
+        "AFTER INSERT ON buildings BEGIN "
+        + _BUILDING_STATS_REFRESH.format(where="b.id = NEW.id") + "; END",
+    ]
+    for table, columns in sources.items():
+        events = {
+            "insert": ("AFTER INSERT", "b.id = NEW.building_id"),
+            "update": (f"AFTER UPDATE OF {columns}",
+                       "b.id IN (NEW.building_id, OLD.building_id)"),
+            "delete": ("AFTER DELETE", "b.id = OLD.building_id"),
+        }
+        for event, (timing, where) in events.items():
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{table}_stats_{event} "
+                f"{timing} ON {table} BEGIN "
+                + _BUILDING_STATS_REFRESH.format(where=where) + "; END"
+            )
+    return statements
+
+
+# ledger_summary: payment totals per contract, per client and globally
+# (scope 'contract' / 'client' / 'global'), maintained by triggers on payments
+# and contracts. A payment write refreshes its contract row from that
+# contract's payments, then the owning client's row from its active contract
+# rows, then the global row from the client rows — each step an indexed read.
+_LEDGER_COLUMNS = (
+    "scope", "scope_id", "client_id", "active", "contract_value",
+    "collected", "pending", "overdue", "partial",
+    "received_count", "pending_count", "overdue_count", "partial_count",
+)
+
+_LEDGER_INSERT = f"INSERT OR REPLACE INTO ledger_summary ({', '.join(_LEDGER_COLUMNS)})"
+
+_LEDGER_CONTRACT_SELECT = """
+    SELECT
+        'contract', c.id, b.client_id, c.status = 'active', c.annual_value,
+        COALESCE(SUM(CASE WHEN p.status = 'received' THEN p.amount END), 0),
+        COALESCE(SUM(CASE WHEN p.status = 'pending' THEN p.amount END), 0),
+        COALESCE(SUM(CASE WHEN p.status = 'overdue' THEN p.amount END), 0),
+        COALESCE(SUM(CASE WHEN p.status = 'partial' THEN p.amount END), 0),
+        COUNT(CASE WHEN p.status = 'received' THEN 1 END),
+        COUNT(CASE WHEN p.status = 'pending' THEN 1 END),
+        COUNT(CASE WHEN p.status = 'overdue' THEN 1 END),
+        COUNT(CASE WHEN p.status = 'partial' THEN 1 END)
+    FROM contracts c
+    JOIN buildings b ON b.id = c.building_id
+    LEFT JOIN payments p ON p.contract_id = c.id
+    WHERE {where}
+    GROUP BY c.id
+"""
+
+_LEDGER_CLIENT_SELECT = """
+    SELECT
+        'client', cl.id, cl.id, 1,
+        COALESCE(SUM(l.contract_value), 0),
+        COALESCE(SUM(l.collected), 0), COALESCE(SUM(l.pending), 0),
+        COALESCE(SUM(l.overdue), 0), COALESCE(SUM(l.partial), 0),
+        COALESCE(SUM(l.received_count), 0), COALESCE(SUM(l.pending_count), 0),
+        COALESCE(SUM(l.overdue_count), 0), COALESCE(SUM(l.partial_count), 0)
+    FROM clients cl
+    LEFT JOIN ledger_summary l
+        ON l.scope = 'contract' AND l.client_id = cl.id AND l.active = 1
+    WHERE {where}
+    GROUP BY cl.id
+"""
+
+_LEDGER_GLOBAL_SELECT = """
+    SELECT
+        'global', 0, NULL, 1,
+        COALESCE(SUM(contract_value), 0),
+        COALESCE(SUM(collected), 0), COALESCE(SUM(pending), 0),
+        COALESCE(SUM(overdue), 0), COALESCE(SUM(partial), 0),
+        COALESCE(SUM(received_count), 0), COALESCE(SUM(pending_count), 0),
+        COALESCE(SUM(overdue_count), 0), COALESCE(SUM(partial_count), 0)
+    FROM ledger_summary WHERE scope = 'client'
+"""
+
+
+def _ledger_refresh(contract_where=None, client_where=None):
+    """Statements refreshing the matching contract and client rows, then global."""
+    statements = []
+    if contract_where:
+        statements.append(_LEDGER_INSERT + _LEDGER_CONTRACT_SELECT.format(where=contract_where))
+    if client_where:
+        statements.append(_LEDGER_INSERT + _LEDGER_CLIENT_SELECT.format(where=client_where))
+    statements.append(_LEDGER_INSERT + _LEDGER_GLOBAL_SELECT)
+    return statements
+
+
+def _ledger_triggers():
+    """Trigger DDL keeping ledger_summary in sync with payments and contracts."""
+    contract_client = "(SELECT b.client_id FROM buildings b JOIN contracts c " \
+                      "ON c.building_id = b.id WHERE c.id = {ref}.{col})"
+    specs = {
+        # payments: refresh the contract(s) the payment belongs to
+        "payments": {
+            "insert": ("AFTER INSERT", ["NEW"], "contract_id"),
+            "update": ("AFTER UPDATE OF contract_id, status, amount", ["NEW", "OLD"], "contract_id"),
+            "delete": ("AFTER DELETE", ["OLD"], "contract_id"),
+        },
+        "contracts": {
+            "insert": ("AFTER INSERT", ["NEW"], "id"),
+            "update": ("AFTER UPDATE OF building_id, status, annual_value", ["NEW", "OLD"], "id"),
+            "delete": ("AFTER DELETE", ["OLD"], "id"),
+        },
+    }
+    statements = []
+    for table, events in specs.items():
+        for event, (timing, refs, col) in events.items():
+            body = []
+            if event == "delete" and table == "contracts":
+                body.append("DELETE FROM ledger_summary "
+                            "WHERE scope = 'contract' AND scope_id = OLD.id")
+            else:
+                ids = ", ".join(f"{ref}.{col}" for ref in refs)
+                body.append(_LEDGER_INSERT + _LEDGER_CONTRACT_SELECT.format(
+                    where=f"c.id IN ({ids})"))
+            if table == "contracts":
+                clients = ", ".join(
+                    f"(SELECT client_id FROM buildings WHERE id = {ref}.building_id)"
+                    for ref in refs
+                )
+            else:
+                clients = ", ".join(
+                    contract_client.format(ref=ref, col=col) for ref in refs
+                )
+            body += _ledger_refresh(client_where=f"cl.id IN ({clients})")
+            statements.append(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{table}_ledger_{event} "
+                f"{timing} ON {table} BEGIN " + "; ".join(body) + "; END"
+            )
+    statements.append(
+        "CREATE TRIGGER IF NOT EXISTS trg_buildings_ledger_update "
+        "AFTER UPDATE OF client_id ON buildings BEGIN "
+        + "; ".join(_ledger_refresh(
+            contract_where="c.building_id = NEW.id",
+            client_where="cl.id IN (NEW.client_id, OLD.client_id)",
+        )) + "; END"
+    )
+    statements.append(
+        "CREATE TRIGGER IF NOT EXISTS trg_clients_ledger_insert "
+        "AFTER INSERT ON clients BEGIN "
+        + "; ".join(_ledger_refresh(client_where="cl.id = NEW.id")) + "; END"
+    )
+    return statements
+
+
+# ticket_sequences from the complaints table: each year's highest ticket.
+_TICKET_SEQUENCES_REFRESH = """
+    INSERT OR REPLACE INTO ticket_sequences (year, last_value)
+    SELECT CAST(substr(ticket_number, 5, 4) AS INTEGER),
+           MAX(CAST(substr(ticket_number, 10) AS INTEGER))
+    FROM complaints
+    WHERE ticket_number GLOB 'TTS-[0-9][0-9][0-9][0-9]-[0-9]*'
+    GROUP BY 1
+"""
+
+
+MIGRATIONS = [
+    (1, "Secondary indexes for hot filters and joins", [
+        # status query, get_buildings_by_client: MAX(inspection_date) per building
+        #   SCAN inspections + TEMP B-TREE FOR GROUP BY
+        #   -> SCAN inspections USING COVERING INDEX idx_inspections_building_date
+        "CREATE INDEX IF NOT EXISTS idx_inspections_building_date "
+        "ON inspections(building_id, inspection_date)",
+        # get_inspections_by_month, get_recent_inspections, get_completed_this_month
+        #   SCAN i + TEMP B-TREE FOR ORDER BY
+        #   -> SEARCH i USING INDEX idx_inspections_date (inspection_date>? AND inspection_date<?)
+        "CREATE INDEX IF NOT EXISTS idx_inspections_date "
+        "ON inspections(inspection_date)",
+        # get_buildings_by_client
+        #   SCAN b + TEMP B-TREE FOR ORDER BY
+        #   -> SEARCH b USING INDEX idx_buildings_client (client_id=?)
+        "CREATE INDEX IF NOT EXISTS idx_buildings_client "
+        "ON buildings(client_id, name)",
+        # get_contract_by_building, active-contract LEFT JOINs
+        #   SCAN contracts / AUTOMATIC PARTIAL COVERING INDEX
+        #   -> SEARCH contracts USING INDEX idx_contracts_building_status (building_id=? AND status=?)
+        "CREATE INDEX IF NOT EXISTS idx_contracts_building_status "
+        "ON contracts(building_id, status)",
+        # status query, get_active_contracts_count, contract value totals
+        #   SCAN c -> SEARCH c USING INDEX idx_contracts_status (status=?)
+        "CREATE INDEX IF NOT EXISTS idx_contracts_status "
+        "ON contracts(status, annual_value)",
+        # equipment counts, get_equipment_by_building, get_equipment_grouped_by_type
+        #   SCAN equipment + TEMP B-TREE FOR GROUP BY
+        #   -> SEARCH equipment USING COVERING INDEX idx_equipment_building_type (building_id=?)
+        "CREATE INDEX IF NOT EXISTS idx_equipment_building_type "
+        "ON equipment(building_id, type)",
+        # per-contract payment sums (contract_id=? AND status=?), FK lookups
+        #   SCAN payments -> SEARCH payments USING COVERING INDEX idx_payments_contract_status
+        "CREATE INDEX IF NOT EXISTS idx_payments_contract_status "
+        "ON payments(contract_id, status, amount)",
+        # get_financial_summary, get_outstanding_invoices, get_monthly_revenue
+        #   SCAN p -> SEARCH p USING COVERING INDEX idx_payments_status_date
+        #   (status=? AND payment_date>?)
+        "CREATE INDEX IF NOT EXISTS idx_payments_status_date "
+        "ON payments(status, payment_date, amount)",
+        # get_payment_history (ORDER BY payment_date DESC LIMIT n)
+        #   SCAN p + TEMP B-TREE FOR ORDER BY -> SCAN p USING INDEX idx_payments_date
+        "CREATE INDEX IF NOT EXISTS idx_payments_date "
+        "ON payments(payment_date)",
+        # is_building_scheduled, scheduled LEFT JOINs in status queries
+        #   AUTOMATIC PARTIAL COVERING INDEX per query
+        #   -> SEARCH si USING COVERING INDEX idx_scheduled_building_status
+        "CREATE INDEX IF NOT EXISTS idx_scheduled_building_status "
+        "ON scheduled_inspections(building_id, status)",
+        # get_scheduled_inspections
+        #   SCAN si + TEMP B-TREE FOR ORDER BY
+        #   -> SEARCH si USING INDEX idx_scheduled_status_date (status=?)
+        "CREATE INDEX IF NOT EXISTS idx_scheduled_status_date "
+        "ON scheduled_inspections(status, scheduled_date)",
+        # get_recent_complaints, get_complaints_by_month
+        #   SCAN comp + TEMP B-TREE FOR ORDER BY
+        #   -> SCAN comp USING INDEX idx_complaints_created
+        "CREATE INDEX IF NOT EXISTS idx_complaints_created "
+        "ON complaints(created_at)",
+    ]),
+    (2, "building_stats summary table maintained by triggers", [
+        """
+        CREATE TABLE IF NOT EXISTS building_stats (
+            building_id INTEGER PRIMARY KEY,
+            last_inspection_date TEXT,
+            last_pass_rate REAL,
+            inspection_count INTEGER NOT NULL DEFAULT 0,
+            equipment_count INTEGER NOT NULL DEFAULT 0,
+            equipment_by_type TEXT NOT NULL DEFAULT '{}',
+            open_complaint_count INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (building_id) REFERENCES buildings(id)
+        )
+        """,
+        # open complaint counts per building (trigger refresh)
+        "CREATE INDEX IF NOT EXISTS idx_complaints_building_status "
+        "ON complaints(building_id, status)",
+        *_building_stats_triggers(),
+        _BUILDING_STATS_REFRESH.format(where="1"),
+    ]),
+    (3, "ledger_summary financial totals maintained by triggers", [
+        """
+        CREATE TABLE IF NOT EXISTS ledger_summary (
+            scope TEXT NOT NULL,
+            scope_id INTEGER NOT NULL,
+            client_id INTEGER,
+            active INTEGER NOT NULL DEFAULT 1,
+            contract_value REAL NOT NULL DEFAULT 0,
+            collected REAL NOT NULL DEFAULT 0,
+            pending REAL NOT NULL DEFAULT 0,
+            overdue REAL NOT NULL DEFAULT 0,
+            partial REAL NOT NULL DEFAULT 0,
+            received_count INTEGER NOT NULL DEFAULT 0,
+            pending_count INTEGER NOT NULL DEFAULT 0,
+            overdue_count INTEGER NOT NULL DEFAULT 0,
+            partial_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, scope_id)
+        )
+        """,
+        # client refresh: active contract rows of one client
+        "CREATE INDEX IF NOT EXISTS idx_ledger_scope_client "
+        "ON ledger_summary(scope, client_id, active)",
+        *_ledger_triggers(),
+        *_ledger_refresh(contract_where="1", client_where="1"),
+    ]),
+    (4, "report_artifacts store for rendered inspection PDFs", [
+        """
+        CREATE TABLE IF NOT EXISTS report_artifacts (
+            content_hash TEXT PRIMARY KEY,
+            inspection_id INTEGER NOT NULL,
+            filename TEXT NOT NULL,
+            pdf BLOB NOT NULL,
+            size_bytes INTEGER NOT NULL,
             created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (client_id) REFERENCES clients(id),
-            FOREIGN KEY (building_id) REFERENCES buildings(id),
+            last_accessed TEXT DEFAULT CURRENT_TIMESTAMP,
+            download_count INTEGER DEFAULT 0,
             FOREIGN KEY (inspection_id) REFERENCES inspections(id)
-        );
-
-        CREATE TABLE IF NOT EXISTS scheduled_inspections (
+        )
+        """,
+        # replace/invalidate: WHERE inspection_id = ?
+        "CREATE INDEX IF NOT EXISTS idx_report_artifacts_inspection "
+        "ON report_artifacts(inspection_id)",
+        # eviction: ORDER BY last_accessed
+        "CREATE INDEX IF NOT EXISTS idx_report_artifacts_accessed "
+        "ON report_artifacts(last_accessed)",
+        # A stored PDF is stale once its inspection is edited or removed.
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_report_artifacts_inspection_update
+        AFTER UPDATE ON inspections BEGIN
+            DELETE FROM report_artifacts WHERE inspection_id = OLD.id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_report_artifacts_inspection_delete
+        AFTER DELETE ON inspections BEGIN
+            DELETE FROM report_artifacts WHERE inspection_id = OLD.id;
+        END
+        """,
+    ]),
+    (5, "inspection_items per-equipment inspection results", [
+        """
+        CREATE TABLE IF NOT EXISTS inspection_items (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            building_id INTEGER NOT NULL,
-            scheduled_date TEXT NOT NULL,
-            assigned_technician TEXT NOT NULL,
-            status TEXT DEFAULT 'scheduled',
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (building_id) REFERENCES buildings(id)
-        );
+            inspection_id INTEGER NOT NULL,
+            equipment_id INTEGER NOT NULL,
+            result TEXT NOT NULL,
+            UNIQUE (inspection_id, equipment_id),
+            FOREIGN KEY (inspection_id) REFERENCES inspections(id),
+            FOREIGN KEY (equipment_id) REFERENCES equipment(id)
+        )
+        """,
+        # equipment history: WHERE equipment_id = ? ORDER BY inspection_id
+        "CREATE INDEX IF NOT EXISTS idx_inspection_items_equipment "
+        "ON inspection_items(equipment_id, inspection_id)",
+    ]),
+    (6, "scheduled_inspections lifecycle: completion, state machine, partial indexes", [
+        "ALTER TABLE scheduled_inspections ADD COLUMN inspection_id INTEGER "
+        "REFERENCES inspections(id)",
+        "ALTER TABLE scheduled_inspections ADD COLUMN closed_at TEXT",
+        # Close schedules already fulfilled by an inspection on/after the day
+        # they were booked; they previously stayed 'scheduled' forever.
+        """
+        UPDATE scheduled_inspections
+        SET status = 'completed',
+            inspection_id = (
+                SELECT i.id FROM inspections i
+                WHERE i.building_id = scheduled_inspections.building_id
+                  AND i.inspection_date >= date(scheduled_inspections.created_at)
+                ORDER BY i.inspection_date, i.id LIMIT 1
+            ),
+            closed_at = CURRENT_TIMESTAMP
+        WHERE status = 'scheduled' AND EXISTS (
+            SELECT 1 FROM inspections i
+            WHERE i.building_id = scheduled_inspections.building_id
+              AND i.inspection_date >= date(scheduled_inspections.created_at)
+        )
+        """,
+        # At most one pending schedule per building: keep the latest booking
+        """
+        UPDATE scheduled_inspections
+        SET status = 'cancelled', closed_at = CURRENT_TIMESTAMP
+        WHERE status = 'scheduled' AND id NOT IN (
+            SELECT MAX(id) FROM scheduled_inspections
+            WHERE status = 'scheduled' GROUP BY building_id
+        )
+        """,
+        # Only pending rows are ever looked up by status; history rows stay
+        # out of these indexes however much of it accumulates.
+        "DROP INDEX IF EXISTS idx_scheduled_building_status",
+        "DROP INDEX IF EXISTS idx_scheduled_status_date",
+        # status query EXISTS, is_building_scheduled, completion trigger
+        #   SEARCH si USING COVERING INDEX idx_scheduled_building_status (building_id=? AND status=?)
+        #   -> SEARCH si USING INDEX idx_scheduled_pending_building (building_id=?)
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_scheduled_pending_building "
+        "ON scheduled_inspections(building_id) WHERE status = 'scheduled'",
+        # get_scheduled_inspections, get_past_due_schedules
+        #   SEARCH si USING INDEX idx_scheduled_status_date (status=?)
+        #   -> SCAN si USING INDEX idx_scheduled_pending_date
+        #      / SEARCH si USING INDEX idx_scheduled_pending_date (scheduled_date<?)
+        "CREATE INDEX IF NOT EXISTS idx_scheduled_pending_date "
+        "ON scheduled_inspections(scheduled_date) WHERE status = 'scheduled'",
+        # Lifecycle: scheduled -> completed | cancelled; both are final.
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_scheduled_status_insert
+        BEFORE INSERT ON scheduled_inspections
+        WHEN NEW.status IS NOT 'scheduled' BEGIN
+            SELECT RAISE(ABORT, 'scheduled inspections must start as scheduled');
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_scheduled_status_transition
+        BEFORE UPDATE OF status ON scheduled_inspections
+        WHEN NEW.status IS NOT OLD.status AND NOT (
+            OLD.status = 'scheduled' AND NEW.status IN ('completed', 'cancelled')
+        ) BEGIN
+            SELECT RAISE(ABORT, 'invalid scheduled inspection status transition');
+        END
+        """,
+        # Submitting an inspection completes the building's pending schedule
+        # in the same transaction (back-dated entries leave it open).
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_scheduled_complete_on_inspection
+        AFTER INSERT ON inspections BEGIN
+            UPDATE scheduled_inspections
+            SET status = 'completed', inspection_id = NEW.id,
+                closed_at = CURRENT_TIMESTAMP
+            WHERE building_id = NEW.building_id AND status = 'scheduled'
+              AND NEW.inspection_date >= date(created_at);
+        END
+        """,
+    ]),
+    (7, "ticket_sequences per-year complaint ticket counters", [
+        """
+        CREATE TABLE IF NOT EXISTS ticket_sequences (
+            year INTEGER PRIMARY KEY,
+            last_value INTEGER NOT NULL
+        )
+        """,
+        # Start each year after its highest existing ticket (not its count,
+        # which collides once a ticket has been deleted).
+        _TICKET_SEQUENCES_REFRESH,
+        # Tickets inserted with an explicit number (seed data, imports that
+        # bypass reserve_ticket_numbers) push the sequence past them.
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_ticket_sequences_complaint_insert
+        AFTER INSERT ON complaints
+        WHEN NEW.ticket_number GLOB 'TTS-[0-9][0-9][0-9][0-9]-[0-9]*' BEGIN
+            INSERT INTO ticket_sequences (year, last_value)
+            VALUES (CAST(substr(NEW.ticket_number, 5, 4) AS INTEGER),
+                    CAST(substr(NEW.ticket_number, 10) AS INTEGER))
+            ON CONFLICT(year) DO UPDATE
+            SET last_value = MAX(last_value, excluded.last_value);
+        END
+        """,
+    ]),
+    (8, "snapshots table for precomputed page aggregates (see precompute.py)", [
+        """
+        CREATE TABLE IF NOT EXISTS snapshots (
+            name TEXT PRIMARY KEY,
+            as_of TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            computed_at TEXT NOT NULL,
+            elapsed_ms REAL NOT NULL
+        )
+        """,
+    ]),
+    (9, "snapshots.started_at: when a snapshot's reads began, to detect later writes", [
+        "ALTER TABLE snapshots ADD COLUMN started_at REAL NOT NULL DEFAULT 0",
+    ]),
+]
 
-        CREATE TABLE IF NOT EXISTS payments (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            contract_id INTEGER NOT NULL,
-            payment_date TEXT NOT NULL,
-            amount REAL NOT NULL,
-            method TEXT DEFAULT 'bank_transfer',
-            reference_number TEXT,
-            status TEXT DEFAULT 'received',
-            notes TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (contract_id) REFERENCES contracts(id)
-        );
-    """)
 
-    conn.commit()
-    conn.close()
+def get_schema_version():
+    """Return the applied migration version (PRAGMA user_version)."""
+    with _connection() as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    return version
+
+
+def migrate():
+    """Apply pending migration steps in order. Returns the resulting version."""
+    latest = MIGRATIONS[-1][0]
+    if get_schema_version() >= latest:
+        return latest
+    with _write_lock:
+        with _connection() as conn:
+            for version, description, step in MIGRATIONS:
+                conn.execute("BEGIN IMMEDIATE")
+                current = conn.execute("PRAGMA user_version").fetchone()[0]
+                if version <= current:
+                    conn.rollback()
+                    continue
+                cursor = conn.cursor()
+                if callable(step):
+                    step(cursor)
+                else:
+                    for statement in step:
+                        cursor.execute(statement)
+                cursor.execute(f"PRAGMA user_version = {int(version)}")
+                conn.commit()
+                invalidate_cache()
+            return conn.execute("PRAGMA user_version").fetchone()[0]
 
 
 def reset_db():
     """Drop all tables and re-create."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    tables = [
-        "payments", "scheduled_inspections", "complaints",
-        "inspections", "equipment", "contracts", "buildings", "clients"
-    ]
-    for table in tables:
-        cursor.execute(f"DROP TABLE IF EXISTS {table}")
-    conn.commit()
-    conn.close()
+    with _connection() as conn:
+        cursor = conn.cursor()
+        tables = [
+            row[0] for row in cursor.execute(
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            )
+        ]
+        # Tables created by migrations reference the baseline ones, so drop
+        # without enforcing foreign keys rather than tracking a drop order.
+        conn.execute("PRAGMA foreign_keys = OFF")
+        for table in tables:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        cursor.execute("PRAGMA user_version = 0")
+        conn.commit()
+        conn.execute("PRAGMA foreign_keys = ON")
+    invalidate_cache()
     init_db()
 
 
+@_cached("clients")
 def has_data():
     """Check if the database has seed data."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM clients")
-    count = cursor.fetchone()[0]
-    conn.close()
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM clients")
+        count = cursor.fetchone()[0]
     return count > 0
 
 
@@ -175,64 +1518,60 @@ TECHNICIANS = [
 # CLIENT QUERIES
 # ---------------------------------------------------------------------------
 
+@_cached("clients")
 def get_all_clients():
     """Return all clients as a DataFrame."""
-    conn = get_connection()
-    df = pd.read_sql_query("SELECT * FROM clients ORDER BY name", conn)
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("SELECT * FROM clients ORDER BY name", conn)
     return df
 
 
+@_cached("clients")
 def get_client_by_id(client_id):
     """Return a single client as a dict."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM clients WHERE id = ?", (client_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM clients WHERE id = ?", (client_id,))
+        row = cursor.fetchone()
     return dict(row) if row else None
 
 
-def get_client_summary():
+@_cached("clients", "buildings", "building_stats", "contracts", "scheduled_inspections")
+def get_client_summary(status_df=None):
     """
     Return client summary: name, building count, equipment count,
     total annual value, overdue count.
+
+    overdue_count comes from compute_building_status(); pass its result as
+    status_df to reuse it.
     """
-    today = date.today().isoformat()
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT
-            cl.id as client_id,
-            cl.name as "Client",
-            cl.short_name,
-            COUNT(DISTINCT b.id) as "Buildings",
-            COUNT(DISTINCT e.id) as "Equipment",
-            COALESCE(SUM(DISTINCT c.annual_value), 0) as "Annual Value (AED)",
-            (
-                SELECT COUNT(DISTINCT b2.id)
+    if status_df is None:
+        status_df = compute_building_status()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT
+                cl.id as client_id,
+                cl.name as "Client",
+                cl.short_name,
+                COUNT(DISTINCT b.id) as "Buildings",
+                COALESCE(MAX(eq.equipment), 0) as "Equipment",
+                COALESCE(SUM(DISTINCT c.annual_value), 0) as "Annual Value (AED)"
+            FROM clients cl
+            LEFT JOIN buildings b ON b.client_id = cl.id
+            LEFT JOIN contracts c ON c.building_id = b.id AND c.status = 'active'
+            -- Summed per client before the join: a building with several
+            -- active contracts appears once per contract above.
+            LEFT JOIN (
+                SELECT b2.client_id, SUM(bs.equipment_count) as equipment
                 FROM buildings b2
-                JOIN contracts c2 ON c2.building_id = b2.id AND c2.status = 'active'
-                LEFT JOIN (
-                    SELECT building_id, MAX(inspection_date) as last_date
-                    FROM inspections GROUP BY building_id
-                ) li ON li.building_id = b2.id
-                LEFT JOIN scheduled_inspections si
-                    ON si.building_id = b2.id AND si.status = 'scheduled'
-                WHERE b2.client_id = cl.id
-                AND si.id IS NULL
-                AND (
-                    li.last_date IS NULL
-                    OR julianday(?) - julianday(li.last_date) > 365.0 / c2.visits_per_year
-                )
-            ) as overdue_count
-        FROM clients cl
-        LEFT JOIN buildings b ON b.client_id = cl.id
-        LEFT JOIN contracts c ON c.building_id = b.id AND c.status = 'active'
-        LEFT JOIN equipment e ON e.building_id = b.id
-        GROUP BY cl.id
-        ORDER BY "Annual Value (AED)" DESC
-    """, conn, params=[today])
-    conn.close()
+                JOIN building_stats bs ON bs.building_id = b2.id
+                GROUP BY b2.client_id
+            ) eq ON eq.client_id = cl.id
+            GROUP BY cl.id
+            ORDER BY "Annual Value (AED)" DESC
+        """, conn)
+    overdue = status_df[status_df["status"] == "overdue"].groupby("client_id").size()
+    df["overdue_count"] = df["client_id"].map(overdue).fillna(0).astype(int)
     return df
 
 
@@ -240,65 +1579,147 @@ def get_client_summary():
 # BUILDING QUERIES
 # ---------------------------------------------------------------------------
 
+@_cached("buildings", "clients")
 def get_all_buildings():
     """Return all buildings with client info."""
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT b.*, cl.name as client_name, cl.short_name
-        FROM buildings b
-        JOIN clients cl ON cl.id = b.client_id
-        ORDER BY cl.name, b.name
-    """, conn)
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT b.*, cl.name as client_name, cl.short_name
+            FROM buildings b
+            JOIN clients cl ON cl.id = b.client_id
+            ORDER BY cl.name, b.name
+        """, conn)
     return df
 
 
+@_cached("buildings", "building_stats", "contracts")
 def get_buildings_by_client(client_id):
     """Return buildings for a specific client."""
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT b.*,
-            (SELECT COUNT(*) FROM equipment e WHERE e.building_id = b.id) as equipment_count,
-            (SELECT MAX(i.inspection_date) FROM inspections i WHERE i.building_id = b.id) as last_inspection,
-            c.annual_value,
-            c.visits_per_year,
-            c.payment_terms
-        FROM buildings b
-        LEFT JOIN contracts c ON c.building_id = b.id AND c.status = 'active'
-        WHERE b.client_id = ?
-        ORDER BY b.name
-    """, conn, params=[client_id])
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT b.*,
+                COALESCE(bs.equipment_count, 0) as equipment_count,
+                bs.last_inspection_date as last_inspection,
+                c.annual_value,
+                c.visits_per_year,
+                c.payment_terms
+            FROM buildings b
+            LEFT JOIN building_stats bs ON bs.building_id = b.id
+            LEFT JOIN contracts c ON c.building_id = b.id AND c.status = 'active'
+            WHERE b.client_id = ?
+            ORDER BY b.name
+        """, conn, params=[client_id])
     return df
 
 
+@_cached("buildings", "clients", "building_stats", "contracts")
 def get_building_details(building_id):
     """Return full details for a building."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT b.*, cl.name as client_name, cl.short_name,
-            cl.contact_person, cl.phone, cl.email,
-            c.annual_value, c.visits_per_year, c.start_date, c.end_date,
-            c.id as contract_id, c.payment_terms,
-            (SELECT COUNT(*) FROM equipment e WHERE e.building_id = b.id) as equipment_count
-        FROM buildings b
-        JOIN clients cl ON cl.id = b.client_id
-        LEFT JOIN contracts c ON c.building_id = b.id AND c.status = 'active'
-        WHERE b.id = ?
-    """, (building_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT b.*, cl.name as client_name, cl.short_name,
+                cl.contact_person, cl.phone, cl.email,
+                c.annual_value, c.visits_per_year, c.start_date, c.end_date,
+                c.id as contract_id, c.payment_terms,
+                COALESCE(bs.equipment_count, 0) as equipment_count
+            FROM buildings b
+            JOIN clients cl ON cl.id = b.client_id
+            LEFT JOIN building_stats bs ON bs.building_id = b.id
+            LEFT JOIN contracts c ON c.building_id = b.id AND c.status = 'active'
+            WHERE b.id = ?
+        """, (building_id,))
+        row = cursor.fetchone()
     return dict(row) if row else None
 
 
+# ---------------------------------------------------------------------------
+# BUILDING STATS (denormalized, trigger-maintained)
+# ---------------------------------------------------------------------------
+
+@_cached("building_stats")
+def get_building_stats():
+    """Return the building_stats table as a DataFrame."""
+    with _connection() as conn:
+        df = pd.read_sql_query(
+            "SELECT * FROM building_stats ORDER BY building_id", conn
+        )
+    return df
+
+
+def rebuild_building_stats():
+    """Recompute building_stats for every building. Returns the row count."""
+    def work(cursor):
+        cursor.execute("DELETE FROM building_stats")
+        cursor.execute(_BUILDING_STATS_REFRESH.format(where="1"))
+        return cursor.rowcount
+
+    return _execute_write(work, tables=["building_stats"])
+
+
+def check_building_stats():
+    """
+    Compare building_stats against a from-scratch aggregation.
+
+    Returns a DataFrame of mismatches (building_id, column, stored, expected);
+    empty when the summary table is consistent.
+    """
+    with _connection() as conn:
+        expected = pd.read_sql_query(
+            _BUILDING_STATS_SELECT.format(where="1"), conn
+        )
+        stored = pd.read_sql_query(
+            f"SELECT {', '.join(_BUILDING_STATS_COLUMNS)} FROM building_stats", conn
+        )
+    expected.columns = list(_BUILDING_STATS_COLUMNS)
+    for df in (expected, stored):
+        # JSON key order is not significant
+        df["equipment_by_type"] = df["equipment_by_type"].apply(
+            lambda v: json.loads(v) if isinstance(v, str) else v
+        )
+    merged = expected.merge(
+        stored, on="building_id", how="outer",
+        suffixes=("_expected", "_stored"), indicator=True,
+    )
+    mismatches = []
+    for _, row in merged.iterrows():
+        for col in _BUILDING_STATS_COLUMNS[1:]:
+            exp, got = row[f"{col}_expected"], row[f"{col}_stored"]
+            if row["_merge"] != "both" or not _stats_equal(exp, got):
+                mismatches.append({
+                    "building_id": row["building_id"], "column": col,
+                    "stored": got, "expected": exp,
+                })
+    return pd.DataFrame(mismatches, columns=["building_id", "column", "stored", "expected"])
+
+
+def _stats_equal(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        if pd.isna(a) and pd.isna(b):
+            return True
+        try:
+            # Relative: large money totals differ in the last bits when
+            # summed in a different order.
+            a, b = float(a), float(b)
+            return abs(a - b) <= 1e-9 * max(1.0, abs(a), abs(b))
+        except (TypeError, ValueError):
+            return False
+    if a is None or b is None:
+        return a is None and b is None
+    return a == b
+
+
 # ---------------------------------------------------------------------------
 # INSPECTION QUERIES
 # ---------------------------------------------------------------------------
 
-def _get_inspection_status_query():
-    """Return the base query for computing building inspection status."""
-    return """
+BUILDING_STATUSES = ("overdue", "due_soon", "on_track", "scheduled")
+
+
+# One row per building with an active contract, classified as of :as_of.
+# Shared by compute_building_status() and the paged overdue query.
+_BUILDING_STATUS_SELECT = """
+    WITH base AS (
         SELECT
             b.id as building_id,
             b.name as building_name,
@@ -309,97 +1730,232 @@ def _get_inspection_status_query():
             c.annual_value,
             c.visits_per_year,
             c.id as contract_id,
-            (SELECT COUNT(*) FROM equipment e WHERE e.building_id = b.id) as equipment_count,
-            li.last_date as last_inspection_date,
-            CASE
-                WHEN li.last_date IS NULL THEN 999
-                ELSE CAST(julianday(?) - julianday(li.last_date) AS INTEGER)
-            END as days_since_last,
-            CASE
-                WHEN li.last_date IS NULL THEN -999
-                ELSE CAST(
-                    (365.0 / c.visits_per_year) - (julianday(?) - julianday(li.last_date))
-                    AS INTEGER
-                )
-            END as days_until_next
+            COALESCE(bs.equipment_count, 0) as equipment_count,
+            bs.last_inspection_date,
+            julianday(:as_of) - julianday(bs.last_inspection_date) as elapsed,
+            365.0 / c.visits_per_year as interval_days,
+            EXISTS (
+                SELECT 1 FROM scheduled_inspections si
+                WHERE si.building_id = b.id AND si.status = 'scheduled'
+            ) as is_scheduled
         FROM buildings b
         JOIN clients cl ON cl.id = b.client_id
         JOIN contracts c ON c.building_id = b.id AND c.status = 'active'
-        LEFT JOIN (
-            SELECT building_id, MAX(inspection_date) as last_date
-            FROM inspections GROUP BY building_id
-        ) li ON li.building_id = b.id
-        LEFT JOIN scheduled_inspections si
-            ON si.building_id = b.id AND si.status = 'scheduled'
+        LEFT JOIN building_stats bs ON bs.building_id = b.id
+    )
+    SELECT
+        building_id, building_name, area, client_id, client_name, short_name,
+        annual_value, visits_per_year, contract_id, equipment_count,
+        last_inspection_date,
+        CASE
+            WHEN last_inspection_date IS NULL THEN 999
+            ELSE CAST(elapsed AS INTEGER)
+        END as days_since_last,
+        CASE
+            WHEN last_inspection_date IS NULL THEN -999
+            ELSE CAST(interval_days - elapsed AS INTEGER)
+        END as days_until_next,
+        CASE
+            WHEN is_scheduled THEN 'scheduled'
+            WHEN last_inspection_date IS NULL OR elapsed > interval_days THEN 'overdue'
+            WHEN interval_days - elapsed <= :due_within THEN 'due_soon'
+            ELSE 'on_track'
+        END as status
+    FROM base
+"""
+
+
+@_cached("buildings", "clients", "contracts", "building_stats", "scheduled_inspections")
+def compute_building_status(as_of=None, due_within=14):
     """
+    Classify every building with an active contract in a single query.
 
+    Returns one row per building with contract/client info, equipment_count,
+    last_inspection_date, days_since_last, days_until_next and status:
+    'scheduled' (pending scheduled inspection), 'overdue' (never inspected or
+    past its visit interval), 'due_soon' (due within `due_within` days) or
+    'on_track'.
+    """
+    as_of = as_of or date.today()
+    if not isinstance(as_of, str):
+        as_of = as_of.isoformat()
+    with _connection() as conn:
+        df = pd.read_sql_query(
+            _BUILDING_STATUS_SELECT + " ORDER BY building_id",
+            conn, params={"as_of": as_of, "due_within": due_within},
+        )
+    return df
 
-def get_overdue_inspections():
-    """Return buildings where next inspection is overdue (not scheduled)."""
-    today = date.today().isoformat()
-    conn = get_connection()
-    query = _get_inspection_status_query() + """
-        WHERE si.id IS NULL
-        AND (
-            li.last_date IS NULL
-            OR julianday(?) - julianday(li.last_date) > 365.0 / c.visits_per_year
+
+def get_overdue_inspections(status_df=None):
+    """Return buildings where next inspection is overdue (not scheduled).
+
+    Pass a compute_building_status() result to reuse it instead of re-querying.
+    """
+    if status_df is None:
+        status_df = compute_building_status()
+    df = status_df[status_df["status"] == "overdue"]
+    return df.sort_values("days_since_last", ascending=False).reset_index(drop=True)
+
+
+def get_upcoming_inspections(days=14, status_df=None):
+    """Return buildings due within N days but not yet overdue.
+
+    A reused status_df must have been computed with due_within=days.
+    """
+    if status_df is None:
+        status_df = compute_building_status(due_within=days)
+    df = status_df[status_df["status"] == "due_soon"]
+    return df.sort_values("days_until_next").reset_index(drop=True)
+
+
+# Overdue severity bands by days past the visit interval: name -> (from, to).
+OVERDUE_SEVERITIES = {
+    "critical": (30, None),
+    "high": (15, 30),
+    "moderate": (0, 15),
+}
+
+OVERDUE_SORTS = {
+    "most_overdue": "days_overdue DESC, building_name",
+    "least_overdue": "days_overdue, building_name",
+    "annual_value": "annual_value DESC, days_overdue DESC",
+    "equipment": "equipment_count DESC, days_overdue DESC",
+    "building": "building_name",
+}
+
+_OVERDUE_SELECT = f"""
+    WITH status AS ({_BUILDING_STATUS_SELECT}),
+    overdue AS (
+        SELECT *,
+            MAX(days_since_last - visit_interval_days, 0) as days_overdue
+        FROM (
+            SELECT *, CAST(365 / visits_per_year AS INTEGER) as visit_interval_days
+            FROM status WHERE status = 'overdue'
         )
-        ORDER BY days_since_last DESC
+    ),
+    graded AS (
+        SELECT *,
+            CASE
+                {" ".join(
+                    f"WHEN days_overdue >= {lo}" + (f" AND days_overdue < {hi}" if hi else "")
+                    + f" THEN '{name}'"
+                    for name, (lo, hi) in OVERDUE_SEVERITIES.items()
+                )}
+            END as severity
+        FROM overdue
+    )
+"""
+
+
+@_cached("buildings", "clients", "contracts", "building_stats", "scheduled_inspections")
+def get_overdue_page(client_id=None, area=None, severity=None, sort="most_overdue",
+                     page=1, page_size=20, as_of=None):
     """
-    df = pd.read_sql_query(query, conn, params=[today, today, today])
-    conn.close()
-    return df
+    Return one page of overdue buildings, filtered and sorted in SQL.
 
+    Args:
+        client_id / area / severity: Optional filters (see OVERDUE_SEVERITIES)
+        sort: Key of OVERDUE_SORTS
+        page: 1-based page number; page_size: rows per page
 
-def get_upcoming_inspections(days=14):
-    """Return buildings due within N days but not yet overdue."""
-    today = date.today().isoformat()
-    conn = get_connection()
-    query = _get_inspection_status_query() + """
-        WHERE si.id IS NULL
-        AND li.last_date IS NOT NULL
-        AND julianday(?) - julianday(li.last_date) <= 365.0 / c.visits_per_year
-        AND (365.0 / c.visits_per_year) - (julianday(?) - julianday(li.last_date)) <= ?
-        ORDER BY days_until_next ASC
-    """
-    df = pd.read_sql_query(query, conn, params=[today, today, today, today, days])
-    conn.close()
+    Returns:
+        dict with rows (DataFrame: compute_building_status() columns plus
+        days_overdue and severity), total (matching buildings), page and pages.
+    """
+    if sort not in OVERDUE_SORTS:
+        raise ValueError(f"Unknown sort {sort!r}; expected one of {sorted(OVERDUE_SORTS)}")
+    as_of = as_of or date.today()
+    if not isinstance(as_of, str):
+        as_of = as_of.isoformat()
+    where, params = ["1 = 1"], {"as_of": as_of, "due_within": 14}
+    if client_id is not None:
+        where.append("client_id = :client_id")
+        params["client_id"] = client_id
+    if area is not None:
+        where.append("area = :area")
+        params["area"] = area
+    if severity is not None:
+        where.append("severity = :severity")
+        params["severity"] = severity
+    page = max(int(page), 1)
+    params.update(limit=page_size, offset=(page - 1) * page_size)
+
+    with _connection() as conn:
+        df = pd.read_sql_query(_OVERDUE_SELECT + f"""
+            SELECT *, COUNT(*) OVER () as total_rows FROM graded
+            WHERE {" AND ".join(where)}
+            ORDER BY {OVERDUE_SORTS[sort]}
+            LIMIT :limit OFFSET :offset
+        """, conn, params=params)
+        total = int(df["total_rows"].iloc[0]) if len(df) else 0
+        if not len(df) and page > 1:
+            total = conn.execute(_OVERDUE_SELECT + f"""
+                SELECT COUNT(*) FROM graded WHERE {" AND ".join(where)}
+            """, params).fetchone()[0]
+    return {
+        "rows": df.drop(columns=["total_rows", "visit_interval_days"]),
+        "total": total,
+        "page": page,
+        "pages": max((total + page_size - 1) // page_size, 1),
+    }
+
+
+@_cached("buildings", "clients", "contracts", "building_stats", "scheduled_inspections")
+def get_overdue_breakdown(as_of=None):
+    """
+    Overdue building counts per client, area and severity (for filters and
+    the summary chart). Columns: client_id, client_name, area, severity,
+    buildings, annual_value.
+    """
+    as_of = as_of or date.today()
+    if not isinstance(as_of, str):
+        as_of = as_of.isoformat()
+    with _connection() as conn:
+        df = pd.read_sql_query(_OVERDUE_SELECT + """
+            SELECT client_id, client_name, area, severity,
+                COUNT(*) as buildings, SUM(annual_value) as annual_value
+            FROM graded
+            GROUP BY client_id, client_name, area, severity
+            ORDER BY client_name, area, severity
+        """, conn, params={"as_of": as_of, "due_within": 14})
     return df
 
 
+@_cached("inspections", "buildings", "clients")
 def get_completed_this_month():
     """Return inspections completed in the current month."""
     today = date.today()
     month_start = today.replace(day=1).isoformat()
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT i.*, b.name as building_name, cl.name as client_name
-        FROM inspections i
-        JOIN buildings b ON b.id = i.building_id
-        JOIN clients cl ON cl.id = b.client_id
-        WHERE i.inspection_date >= ?
-        ORDER BY i.inspection_date DESC
-    """, conn, params=[month_start])
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT i.*, b.name as building_name, cl.name as client_name
+            FROM inspections i
+            JOIN buildings b ON b.id = i.building_id
+            JOIN clients cl ON cl.id = b.client_id
+            WHERE i.inspection_date >= ?
+            ORDER BY i.inspection_date DESC
+        """, conn, params=[month_start])
     return df
 
 
+@_cached("inspections", "buildings", "clients")
 def get_recent_inspections(days=30):
     """Return inspections from the last N days."""
     cutoff = (date.today() - timedelta(days=days)).isoformat()
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT i.*, b.name as building_name, cl.name as client_name, cl.short_name
-        FROM inspections i
-        JOIN buildings b ON b.id = i.building_id
-        JOIN clients cl ON cl.id = b.client_id
-        WHERE i.inspection_date >= ?
-        ORDER BY i.inspection_date DESC
-    """, conn, params=[cutoff])
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT i.*, b.name as building_name, cl.name as client_name, cl.short_name
+            FROM inspections i
+            JOIN buildings b ON b.id = i.building_id
+            JOIN clients cl ON cl.id = b.client_id
+            WHERE i.inspection_date >= ?
+            ORDER BY i.inspection_date DESC
+        """, conn, params=[cutoff])
     return df
 
 
+@_cached("inspections", "buildings", "clients")
 def get_inspections_by_month(year, month):
     """Return inspections for a specific year/month."""
     month_start = f"{year}-{month:02d}-01"
@@ -407,64 +1963,376 @@ def get_inspections_by_month(year, month):
         month_end = f"{year + 1}-01-01"
     else:
         month_end = f"{year}-{month + 1:02d}-01"
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT i.*, b.name as building_name, cl.name as client_name, cl.short_name
-        FROM inspections i
-        JOIN buildings b ON b.id = i.building_id
-        JOIN clients cl ON cl.id = b.client_id
-        WHERE i.inspection_date >= ? AND i.inspection_date < ?
-        ORDER BY i.inspection_date DESC
-    """, conn, params=[month_start, month_end])
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT i.*, b.name as building_name, cl.name as client_name, cl.short_name
+            FROM inspections i
+            JOIN buildings b ON b.id = i.building_id
+            JOIN clients cl ON cl.id = b.client_id
+            WHERE i.inspection_date >= ? AND i.inspection_date < ?
+            ORDER BY i.inspection_date DESC
+        """, conn, params=[month_start, month_end])
     return df
 
 
+# Per-item inspection results, and the equipment.status each one leaves behind.
+ITEM_RESULTS = ("Passed", "Failed")
+EQUIPMENT_STATUS_FOR_RESULT = {"Passed": "OK", "Failed": "Failed"}
+
+
 def insert_inspection(building_id, inspection_date, technician,
-                      items_checked, items_passed, items_failed, notes):
-    """Insert a new inspection record. Returns the new inspection ID."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO inspections
-            (building_id, inspection_date, technician, items_checked,
-             items_passed, items_failed, notes)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (building_id, inspection_date, technician,
-          items_checked, items_passed, items_failed, notes))
-    inspection_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
-    return inspection_id
+                      items_checked, items_passed, items_failed, notes,
+                      item_results=None):
+    """
+    Insert a new inspection record. Returns the new inspection ID.
+
+    item_results optionally maps equipment ID -> passed (bool). Every result
+    is written to inspection_items and applied to equipment.status in the
+    same transaction as the inspection row. The building's pending scheduled
+    inspection, if any, is completed by trigger in that transaction too.
+    """
+    items = [
+        (int(equipment_id), "Passed" if passed else "Failed")
+        for equipment_id, passed in (item_results or {}).items()
+    ]
+
+    def work(cursor):
+        cursor.execute("""
+            INSERT INTO inspections
+                (building_id, inspection_date, technician, items_checked,
+                 items_passed, items_failed, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (building_id, inspection_date, technician,
+              items_checked, items_passed, items_failed, notes))
+        inspection_id = cursor.lastrowid
+        if items:
+            cursor.executemany("""
+                INSERT INTO inspection_items (inspection_id, equipment_id, result)
+                VALUES (?, ?, ?)
+            """, [(inspection_id, equipment_id, result) for equipment_id, result in items])
+            cursor.execute("""
+                UPDATE equipment
+                SET status = CASE (
+                    SELECT ii.result FROM inspection_items ii
+                    WHERE ii.inspection_id = :inspection_id AND ii.equipment_id = equipment.id
+                ) WHEN 'Passed' THEN :passed ELSE :failed END
+                WHERE id IN (
+                    SELECT equipment_id FROM inspection_items
+                    WHERE inspection_id = :inspection_id
+                )
+            """, {
+                "inspection_id": inspection_id,
+                "passed": EQUIPMENT_STATUS_FOR_RESULT["Passed"],
+                "failed": EQUIPMENT_STATUS_FOR_RESULT["Failed"],
+            })
+        return inspection_id
+
+    tables = ["inspections", "inspection_items", "equipment"] if items else ["inspections"]
+    return _execute_write(work, tables=tables)
+
+
+@_cached("inspection_items", "equipment")
+def get_inspection_items(inspection_id):
+    """Return the per-item results recorded for an inspection."""
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT ii.equipment_id, e.type, ii.result
+            FROM inspection_items ii
+            JOIN equipment e ON e.id = ii.equipment_id
+            WHERE ii.inspection_id = ?
+            ORDER BY e.type, e.id
+        """, conn, params=[inspection_id])
+    return df
+
+
+@_cached("inspection_items", "inspections", "equipment", "buildings")
+def get_inspection_item_results(since=None, client_id=None):
+    """
+    Return one row per recorded item check, for analytics.py.
+
+    Columns: inspection_id, inspection_date, month (YYYY-MM), technician,
+    equipment_id, equipment_type, building_id, client_id, area, failed (0/1).
+    """
+    where, params = ["1 = 1"], []
+    if since is not None:
+        where.append("i.inspection_date >= ?")
+        params.append(str(since))
+    if client_id is not None:
+        where.append("b.client_id = ?")
+        params.append(client_id)
+    with _connection() as conn:
+        df = pd.read_sql_query(f"""
+            SELECT ii.inspection_id, i.inspection_date,
+                substr(i.inspection_date, 1, 7) as month, i.technician,
+                ii.equipment_id, e.type as equipment_type, i.building_id,
+                b.client_id, b.area, ii.result = 'Failed' as failed
+            FROM inspection_items ii
+            JOIN inspections i ON i.id = ii.inspection_id
+            JOIN equipment e ON e.id = ii.equipment_id
+            JOIN buildings b ON b.id = i.building_id
+            WHERE {" AND ".join(where)}
+        """, conn, params=params)
+    return df
+
+
+def get_inspection_report_data(inspection_ids=None, client_id=None,
+                               building_id=None, year=None, month=None):
+    """
+    Return report payloads for inspections matching the given filters.
+
+    Each payload is a dict with the generate_inspection_pdf() arguments plus
+    inspection_id. The checklist comes from the inspection's recorded item
+    results; inspections saved without them fall back to each item's current
+    equipment status. Both are fetched in one query each.
+    """
+    where, params = ["1 = 1"], []
+    if inspection_ids is not None:
+        ids = [int(i) for i in inspection_ids]
+        if not ids:
+            return []
+        where.append(f"i.id IN ({', '.join('?' * len(ids))})")
+        params += ids
+    if client_id is not None:
+        where.append("b.client_id = ?")
+        params.append(client_id)
+    if building_id is not None:
+        where.append("i.building_id = ?")
+        params.append(building_id)
+    if year is not None and month is not None:
+        month_start = f"{year}-{month:02d}-01"
+        month_end = f"{year + 1}-01-01" if month == 12 else f"{year}-{month + 1:02d}-01"
+        where.append("i.inspection_date >= ? AND i.inspection_date < ?")
+        params += [month_start, month_end]
+
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT i.id as inspection_id, i.building_id, i.inspection_date,
+                i.technician, i.items_checked, i.items_passed, i.items_failed,
+                i.notes, b.name as building_name, cl.name as client_name
+            FROM inspections i
+            JOIN buildings b ON b.id = i.building_id
+            JOIN clients cl ON cl.id = b.client_id
+            WHERE {" AND ".join(where)}
+            ORDER BY i.inspection_date, i.id
+        """, params)
+        inspections = [dict(row) for row in cursor.fetchall()]
+
+        recorded = collections.defaultdict(list)
+        inspection_ids = [row["inspection_id"] for row in inspections]
+        if inspection_ids:
+            cursor.execute(f"""
+                SELECT ii.inspection_id, e.type, ii.result
+                FROM inspection_items ii
+                JOIN equipment e ON e.id = ii.equipment_id
+                WHERE ii.inspection_id IN ({', '.join('?' * len(inspection_ids))})
+                ORDER BY ii.inspection_id, e.type, e.id
+            """, inspection_ids)
+            for row in cursor.fetchall():
+                recorded[row["inspection_id"]].append({
+                    "type": row["type"], "status": row["result"],
+                })
+
+        equipment = collections.defaultdict(list)
+        building_ids = sorted({
+            row["building_id"] for row in inspections
+            if row["inspection_id"] not in recorded
+        })
+        if building_ids:
+            cursor.execute(f"""
+                SELECT building_id, type, status FROM equipment
+                WHERE building_id IN ({', '.join('?' * len(building_ids))})
+                ORDER BY building_id, type, id
+            """, building_ids)
+            for row in cursor.fetchall():
+                equipment[row["building_id"]].append({
+                    "type": row["type"],
+                    "status": "Passed" if row["status"] == "OK" else "Failed",
+                })
+
+    payloads = []
+    for row in inspections:
+        payloads.append({
+            "inspection_id": row["inspection_id"],
+            "building_name": row["building_name"],
+            "client_name": row["client_name"],
+            "inspection_date": row["inspection_date"],
+            "technician": row["technician"],
+            "items_checked": row["items_checked"],
+            "items_passed": row["items_passed"],
+            "items_failed": row["items_failed"],
+            "equipment_details": (
+                recorded.get(row["inspection_id"]) or equipment[row["building_id"]]
+            ),
+            "notes": row["notes"] or "",
+        })
+    return payloads
+
+
+# ---------------------------------------------------------------------------
+# REPORT ARTIFACTS (rendered PDFs, see report_store.py)
+# ---------------------------------------------------------------------------
+
+def get_report_artifact(content_hash):
+    """
+    Return the stored PDF for a content hash as a dict (inspection_id,
+    filename, pdf, size_bytes, created_at), or None. Records the access for
+    eviction ordering.
+    """
+    return get_report_artifacts_by_hash([content_hash]).get(content_hash)
+
+
+def get_report_artifacts_by_hash(content_hashes):
+    """
+    Return {content_hash: artifact dict} for the stored PDFs among
+    `content_hashes` (see get_report_artifact). The accesses are recorded in
+    one UPDATE, so a batch export costs a single write transaction.
+    """
+    hashes = list(dict.fromkeys(content_hashes))
+    if not hashes:
+        return {}
+    placeholders = ", ".join("?" * len(hashes))
+    with _connection() as conn:
+        rows = conn.execute(f"""
+            SELECT content_hash, inspection_id, filename, pdf, size_bytes, created_at
+            FROM report_artifacts WHERE content_hash IN ({placeholders})
+        """, hashes).fetchall()
+    artifacts = {
+        row["content_hash"]: {k: row[k] for k in row.keys() if k != "content_hash"}
+        for row in rows
+    }
+    if not artifacts:
+        return {}
+
+    def work(cursor):
+        cursor.execute(f"""
+            UPDATE report_artifacts
+            SET last_accessed = CURRENT_TIMESTAMP, download_count = download_count + 1
+            WHERE content_hash IN ({", ".join("?" * len(artifacts))})
+        """, list(artifacts))
+
+    _execute_write(work, tables=["report_artifacts"])
+    return artifacts
+
+
+def save_report_artifact(content_hash, inspection_id, filename, pdf_bytes,
+                         max_bytes=None):
+    """
+    Store a rendered PDF, replacing any older artifact for the inspection.
+
+    With max_bytes, least recently accessed artifacts are evicted until the
+    store fits. Returns the number of artifacts evicted.
+    """
+    def work(cursor):
+        cursor.execute(
+            "DELETE FROM report_artifacts WHERE inspection_id = ? AND content_hash != ?",
+            (inspection_id, content_hash),
+        )
+        cursor.execute("""
+            INSERT OR REPLACE INTO report_artifacts
+                (content_hash, inspection_id, filename, pdf, size_bytes)
+            VALUES (?, ?, ?, ?, ?)
+        """, (content_hash, inspection_id, filename, sqlite3.Binary(pdf_bytes),
+              len(pdf_bytes)))
+        return _evict_report_artifacts(cursor, max_bytes, keep=content_hash)
+
+    return _execute_write(work, tables=["report_artifacts"])
+
+
+def _evict_report_artifacts(cursor, max_bytes, keep=None):
+    """Delete least recently accessed artifacts until the total fits max_bytes."""
+    if max_bytes is None:
+        return 0
+    cursor.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM report_artifacts")
+    excess = cursor.fetchone()[0] - max_bytes
+    if excess <= 0:
+        return 0
+    victims = []
+    for content_hash, size in cursor.execute("""
+        SELECT content_hash, size_bytes FROM report_artifacts
+        WHERE content_hash != ?
+        ORDER BY last_accessed, created_at
+    """, (keep or "",)).fetchall():
+        if excess <= 0:
+            break
+        victims.append((content_hash,))
+        excess -= size
+    cursor.executemany("DELETE FROM report_artifacts WHERE content_hash = ?", victims)
+    return len(victims)
+
+
+def evict_report_artifacts(max_bytes):
+    """Shrink the report store to max_bytes. Returns the number evicted."""
+    return _execute_write(
+        lambda cursor: _evict_report_artifacts(cursor, max_bytes),
+        tables=["report_artifacts"],
+    )
+
+
+@_cached("report_artifacts", "inspections", "buildings", "clients")
+def get_report_artifacts(client_id=None, building_id=None, limit=200):
+    """Return stored reports (without PDF bytes), most recently created first."""
+    where, params = ["1 = 1"], []
+    if client_id is not None:
+        where.append("b.client_id = ?")
+        params.append(client_id)
+    if building_id is not None:
+        where.append("i.building_id = ?")
+        params.append(building_id)
+    with _connection() as conn:
+        df = pd.read_sql_query(f"""
+            SELECT ra.inspection_id, ra.content_hash, ra.filename, ra.size_bytes,
+                ra.created_at, ra.last_accessed, ra.download_count,
+                i.inspection_date, i.technician, b.name as building_name,
+                cl.name as client_name
+            FROM report_artifacts ra
+            JOIN inspections i ON i.id = ra.inspection_id
+            JOIN buildings b ON b.id = i.building_id
+            JOIN clients cl ON cl.id = b.client_id
+            WHERE {" AND ".join(where)}
+            ORDER BY ra.created_at DESC, ra.inspection_id DESC
+            LIMIT ?
+        """, conn, params=params + [limit])
+    return df
+
+
+@_cached("report_artifacts")
+def get_report_store_stats():
+    """Return artifact count and total stored bytes."""
+    with _connection() as conn:
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM report_artifacts"
+        ).fetchone()
+    return {"count": count, "bytes": total}
 
 
 # ---------------------------------------------------------------------------
 # EQUIPMENT QUERIES
 # ---------------------------------------------------------------------------
 
+@_cached("equipment")
 def get_equipment_by_building(building_id):
     """Return all equipment for a building."""
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT * FROM equipment
-        WHERE building_id = ?
-        ORDER BY type, id
-    """, conn, params=[building_id])
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT * FROM equipment
+            WHERE building_id = ?
+            ORDER BY type, id
+        """, conn, params=[building_id])
     return df
 
 
+@_cached("equipment")
 def get_equipment_grouped_by_type(building_id):
     """Return equipment grouped by type with counts."""
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT type, COUNT(*) as count, GROUP_CONCAT(id) as item_ids
-        FROM equipment
-        WHERE building_id = ?
-        GROUP BY type
-        ORDER BY type
-    """, conn, params=[building_id])
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT type, COUNT(*) as count, GROUP_CONCAT(id) as item_ids
+            FROM equipment
+            WHERE building_id = ?
+            GROUP BY type
+            ORDER BY type
+        """, conn, params=[building_id])
     return df
 
 
@@ -472,37 +2340,38 @@ def get_equipment_grouped_by_type(building_id):
 # COMPLAINT QUERIES
 # ---------------------------------------------------------------------------
 
+@_cached("complaints", "clients", "buildings")
 def get_all_complaints():
     """Return all complaints with client/building info."""
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT comp.*, cl.name as client_name, cl.short_name,
-            b.name as building_name
-        FROM complaints comp
-        JOIN clients cl ON cl.id = comp.client_id
-        JOIN buildings b ON b.id = comp.building_id
-        ORDER BY comp.created_at DESC
-    """, conn)
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT comp.*, cl.name as client_name, cl.short_name,
+                b.name as building_name
+            FROM complaints comp
+            JOIN clients cl ON cl.id = comp.client_id
+            JOIN buildings b ON b.id = comp.building_id
+            ORDER BY comp.created_at DESC
+        """, conn)
     return df
 
 
+@_cached("complaints", "clients", "buildings")
 def get_recent_complaints(limit=5):
     """Return the most recent complaints."""
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT comp.*, cl.name as client_name, cl.short_name,
-            b.name as building_name
-        FROM complaints comp
-        JOIN clients cl ON cl.id = comp.client_id
-        JOIN buildings b ON b.id = comp.building_id
-        ORDER BY comp.created_at DESC
-        LIMIT ?
-    """, conn, params=[limit])
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT comp.*, cl.name as client_name, cl.short_name,
+                b.name as building_name
+            FROM complaints comp
+            JOIN clients cl ON cl.id = comp.client_id
+            JOIN buildings b ON b.id = comp.building_id
+            ORDER BY comp.created_at DESC
+            LIMIT ?
+        """, conn, params=[limit])
     return df
 
 
+@_cached("complaints", "clients", "buildings")
 def get_complaints_by_month(year, month):
     """Return complaints for a specific year/month."""
     month_start = f"{year}-{month:02d}-01"
@@ -510,69 +2379,108 @@ def get_complaints_by_month(year, month):
         month_end = f"{year + 1}-01-01"
     else:
         month_end = f"{year}-{month + 1:02d}-01"
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT comp.*, cl.name as client_name, b.name as building_name
-        FROM complaints comp
-        JOIN clients cl ON cl.id = comp.client_id
-        JOIN buildings b ON b.id = comp.building_id
-        WHERE comp.created_at >= ? AND comp.created_at < ?
-        ORDER BY comp.created_at DESC
-    """, conn, params=[month_start, month_end])
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT comp.*, cl.name as client_name, b.name as building_name
+            FROM complaints comp
+            JOIN clients cl ON cl.id = comp.client_id
+            JOIN buildings b ON b.id = comp.building_id
+            WHERE comp.created_at >= ? AND comp.created_at < ?
+            ORDER BY comp.created_at DESC
+        """, conn, params=[month_start, month_end])
     return df
 
 
+def format_ticket_number(year, number):
+    """Complaint ticket number, e.g. TTS-2026-0042."""
+    return f"TTS-{year}-{number:04d}"
+
+
+def _reserve_ticket_numbers(cursor, year, count):
+    """Advance the year's ticket sequence by `count` inside the caller's
+    transaction and return the reserved ticket numbers."""
+    last_value = cursor.execute("""
+        INSERT INTO ticket_sequences (year, last_value) VALUES (?, ?)
+        ON CONFLICT(year) DO UPDATE SET last_value = last_value + excluded.last_value
+        RETURNING last_value
+    """, (year, count)).fetchone()[0]
+    return [format_ticket_number(year, n)
+            for n in range(last_value - count + 1, last_value + 1)]
+
+
+def reserve_ticket_numbers(count, year=None):
+    """
+    Reserve `count` consecutive ticket numbers for a batch import.
+
+    The numbers are taken from the sequence immediately, so they never
+    collide with tickets created meanwhile; any left unused become gaps.
+    year defaults to the current year.
+    """
+    if count < 1:
+        return []
+    year = year or date.today().year
+    return _execute_write(
+        lambda cursor: _reserve_ticket_numbers(cursor, year, count),
+        tables=["ticket_sequences"],
+    )
+
+
+def rebuild_ticket_sequences():
+    """Recompute ticket_sequences from the complaints table (after bulk loads)."""
+    def work(cursor):
+        cursor.execute("DELETE FROM ticket_sequences")
+        cursor.execute(_TICKET_SEQUENCES_REFRESH)
+        return cursor.rowcount
+
+    return _execute_write(work, tables=["ticket_sequences"])
+
+
 def insert_complaint(client_id, building_id, message, priority,
                      assigned_technician=None, inspection_id=None):
-    """Insert a new complaint. Auto-generates ticket number. Returns ticket_number."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    year = date.today().year
-    cursor.execute(
-        "SELECT COUNT(*) FROM complaints WHERE ticket_number LIKE ?",
-        (f"TTS-{year}-%",)
-    )
-    count = cursor.fetchone()[0]
-    ticket_number = f"TTS-{year}-{count + 1:04d}"
+    """
+    Insert a new complaint. Returns its ticket number, allocated from the
+    current year's sequence in the same transaction.
+    """
+    def work(cursor):
+        ticket_number = _reserve_ticket_numbers(cursor, date.today().year, 1)[0]
+
+        status = "assigned" if assigned_technician else "open"
+        cursor.execute("""
+            INSERT INTO complaints
+                (ticket_number, client_id, building_id, message, priority,
+                 status, assigned_technician, inspection_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (ticket_number, client_id, building_id, message, priority,
+              status, assigned_technician, inspection_id))
+        return ticket_number
 
-    status = "assigned" if assigned_technician else "open"
-    cursor.execute("""
-        INSERT INTO complaints
-            (ticket_number, client_id, building_id, message, priority,
-             status, assigned_technician, inspection_id)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-    """, (ticket_number, client_id, building_id, message, priority,
-          status, assigned_technician, inspection_id))
-    conn.commit()
-    conn.close()
-    return ticket_number
+    return _execute_write(work, tables=["complaints", "ticket_sequences"])
 
 
 # ---------------------------------------------------------------------------
 # CONTRACT QUERIES
 # ---------------------------------------------------------------------------
 
+@_cached("contracts")
 def get_active_contracts_count():
     """Return count of active contracts."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT COUNT(*) FROM contracts WHERE status = 'active'")
-    count = cursor.fetchone()[0]
-    conn.close()
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM contracts WHERE status = 'active'")
+        count = cursor.fetchone()[0]
     return count
 
 
+@_cached("contracts")
 def get_contract_by_building(building_id):
     """Return the active contract for a building."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT * FROM contracts
-        WHERE building_id = ? AND status = 'active'
-    """, (building_id,))
-    row = cursor.fetchone()
-    conn.close()
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT * FROM contracts
+            WHERE building_id = ? AND status = 'active'
+        """, (building_id,))
+        row = cursor.fetchone()
     return dict(row) if row else None
 
 
@@ -581,44 +2489,179 @@ def get_contract_by_building(building_id):
 # ---------------------------------------------------------------------------
 
 def schedule_inspection(building_id, scheduled_date, assigned_technician):
-    """Schedule an inspection for an overdue building."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO scheduled_inspections
-            (building_id, scheduled_date, assigned_technician)
-        VALUES (?, ?, ?)
-    """, (building_id, scheduled_date, assigned_technician))
-    conn.commit()
-    conn.close()
+    """
+    Schedule an inspection for an overdue building.
+
+    Returns False (and writes nothing) if the building already has a
+    pending scheduled inspection.
+    """
+    result = schedule_inspections([(building_id, scheduled_date, assigned_technician)])
+    return bool(result["scheduled"])
+
+
+def schedule_inspections(rows):
+    """
+    Schedule many inspections in one transaction.
+
+    Args:
+        rows: Iterable of (building_id, scheduled_date, assigned_technician)
+
+    Returns:
+        dict with scheduled (list of dicts: id, building_id, scheduled_date,
+        assigned_technician) and rejected (same keys minus id, plus reason:
+        'already scheduled', 'duplicate in request' or 'unknown building').
+        A building with a pending 'scheduled' row is rejected inside the
+        write transaction, so concurrent dispatchers cannot double-book it.
+    """
+    requests = [
+        {"building_id": int(building_id), "scheduled_date": str(scheduled_date),
+         "assigned_technician": technician}
+        for building_id, scheduled_date, technician in rows
+    ]
+    if not requests:
+        return {"scheduled": [], "rejected": []}
+    payload = json.dumps([
+        [r["building_id"], r["scheduled_date"], r["assigned_technician"]] for r in requests
+    ])
+
+    def work(cursor):
+        # First request per building wins; the guard and the insert are
+        # one statement under BEGIN IMMEDIATE.
+        inserted = cursor.execute("""
+            WITH req AS (
+                SELECT
+                    json_extract(value, '$[0]') as building_id,
+                    json_extract(value, '$[1]') as scheduled_date,
+                    json_extract(value, '$[2]') as assigned_technician,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY json_extract(value, '$[0]') ORDER BY key
+                    ) as nth
+                FROM json_each(?)
+            )
+            INSERT INTO scheduled_inspections
+                (building_id, scheduled_date, assigned_technician)
+            SELECT req.building_id, req.scheduled_date, req.assigned_technician
+            FROM req
+            JOIN buildings b ON b.id = req.building_id
+            WHERE req.nth = 1 AND NOT EXISTS (
+                SELECT 1 FROM scheduled_inspections si
+                WHERE si.building_id = req.building_id AND si.status = 'scheduled'
+            )
+            RETURNING id, building_id
+        """, (payload,)).fetchall()
+        known = {
+            row[0] for row in cursor.execute(
+                "SELECT id FROM buildings WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted({r["building_id"] for r in requests})),),
+            )
+        }
+        return {row["building_id"]: row["id"] for row in inserted}, known
+
+    new_ids, known = _execute_write(work, tables=["scheduled_inspections"])
+    scheduled, rejected, seen = [], [], set()
+    for request in requests:
+        building_id = request["building_id"]
+        if building_id in new_ids and building_id not in seen:
+            scheduled.append({"id": new_ids[building_id], **request})
+        elif building_id in seen:
+            rejected.append({**request, "reason": "duplicate in request"})
+        elif building_id not in known:
+            rejected.append({**request, "reason": "unknown building"})
+        else:
+            rejected.append({**request, "reason": "already scheduled"})
+        seen.add(building_id)
+    return {"scheduled": scheduled, "rejected": rejected}
+
+
+# Scheduled inspection lifecycle (enforced by trg_scheduled_status_transition)
+SCHEDULE_STATUSES = ("scheduled", "completed", "cancelled")
+SCHEDULE_TRANSITIONS = {
+    "scheduled": ("completed", "cancelled"),
+    "completed": (),
+    "cancelled": (),
+}
+
+
+def cancel_scheduled_inspection(schedule_id):
+    """Cancel a pending scheduled inspection. Returns False if it was not pending."""
+    def work(cursor):
+        cursor.execute("""
+            UPDATE scheduled_inspections
+            SET status = 'cancelled', closed_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status = 'scheduled'
+        """, (schedule_id,))
+        return cursor.rowcount
+
+    return _execute_write(work, tables=["scheduled_inspections"]) > 0
+
+
+def reschedule_inspection(schedule_id, scheduled_date, assigned_technician=None):
+    """
+    Move a pending scheduled inspection to a new date (and optionally
+    technician). Returns False if it was not pending.
+    """
+    def work(cursor):
+        cursor.execute("""
+            UPDATE scheduled_inspections
+            SET scheduled_date = ?,
+                assigned_technician = COALESCE(?, assigned_technician)
+            WHERE id = ? AND status = 'scheduled'
+        """, (str(scheduled_date), assigned_technician, schedule_id))
+        return cursor.rowcount
+
+    return _execute_write(work, tables=["scheduled_inspections"]) > 0
+
+
+@_cached("scheduled_inspections", "buildings", "clients")
+def get_past_due_schedules(as_of=None):
+    """
+    Return pending scheduled inspections whose date has passed without an
+    inspection being submitted, most overdue first, with days_past_due.
+    """
+    as_of = as_of or date.today()
+    if not isinstance(as_of, str):
+        as_of = as_of.isoformat()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT si.id, si.building_id, si.scheduled_date, si.assigned_technician,
+                si.created_at, b.name as building_name, b.area,
+                cl.name as client_name, cl.short_name,
+                CAST(julianday(:as_of) - julianday(si.scheduled_date) AS INTEGER) as days_past_due
+            FROM scheduled_inspections si
+            JOIN buildings b ON b.id = si.building_id
+            JOIN clients cl ON cl.id = b.client_id
+            WHERE si.status = 'scheduled' AND si.scheduled_date < :as_of
+            ORDER BY si.scheduled_date ASC
+        """, conn, params={"as_of": as_of})
+    return df
 
 
+@_cached("scheduled_inspections", "buildings", "clients")
 def get_scheduled_inspections():
     """Return all scheduled (not yet completed) inspections."""
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT si.*, b.name as building_name, b.area,
-            cl.name as client_name, cl.short_name
-        FROM scheduled_inspections si
-        JOIN buildings b ON b.id = si.building_id
-        JOIN clients cl ON cl.id = b.client_id
-        WHERE si.status = 'scheduled'
-        ORDER BY si.scheduled_date ASC
-    """, conn)
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT si.*, b.name as building_name, b.area,
+                cl.name as client_name, cl.short_name
+            FROM scheduled_inspections si
+            JOIN buildings b ON b.id = si.building_id
+            JOIN clients cl ON cl.id = b.client_id
+            WHERE si.status = 'scheduled'
+            ORDER BY si.scheduled_date ASC
+        """, conn)
     return df
 
 
+@_cached("scheduled_inspections")
 def is_building_scheduled(building_id):
     """Check if a building has a pending scheduled inspection."""
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT COUNT(*) FROM scheduled_inspections
-        WHERE building_id = ? AND status = 'scheduled'
-    """, (building_id,))
-    count = cursor.fetchone()[0]
-    conn.close()
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) FROM scheduled_inspections
+            WHERE building_id = ? AND status = 'scheduled'
+        """, (building_id,))
+        count = cursor.fetchone()[0]
     return count > 0
 
 
@@ -626,205 +2669,433 @@ def is_building_scheduled(building_id):
 # FINANCIAL QUERIES
 # ---------------------------------------------------------------------------
 
+def _financial_figures(row):
+    """Map a ledger_summary row (or None) to the summary figures."""
+    row = dict(row) if row else {}
+    value = row.get("contract_value", 0)
+    collected = row.get("collected", 0)
+    return {
+        "total_contract_value": value,
+        "total_collected": collected,
+        "total_outstanding": value - collected,
+        "total_overdue": row.get("overdue", 0),
+        "total_pending": row.get("pending", 0),
+        "total_partial": row.get("partial", 0),
+        "outstanding_count": row.get("pending_count", 0) + row.get("overdue_count", 0),
+        "overdue_count": row.get("overdue_count", 0),
+        "partial_count": row.get("partial_count", 0),
+        "collection_pct": (collected / value * 100) if value > 0 else 0,
+    }
+
+
+@_cached("ledger_summary")
 def get_financial_summary():
     """
     Return overall financial summary:
     total_contract_value, total_collected, total_outstanding, total_overdue
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT COALESCE(SUM(annual_value), 0) FROM contracts WHERE status = 'active'
-    """)
-    total_contract_value = cursor.fetchone()[0]
-
-    cursor.execute("""
-        SELECT COALESCE(SUM(p.amount), 0)
-        FROM payments p
-        JOIN contracts c ON c.id = p.contract_id
-        WHERE p.status = 'received' AND c.status = 'active'
-    """)
-    total_collected = cursor.fetchone()[0]
-
-    cursor.execute("""
-        SELECT COALESCE(SUM(p.amount), 0)
-        FROM payments p
-        JOIN contracts c ON c.id = p.contract_id
-        WHERE p.status = 'overdue' AND c.status = 'active'
-    """)
-    total_overdue = cursor.fetchone()[0]
-
-    cursor.execute("""
-        SELECT COUNT(*)
-        FROM payments p
-        JOIN contracts c ON c.id = p.contract_id
-        WHERE p.status IN ('pending', 'overdue') AND c.status = 'active'
-    """)
-    outstanding_count = cursor.fetchone()[0]
-
-    cursor.execute("""
-        SELECT COUNT(*)
-        FROM payments p
-        JOIN contracts c ON c.id = p.contract_id
-        WHERE p.status = 'overdue' AND c.status = 'active'
-    """)
-    overdue_count = cursor.fetchone()[0]
-
-    total_outstanding = total_contract_value - total_collected
-
-    conn.close()
-    return {
-        "total_contract_value": total_contract_value,
-        "total_collected": total_collected,
-        "total_outstanding": total_outstanding,
-        "total_overdue": total_overdue,
-        "outstanding_count": outstanding_count,
-        "overdue_count": overdue_count,
-        "collection_pct": (total_collected / total_contract_value * 100)
-        if total_contract_value > 0 else 0,
-    }
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT * FROM ledger_summary WHERE scope = 'global' AND scope_id = 0"
+        )
+        row = cursor.fetchone()
+    return _financial_figures(row)
 
 
+@_cached("ledger_summary", "clients")
 def get_client_financial_breakdown():
     """Return per-client financial breakdown."""
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT
-            cl.name as "Client",
-            COALESCE(SUM(DISTINCT c.annual_value), 0) as "Contract Value (AED)",
-            COALESCE(
-                (SELECT SUM(p.amount)
-                 FROM payments p
-                 JOIN contracts c2 ON c2.id = p.contract_id
-                 JOIN buildings b2 ON b2.id = c2.building_id
-                 WHERE b2.client_id = cl.id AND p.status = 'received' AND c2.status = 'active'),
-                0
-            ) as "Paid (AED)",
-            COALESCE(SUM(DISTINCT c.annual_value), 0) -
-            COALESCE(
-                (SELECT SUM(p.amount)
-                 FROM payments p
-                 JOIN contracts c2 ON c2.id = p.contract_id
-                 JOIN buildings b2 ON b2.id = c2.building_id
-                 WHERE b2.client_id = cl.id AND p.status = 'received' AND c2.status = 'active'),
-                0
-            ) as "Outstanding (AED)",
-            CASE
-                WHEN COALESCE(
-                    (SELECT SUM(p.amount)
-                     FROM payments p
-                     JOIN contracts c2 ON c2.id = p.contract_id
-                     JOIN buildings b2 ON b2.id = c2.building_id
-                     WHERE b2.client_id = cl.id AND p.status = 'received' AND c2.status = 'active'),
-                    0
-                ) >= COALESCE(SUM(DISTINCT c.annual_value), 0) THEN 'Fully Paid'
-                WHEN EXISTS (
-                    SELECT 1 FROM payments p
-                    JOIN contracts c2 ON c2.id = p.contract_id
-                    JOIN buildings b2 ON b2.id = c2.building_id
-                    WHERE b2.client_id = cl.id AND p.status = 'overdue'
-                ) THEN 'Payment Overdue'
-                ELSE 'Partially Paid'
-            END as "Status"
-        FROM clients cl
-        LEFT JOIN buildings b ON b.client_id = cl.id
-        LEFT JOIN contracts c ON c.building_id = b.id AND c.status = 'active'
-        GROUP BY cl.id
-        ORDER BY "Contract Value (AED)" DESC
-    """, conn)
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT
+                cl.name as "Client",
+                l.contract_value as "Contract Value (AED)",
+                l.collected as "Paid (AED)",
+                l.contract_value - l.collected as "Outstanding (AED)",
+                CASE
+                    WHEN l.collected >= l.contract_value THEN 'Fully Paid'
+                    WHEN l.overdue_count > 0 THEN 'Payment Overdue'
+                    ELSE 'Partially Paid'
+                END as "Status"
+            FROM ledger_summary l
+            JOIN clients cl ON cl.id = l.scope_id
+            WHERE l.scope = 'client'
+            ORDER BY "Contract Value (AED)" DESC
+        """, conn)
     return df
 
 
+@_cached("payments", "contracts", "buildings", "clients")
 def get_payment_history(limit=20):
     """Return recent payment records."""
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT
-            p.payment_date as "Date",
-            cl.name as "Client",
-            b.name as "Building",
-            p.amount as "Amount (AED)",
-            p.method as "Method",
-            p.reference_number as "Reference",
-            p.status as "Status"
-        FROM payments p
-        JOIN contracts c ON c.id = p.contract_id
-        JOIN buildings b ON b.id = c.building_id
-        JOIN clients cl ON cl.id = b.client_id
-        ORDER BY p.payment_date DESC
-        LIMIT ?
-    """, conn, params=[limit])
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT
+                p.payment_date as "Date",
+                cl.name as "Client",
+                b.name as "Building",
+                p.amount as "Amount (AED)",
+                p.method as "Method",
+                p.reference_number as "Reference",
+                p.status as "Status"
+            FROM payments p
+            JOIN contracts c ON c.id = p.contract_id
+            JOIN buildings b ON b.id = c.building_id
+            JOIN clients cl ON cl.id = b.client_id
+            ORDER BY p.payment_date DESC
+            LIMIT ?
+        """, conn, params=[limit])
     return df
 
 
+@_cached("payments")
 def get_monthly_revenue(months=6):
     """Return monthly revenue aggregation for the last N months."""
     cutoff = (date.today() - timedelta(days=months * 30)).isoformat()
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT
-            strftime('%Y-%m', p.payment_date) as month,
-            SUM(p.amount) as total
-        FROM payments p
-        WHERE p.status = 'received' AND p.payment_date >= ?
-        GROUP BY strftime('%Y-%m', p.payment_date)
-        ORDER BY month ASC
-    """, conn, params=[cutoff])
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT
+                strftime('%Y-%m', p.payment_date) as month,
+                SUM(p.amount) as total
+            FROM payments p
+            WHERE p.status = 'received' AND p.payment_date >= ?
+            GROUP BY strftime('%Y-%m', p.payment_date)
+            ORDER BY month ASC
+        """, conn, params=[cutoff])
     return df
 
 
+@_cached("payments", "contracts", "buildings", "clients")
 def get_outstanding_invoices():
     """Return contracts with pending/overdue payments."""
-    conn = get_connection()
-    df = pd.read_sql_query("""
-        SELECT
-            cl.name as "Client",
-            b.name as "Building",
-            c.annual_value as "Contract Value (AED)",
-            p.amount as "Amount Due (AED)",
-            p.payment_date as "Due Date",
-            CAST(julianday(?) - julianday(p.payment_date) AS INTEGER) as "Days Overdue",
-            p.status as "Status"
-        FROM payments p
-        JOIN contracts c ON c.id = p.contract_id
-        JOIN buildings b ON b.id = c.building_id
-        JOIN clients cl ON cl.id = b.client_id
-        WHERE p.status IN ('pending', 'overdue') AND c.status = 'active'
-        ORDER BY p.payment_date ASC
-    """, conn, params=[date.today().isoformat()])
-    conn.close()
+    with _connection() as conn:
+        df = pd.read_sql_query("""
+            SELECT
+                cl.name as "Client",
+                b.name as "Building",
+                c.annual_value as "Contract Value (AED)",
+                p.amount as "Amount Due (AED)",
+                p.payment_date as "Due Date",
+                CAST(julianday(?) - julianday(p.payment_date) AS INTEGER) as "Days Overdue",
+                p.status as "Status"
+            FROM payments p
+            JOIN contracts c ON c.id = p.contract_id
+            JOIN buildings b ON b.id = c.building_id
+            JOIN clients cl ON cl.id = b.client_id
+            WHERE p.status IN ('pending', 'overdue') AND c.status = 'active'
+            ORDER BY p.payment_date ASC
+        """, conn, params=[date.today().isoformat()])
     return df
 
 
+@_cached("ledger_summary")
 def get_client_financial_detail(client_id):
     """Return financial details for a specific client."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    cursor.execute("""
-        SELECT COALESCE(SUM(c.annual_value), 0)
-        FROM contracts c
-        JOIN buildings b ON b.id = c.building_id
-        WHERE b.client_id = ? AND c.status = 'active'
-    """, (client_id,))
-    total_value = cursor.fetchone()[0]
-
-    cursor.execute("""
-        SELECT COALESCE(SUM(p.amount), 0)
-        FROM payments p
-        JOIN contracts c ON c.id = p.contract_id
-        JOIN buildings b ON b.id = c.building_id
-        WHERE b.client_id = ? AND p.status = 'received' AND c.status = 'active'
-    """, (client_id,))
-    total_paid = cursor.fetchone()[0]
-
-    conn.close()
+    with _connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT * FROM ledger_summary WHERE scope = 'client' AND scope_id = ?",
+            (client_id,),
+        )
+        figures = _financial_figures(cursor.fetchone())
     return {
-        "total_value": total_value,
-        "total_paid": total_paid,
-        "outstanding": total_value - total_paid,
+        "total_value": figures["total_contract_value"],
+        "total_paid": figures["total_collected"],
+        "outstanding": figures["total_outstanding"],
     }
+
+
+PAYMENT_STATUSES = ("received", "pending", "overdue", "partial")
+
+
+def record_payment(contract_id, payment_date, amount, status="received",
+                   method="bank_transfer", reference_number=None, notes=None):
+    """Insert a payment (ledger totals update via triggers). Returns the payment ID."""
+    if status not in PAYMENT_STATUSES:
+        raise ValueError(f"Unknown payment status: {status}")
+
+    def work(cursor):
+        cursor.execute("""
+            INSERT INTO payments
+                (contract_id, payment_date, amount, method,
+                 reference_number, status, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (contract_id, payment_date, amount, method,
+              reference_number, status, notes))
+        return cursor.lastrowid
+
+    return _execute_write(work, tables=["payments"])
+
+
+def update_payment_status(payment_id, status):
+    """Change a payment's status, e.g. pending -> received."""
+    if status not in PAYMENT_STATUSES:
+        raise ValueError(f"Unknown payment status: {status}")
+
+    def work(cursor):
+        cursor.execute(
+            "UPDATE payments SET status = ? WHERE id = ?", (status, payment_id)
+        )
+        return cursor.rowcount
+
+    return _execute_write(work, tables=["payments"]) > 0
+
+
+# ---------------------------------------------------------------------------
+# DASHBOARD SNAPSHOT
+# ---------------------------------------------------------------------------
+# Everything the Dashboard shows, read on one connection inside one read
+# transaction, so the figures agree with each other even while inspections
+# and payments are being written. Building status is evaluated once, in a
+# MATERIALIZED CTE shared by the per-client counts and the due-soon list.
+
+DASHBOARD_SNAPSHOT_TTL = 30.0   # seconds; bounds staleness from other processes' writes
+
+
+@dataclasses.dataclass(frozen=True)
+class UpcomingInspection:
+    building_id: int
+    building_name: str
+    client_name: str
+    area: str
+    days_until_next: int
+
+
+@dataclasses.dataclass(frozen=True)
+class RecentComplaint:
+    ticket_number: str
+    priority: str
+    status: str
+    message: str
+    created_at: str
+    client_name: str
+    building_name: str
+
+
+@dataclasses.dataclass(frozen=True)
+class ClientOverview:
+    client_id: int
+    name: str
+    buildings: int
+    equipment: int
+    annual_value: float
+    overdue_count: int
+    due_soon_count: int
+
+
+@dataclasses.dataclass(frozen=True)
+class DashboardSnapshot:
+    """Immutable, mutually consistent Dashboard figures as of one date."""
+
+    as_of: str
+    due_within: int
+    computed_at: str
+    active_contracts: int
+    overdue_count: int
+    due_soon_count: int
+    completed_this_month: int
+    financials: types.MappingProxyType   # get_financial_summary() figures
+    upcoming: tuple        # UpcomingInspection, soonest first
+    recent_complaints: tuple   # RecentComplaint, newest first
+    clients: tuple         # ClientOverview, highest annual value first
+
+
+_DASHBOARD_STATUS_SELECT = f"""
+    WITH status AS MATERIALIZED ({_BUILDING_STATUS_SELECT}),
+    per_client AS (
+        SELECT client_id,
+            SUM(status = 'overdue') as overdue_count,
+            SUM(status = 'due_soon') as due_soon_count
+        FROM status
+        GROUP BY client_id
+    ),
+    -- Summed before the rollup joins contracts, which repeats a building
+    -- once per active contract.
+    per_client_equipment AS (
+        SELECT b.client_id, SUM(bs.equipment_count) as equipment
+        FROM buildings b
+        JOIN building_stats bs ON bs.building_id = b.id
+        GROUP BY b.client_id
+    ),
+    rollup AS (
+        SELECT
+            cl.id as client_id,
+            cl.name,
+            COUNT(DISTINCT b.id) as buildings,
+            COALESCE(MAX(eq.equipment), 0) as equipment,
+            COALESCE(SUM(DISTINCT c.annual_value), 0) as annual_value
+        FROM clients cl
+        LEFT JOIN buildings b ON b.client_id = cl.id
+        LEFT JOIN contracts c ON c.building_id = b.id AND c.status = 'active'
+        LEFT JOIN per_client_equipment eq ON eq.client_id = cl.id
+        GROUP BY cl.id
+    )
+    SELECT 'client' as kind, r.client_id as id, r.name, NULL as client_name,
+        NULL as area, r.buildings, r.equipment, r.annual_value,
+        COALESCE(pc.overdue_count, 0) as overdue_count,
+        COALESCE(pc.due_soon_count, 0) as due_soon_count,
+        NULL as days_until_next
+    FROM rollup r
+    LEFT JOIN per_client pc ON pc.client_id = r.client_id
+    UNION ALL
+    SELECT 'upcoming', building_id, building_name, client_name, area,
+        NULL, NULL, NULL, NULL, NULL, days_until_next
+    FROM status
+    WHERE status = 'due_soon'
+    ORDER BY kind, annual_value DESC, days_until_next, id
+"""
+
+
+@_cached("buildings", "clients", "contracts", "building_stats", "scheduled_inspections",
+         "inspections", "ledger_summary", "complaints", ttl=DASHBOARD_SNAPSHOT_TTL)
+def get_dashboard_snapshot(as_of=None, due_within=14, recent_complaints=5):
+    """
+    Return a DashboardSnapshot: contract, overdue, due-soon and completed
+    counts, the global financial figures, the due-soon list, the latest
+    complaints and the per-client overview, all read in one transaction.
+
+    Cached across sessions; writes invalidate it and it expires after
+    DASHBOARD_SNAPSHOT_TTL seconds.
+    """
+    as_of = as_of or date.today()
+    if not isinstance(as_of, str):
+        as_of = as_of.isoformat()
+    with _connection() as conn:
+        conn.execute("BEGIN")   # one read snapshot for every statement below
+        rows = conn.execute(
+            _DASHBOARD_STATUS_SELECT, {"as_of": as_of, "due_within": due_within}
+        ).fetchall()
+        totals = conn.execute("""
+            SELECT
+                (SELECT COUNT(*) FROM contracts WHERE status = 'active') as active_contracts,
+                (SELECT COUNT(*) FROM inspections
+                 WHERE inspection_date >= :month_start AND inspection_date <= :as_of
+                ) as completed_this_month,
+                l.*
+            FROM (SELECT 1)
+            LEFT JOIN ledger_summary l ON l.scope = 'global' AND l.scope_id = 0
+        """, {"month_start": as_of[:8] + "01", "as_of": as_of}).fetchone()
+        complaints = conn.execute("""
+            SELECT comp.ticket_number, comp.priority, comp.status, comp.message,
+                comp.created_at, cl.name as client_name, b.name as building_name
+            FROM complaints comp
+            JOIN clients cl ON cl.id = comp.client_id
+            JOIN buildings b ON b.id = comp.building_id
+            ORDER BY comp.created_at DESC
+            LIMIT ?
+        """, (recent_complaints,)).fetchall()
+        conn.rollback()
+
+    clients = tuple(
+        ClientOverview(r["id"], r["name"], r["buildings"], r["equipment"],
+                       r["annual_value"], r["overdue_count"], r["due_soon_count"])
+        for r in rows if r["kind"] == "client"
+    )
+    return DashboardSnapshot(
+        as_of=as_of,
+        due_within=due_within,
+        computed_at=datetime.now().isoformat(timespec="seconds"),
+        active_contracts=totals["active_contracts"],
+        overdue_count=sum(c.overdue_count for c in clients),
+        due_soon_count=sum(c.due_soon_count for c in clients),
+        completed_this_month=totals["completed_this_month"],
+        financials=types.MappingProxyType(_financial_figures(
+            {k: v for k, v in dict(totals).items() if v is not None}  # no ledger row yet
+        )),
+        upcoming=tuple(
+            UpcomingInspection(r["id"], r["name"], r["client_name"], r["area"],
+                               r["days_until_next"])
+            for r in rows if r["kind"] == "upcoming"
+        ),
+        recent_complaints=tuple(RecentComplaint(**dict(r)) for r in complaints),
+        clients=clients,
+    )
+
+
+# ---------------------------------------------------------------------------
+# LEDGER RECONCILIATION
+# ---------------------------------------------------------------------------
+
+def rebuild_ledger():
+    """Recompute every ledger_summary row from the payments table."""
+    def work(cursor):
+        cursor.execute("DELETE FROM ledger_summary")
+        for statement in _ledger_refresh(contract_where="1", client_where="1"):
+            cursor.execute(statement)
+        cursor.execute("SELECT COUNT(*) FROM ledger_summary")
+        return cursor.fetchone()[0]
+
+    return _execute_write(work, tables=["ledger_summary"])
+
+
+def reconcile_ledger():
+    """
+    Verify ledger_summary against totals computed from the raw payments table.
+
+    Returns a DataFrame of mismatches (scope, scope_id, column, stored,
+    expected); empty when the ledger is consistent.
+    """
+    with _connection() as conn:
+        raw = pd.read_sql_query(_LEDGER_CONTRACT_SELECT.format(where="1"), conn)
+        stored = pd.read_sql_query("SELECT * FROM ledger_summary", conn)
+        client_ids = pd.read_sql_query("SELECT id FROM clients", conn)["id"]
+    raw.columns = list(_LEDGER_COLUMNS)
+    figures = list(_LEDGER_COLUMNS[4:])
+
+    active = raw[raw["active"] == 1]
+    clients = (
+        active.groupby("client_id")[figures].sum()
+        .reindex(client_ids, fill_value=0)
+        .rename_axis("scope_id").reset_index()
+    )
+    clients["scope"] = "client"
+    totals = pd.DataFrame([dict(active[figures].sum(), scope="global", scope_id=0)])
+    expected = pd.concat([raw, clients, totals], ignore_index=True)
+
+    merged = expected.merge(
+        stored, on=["scope", "scope_id"], how="outer",
+        suffixes=("_expected", "_stored"), indicator=True,
+    )
+    mismatches = []
+    for _, row in merged.iterrows():
+        for col in figures:
+            exp, got = row[f"{col}_expected"], row[f"{col}_stored"]
+            if row["_merge"] != "both" or not _stats_equal(float(exp), float(got)):
+                mismatches.append({
+                    "scope": row["scope"], "scope_id": row["scope_id"],
+                    "column": col, "stored": got, "expected": exp,
+                })
+    return pd.DataFrame(
+        mismatches, columns=["scope", "scope_id", "column", "stored", "expected"]
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="TTS Guard database maintenance")
+    parser.add_argument("command", choices=[
+        "migrate", "check-stats", "rebuild-stats", "reconcile-ledger", "rebuild-ledger",
+    ])
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        init_db()
+        print(f"Schema at version {get_schema_version()}")
+    elif args.command == "check-stats":
+        problems = check_building_stats()
+        if len(problems):
+            print(problems.to_string(index=False))
+            raise SystemExit(1)
+        print("building_stats is consistent")
+    elif args.command == "rebuild-stats":
+        print(f"Rebuilt building_stats for {rebuild_building_stats()} buildings")
+    elif args.command == "reconcile-ledger":
+        problems = reconcile_ledger()
+        if len(problems):
+            print(problems.to_string(index=False))
+            raise SystemExit(1)
+        print("ledger_summary matches the payments table")
+    elif args.command == "rebuild-ledger":
+        print(f"Rebuilt ledger_summary ({rebuild_ledger()} rows)")
@@ -1,22 +1,19 @@
 """
 TTS Guard — Dashboard Page
 Key metrics, alert banner, financial health, upcoming inspections,
-recent complaints, and client overview with interactive charts.
+recent complaints, and client overview with interactive charts. Every
+figure comes from one consistent dashboard snapshot, precomputed in the
+background (see precompute.py).
 """
 
 import streamlit as st
+import pandas as pd
 import plotly.graph_objects as go
-from database import (
-    get_active_contracts_count,
-    get_overdue_inspections,
-    get_upcoming_inspections,
-    get_completed_this_month,
-    get_recent_complaints,
-    get_client_summary,
-    get_financial_summary,
-)
+from precompute import load_snapshot
+from profiler import start_profile
 from theme import get_colors, inject_css, plotly_layout
 
+profile = start_profile("Dashboard", "Theme & header")
 c = get_colors()
 inject_css()
 
@@ -28,13 +25,13 @@ st.markdown(
 # ---------------------------------------------------------------------------
 # TOP ROW — 4 Inspection Metric Cards
 # ---------------------------------------------------------------------------
-contracts_count = get_active_contracts_count()
-overdue_df = get_overdue_inspections()
-overdue_count = len(overdue_df)
-upcoming_df = get_upcoming_inspections(14)
-upcoming_count = len(upcoming_df)
-completed_df = get_completed_this_month()
-completed_count = len(completed_df)
+profile.mark("Metric cards")
+snapshot, computed_at = load_snapshot("dashboard")
+st.caption(f"Figures computed at {computed_at.replace('T', ' ')}")
+contracts_count = snapshot.active_contracts
+overdue_count = snapshot.overdue_count
+upcoming_count = snapshot.due_soon_count
+completed_count = snapshot.completed_this_month
 
 col1, col2, col3, col4 = st.columns(4)
 with col1:
@@ -54,6 +51,7 @@ with col4:
 # ---------------------------------------------------------------------------
 # ALERT BANNER
 # ---------------------------------------------------------------------------
+profile.mark("Alert banner")
 if overdue_count > 0:
     st.error(
         f"⚠️ **{overdue_count} inspection{'s' if overdue_count > 1 else ''} overdue** "
@@ -63,6 +61,7 @@ if overdue_count > 0:
 # ---------------------------------------------------------------------------
 # INSPECTION STATUS DISTRIBUTION (stacked horizontal bar)
 # ---------------------------------------------------------------------------
+profile.mark("Status distribution")
 ok_count = max(contracts_count - overdue_count - upcoming_count, 0)
 
 fig_status = go.Figure()
@@ -105,9 +104,10 @@ st.divider()
 # ---------------------------------------------------------------------------
 # FINANCIAL HEALTH SECTION
 # ---------------------------------------------------------------------------
+profile.mark("Financial health")
 st.subheader("💰 Financial Health")
 
-financials = get_financial_summary()
+financials = snapshot.financials
 
 fcol1, fcol2, fcol3, fcol4 = st.columns(4)
 with fcol1:
@@ -170,49 +170,48 @@ st.divider()
 # ---------------------------------------------------------------------------
 # TWO COLUMNS: Upcoming Inspections + Recent Complaints
 # ---------------------------------------------------------------------------
+profile.mark("Upcoming & complaints")
 left, right = st.columns(2)
 
 with left:
     st.subheader("📅 Upcoming Inspections")
-    if len(upcoming_df) > 0:
-        display_df = upcoming_df[
+    if snapshot.upcoming:
+        display_df = pd.DataFrame(snapshot.upcoming)[
             ["building_name", "client_name", "area", "days_until_next"]
-        ].copy()
+        ]
         display_df.columns = ["Building", "Client", "Area", "Days Remaining"]
-        display_df = display_df.sort_values("Days Remaining")
         st.dataframe(display_df, use_container_width=True, hide_index=True)
     else:
         st.success("No inspections due within 14 days.")
 
 with right:
     st.subheader("🎫 Recent Complaints")
-    complaints_df = get_recent_complaints(5)
-    if len(complaints_df) > 0:
+    if snapshot.recent_complaints:
         priority_border_map = {
             "high": c["STATUS_RED"],
             "medium": c["CHART_PRIMARY"],
             "low": c["CHART_SECONDARY"],
         }
-        for _, comp in complaints_df.iterrows():
+        for comp in snapshot.recent_complaints:
             priority_emoji = {
                 "high": "🔴",
                 "medium": "🟡",
                 "low": "🟢",
-            }.get(comp["priority"], "⚪")
-            border_color = priority_border_map.get(comp["priority"], c["BORDER"])
+            }.get(comp.priority, "⚪")
+            border_color = priority_border_map.get(comp.priority, c["BORDER"])
 
             with st.container(border=True):
                 st.markdown(
                     f'<div style="border-left: 4px solid {border_color}; padding-left: 8px; color: {c["TEXT"]};">'
-                    f"<strong>{comp['ticket_number']}</strong> {priority_emoji} "
-                    f"<code>{comp['priority'].upper()}</code>"
+                    f"<strong>{comp.ticket_number}</strong> {priority_emoji} "
+                    f"<code>{comp.priority.upper()}</code>"
                     f"</div>",
                     unsafe_allow_html=True,
                 )
-                st.markdown(f"{comp['message']}")
+                st.markdown(f"{comp.message}")
                 st.caption(
-                    f"{comp['client_name']} — {comp['building_name']} · "
-                    f"{comp['status'].replace('_', ' ').title()} · {comp['created_at']}"
+                    f"{comp.client_name} — {comp.building_name} · "
+                    f"{comp.status.replace('_', ' ').title()} · {comp.created_at}"
                 )
     else:
         st.info("No recent complaints.")
@@ -222,13 +221,16 @@ st.divider()
 # ---------------------------------------------------------------------------
 # CLIENT OVERVIEW TABLE
 # ---------------------------------------------------------------------------
+profile.mark("Client overview")
 st.subheader("👥 Client Overview")
 
-client_summary = get_client_summary()
-if len(client_summary) > 0:
-    display_cs = client_summary[
-        ["Client", "Buildings", "Equipment", "Annual Value (AED)", "overdue_count"]
-    ].copy()
+if snapshot.clients:
+    display_cs = pd.DataFrame(snapshot.clients)[
+        ["name", "buildings", "equipment", "annual_value", "overdue_count"]
+    ]
+    display_cs.columns = [
+        "Client", "Buildings", "Equipment", "Annual Value (AED)", "overdue_count",
+    ]
 
     # Format status column
     display_cs["Status"] = display_cs["overdue_count"].apply(
@@ -239,3 +241,5 @@ if len(client_summary) > 0:
     )
     display_cs = display_cs.drop(columns=["overdue_count"])
     st.dataframe(display_cs, use_container_width=True, hide_index=True)
+
+profile.finish()
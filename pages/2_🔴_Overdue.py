@@ -1,19 +1,35 @@
 """
 TTS Guard — Overdue Inspections Page
-Lists overdue buildings with scheduling capability (date + technician).
+Lists overdue buildings with scheduling capability (date + technician),
+filtered, sorted and paginated in the database. Bulk mode schedules every
+selected building on the page in one submit; the weekly planner proposes
+balanced, area-clustered technician routes (see scheduler.py). Missed
+visits (scheduled date passed, no inspection) can be rescheduled or
+cancelled.
 """
 
 import streamlit as st
 import plotly.graph_objects as go
 from datetime import date, timedelta
 from database import (
-    get_overdue_inspections,
+    cancel_scheduled_inspection,
+    get_past_due_schedules,
+    get_overdue_breakdown,
+    get_overdue_page,
     schedule_inspection,
-    is_building_scheduled,
+    schedule_inspections,
+    reschedule_inspection,
+    OVERDUE_SEVERITIES,
     TECHNICIANS,
 )
+from scheduler import load_candidates, plan_week, working_days
 from theme import get_colors, inject_css, plotly_layout
 
+PAGE_SIZE = 20
+BULK_PAGE_SIZE = 100
+SEVERITY_LABELS = {"critical": "🔴 Critical (30+ days)", "high": "🟠 High (15–29 days)",
+                   "moderate": "🟡 Moderate (< 15 days)"}
+
 c = get_colors()
 inject_css()
 
@@ -22,8 +38,57 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-overdue_df = get_overdue_inspections()
-overdue_count = len(overdue_df)
+# Outcome of the last bulk submit (set before its rerun)
+bulk_result = st.session_state.pop("bulk_schedule_result", None)
+if bulk_result:
+    st.success(
+        f"✅ Scheduled {bulk_result['scheduled']} inspection"
+        f"{'s' if bulk_result['scheduled'] != 1 else ''}"
+    )
+    if bulk_result["rejected"]:
+        st.warning("Not scheduled: " + ", ".join(bulk_result["rejected"]))
+
+# ---------------------------------------------------------------------------
+# MISSED VISITS (scheduled date passed without an inspection)
+# ---------------------------------------------------------------------------
+def reschedule_missed(schedule_id):
+    reschedule_inspection(schedule_id, st.session_state[f"missed_date_{schedule_id}"].isoformat())
+
+
+past_due_df = get_past_due_schedules()
+if not past_due_df.empty:
+    missed = len(past_due_df)
+    with st.expander(
+        f"⏰ {missed} missed visit{'s' if missed > 1 else ''} — "
+        "scheduled date passed without an inspection",
+        expanded=True,
+    ):
+        for row in past_due_df.itertuples():
+            m_col1, m_col2, m_col3, m_col4 = st.columns([3, 2, 1, 1])
+            with m_col1:
+                st.markdown(
+                    f"**{row.building_name}** · {row.client_name}  \n"
+                    f"{row.scheduled_date} · {row.assigned_technician} · "
+                    f"{row.days_past_due} day{'s' if row.days_past_due != 1 else ''} ago"
+                )
+            with m_col2:
+                st.date_input(
+                    "New date", value=date.today() + timedelta(days=1),
+                    min_value=date.today(), key=f"missed_date_{row.id}",
+                    label_visibility="collapsed",
+                )
+            with m_col3:
+                st.button("📅 Reschedule", key=f"missed_reschedule_{row.id}",
+                          use_container_width=True,
+                          on_click=reschedule_missed, args=(row.id,))
+            with m_col4:
+                st.button("✖ Cancel", key=f"missed_cancel_{row.id}",
+                          use_container_width=True,
+                          help="Release the building back to the overdue list",
+                          on_click=cancel_scheduled_inspection, args=(row.id,))
+
+breakdown_df = get_overdue_breakdown()
+overdue_count = int(breakdown_df["buildings"].sum())
 
 if overdue_count == 0:
     st.success("✅ No overdue inspections! All buildings are up to date.")
@@ -36,14 +101,223 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
+# ---------------------------------------------------------------------------
+# SEVERITY OVERVIEW (one chart for the whole portfolio)
+# ---------------------------------------------------------------------------
+# Same bands and hues as the former per-building severity gauges
+severity_colors = {
+    "critical": "rgb(255,68,68)",
+    "high": "rgb(255,140,58)",
+    "moderate": "rgb(255,102,0)",
+}
+by_client = (
+    breakdown_df.pivot_table(index="client_name", columns="severity",
+                             values="buildings", aggfunc="sum", fill_value=0)
+    .reindex(columns=list(OVERDUE_SEVERITIES), fill_value=0)
+)
+fig_overview = go.Figure(data=[
+    go.Bar(
+        y=by_client.index,
+        x=by_client[severity],
+        name=SEVERITY_LABELS[severity],
+        orientation="h",
+        marker_color=severity_colors[severity],
+        hovertemplate="<b>%{y}</b><br>%{x} buildings<extra></extra>",
+    )
+    for severity in OVERDUE_SEVERITIES
+])
+fig_overview.update_layout(**plotly_layout(
+    height=max(160, 36 * len(by_client) + 80),
+    barmode="stack",
+    xaxis_title="Overdue buildings",
+    yaxis_title="",
+))
+st.plotly_chart(fig_overview, use_container_width=True)
+
+# ---------------------------------------------------------------------------
+# WEEKLY PLANNER
+# ---------------------------------------------------------------------------
+def apply_week_plan():
+    outcome = st.session_state.week_plan.commit()
+    st.session_state.week_plan = None
+    st.session_state.bulk_schedule_result = {
+        "scheduled": len(outcome["scheduled"]),
+        "rejected": [f"building {r['building_id']} ({r['reason']})" for r in outcome["rejected"]],
+    }
+
+
+with st.expander("🧭 Plan the Week", expanded=st.session_state.get("week_plan") is not None):
+    w_col1, w_col2, w_col3 = st.columns([1, 2, 1])
+    with w_col1:
+        plan_start = st.date_input(
+            "Week starting", value=working_days(date.today() + timedelta(days=1), 1)[0],
+            min_value=date.today(), key="plan_start",
+        )
+    with w_col2:
+        plan_techs = st.multiselect("Technicians", TECHNICIANS, default=TECHNICIANS,
+                                    key="plan_techs")
+    with w_col3:
+        plan_horizon = st.number_input("Include due within (days)", 0, 60, 7,
+                                       key="plan_horizon")
+
+    if st.button("🧭 Generate Plan", use_container_width=True, disabled=not plan_techs):
+        st.session_state.week_plan = plan_week(
+            load_candidates(horizon_days=int(plan_horizon)),
+            technicians=plan_techs, start=plan_start,
+        )
+
+    week_plan = st.session_state.get("week_plan")
+    if week_plan is not None:
+        stats = week_plan.stats
+        m_col1, m_col2, m_col3, m_col4 = st.columns(4)
+        m_col1.metric("Planned visits", stats["planned"])
+        m_col2.metric("Left for later", stats["unplanned"])
+        m_col3.metric("Travel", f"{stats['travel_minutes'] / 60:.1f} h")
+        m_col4.metric("Workload spread", f"{stats['load_spread_minutes'] / 60:.1f} h")
+
+        workload = week_plan.workload() / 60
+        fig_workload = go.Figure(data=go.Heatmap(
+            z=workload.to_numpy(),
+            x=[d.strftime("%a %d %b") for d in workload.columns],
+            y=workload.index,
+            colorscale=[[0, c["BG2"]], [1, c["HEADER_TAIL"]]],
+            zmin=0, zmax=8,
+            hovertemplate="<b>%{y}</b> · %{x}<br>%{z:.1f} h<extra></extra>",
+        ))
+        fig_workload.update_layout(**plotly_layout(
+            height=max(180, 40 * len(workload) + 80), xaxis_title="", yaxis_title="",
+        ))
+        st.plotly_chart(fig_workload, use_container_width=True)
+
+        st.dataframe(
+            week_plan.visits[[
+                "scheduled_date", "technician", "stop", "building_name",
+                "client_name", "area", "equipment_count", "days_overdue", "minutes",
+            ]],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "scheduled_date": st.column_config.DateColumn("Date", format="ddd DD MMM"),
+                "technician": "Technician",
+                "stop": "Stop",
+                "building_name": "Building",
+                "client_name": "Client",
+                "area": "Area",
+                "equipment_count": "Equipment",
+                "days_overdue": "Days overdue",
+                "minutes": "Minutes (incl. travel)",
+            },
+        )
+        st.button("✅ Schedule This Plan", type="primary", use_container_width=True,
+                  disabled=week_plan.visits.empty, on_click=apply_week_plan)
+
+# ---------------------------------------------------------------------------
+# FILTERS, SORT & PAGINATION (applied in SQL)
+# ---------------------------------------------------------------------------
+def reset_page():
+    st.session_state.overdue_page = 1
+
+
+client_names = (
+    breakdown_df.drop_duplicates("client_id")
+    .set_index("client_id")["client_name"].sort_values()
+)
+f_col1, f_col2, f_col3, f_col4 = st.columns(4)
+with f_col1:
+    client_filter = st.selectbox(
+        "Client", [None] + client_names.index.tolist(),
+        format_func=lambda cid: "All clients" if cid is None else client_names[cid],
+        on_change=reset_page,
+    )
+with f_col2:
+    area_filter = st.selectbox(
+        "Area", [None] + sorted(breakdown_df["area"].dropna().unique().tolist()),
+        format_func=lambda a: "All areas" if a is None else a,
+        on_change=reset_page,
+    )
+with f_col3:
+    severity_filter = st.selectbox(
+        "Severity", [None] + list(OVERDUE_SEVERITIES),
+        format_func=lambda sv: "All severities" if sv is None else SEVERITY_LABELS[sv],
+        on_change=reset_page,
+    )
+with f_col4:
+    sort_labels = {
+        "most_overdue": "Most overdue", "least_overdue": "Least overdue",
+        "annual_value": "Contract value", "equipment": "Equipment count",
+        "building": "Building name",
+    }
+    sort_key = st.selectbox(
+        "Sort by", list(sort_labels), format_func=sort_labels.get, on_change=reset_page,
+    )
+
+bulk_mode = st.toggle(
+    "🗂️ Bulk scheduling", key="bulk_mode", on_change=reset_page,
+    help="Select several buildings on the page and schedule them in one submit",
+)
+page_size = BULK_PAGE_SIZE if bulk_mode else PAGE_SIZE
+
+if "overdue_page" not in st.session_state:
+    reset_page()
+
+result = get_overdue_page(
+    client_id=client_filter,
+    area=area_filter,
+    severity=severity_filter,
+    sort=sort_key,
+    page=st.session_state.overdue_page,
+    page_size=page_size,
+)
+if result["page"] > result["pages"]:
+    # The list shrank (e.g. buildings were scheduled); show its last page
+    st.session_state.overdue_page = result["pages"]
+    result = get_overdue_page(
+        client_id=client_filter, area=area_filter, severity=severity_filter,
+        sort=sort_key, page=result["pages"], page_size=page_size,
+    )
+overdue_df = result["rows"]
+
+
+def change_page(delta):
+    st.session_state.overdue_page += delta
+
+
 st.divider()
 
-for idx, row in overdue_df.iterrows():
+
+def open_schedule(building_id):
+    st.session_state[f"schedule_{building_id}"] = True
+
+
+def cancel_schedule(building_id):
+    st.session_state[f"schedule_{building_id}"] = False
+
+
+def confirm_schedule(building_id, building_name):
+    sched_date = st.session_state[f"date_{building_id}"]
+    sched_tech = st.session_state[f"tech_{building_id}"]
+    st.session_state[f"schedule_{building_id}"] = False
+    if schedule_inspection(building_id, sched_date.isoformat(), sched_tech):
+        st.session_state[f"scheduled_{building_id}"] = (
+            f"✅ {building_name} scheduled for "
+            f"{sched_date.strftime('%B %d, %Y')} — "
+            f"Assigned to {sched_tech}"
+        )
+    else:
+        st.session_state[f"scheduled_{building_id}"] = (
+            f"ℹ️ {building_name} already has a scheduled inspection"
+        )
+
+
+@st.fragment
+def building_card(row):
+    """One overdue building. Its widgets rerun only this card."""
     building_id = row["building_id"]
 
-    # Check if already scheduled
-    if is_building_scheduled(building_id):
-        continue
+    scheduled_msg = st.session_state.get(f"scheduled_{building_id}")
+    if scheduled_msg:
+        st.success(scheduled_msg)
+        return
 
     with st.container(border=True):
         top_left, top_right = st.columns([3, 1])
@@ -59,32 +333,15 @@ for idx, row in overdue_df.iterrows():
             )
 
         with top_right:
-            days_overdue = max(
-                int(row["days_since_last"]) - int(365 / row["visits_per_year"]),
-                0,
+            days_overdue = int(row["days_overdue"])
+            st.markdown(
+                f'<p style="margin: 0.6rem 0 0.2rem 0; font-weight: 700; '
+                f'color: {severity_colors[row["severity"]]};">'
+                f'{days_overdue} days overdue</p>',
+                unsafe_allow_html=True,
             )
-            # Severity gauge
-            fig_gauge = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=days_overdue,
-                number={"suffix": " days", "font": {"color": c["STATUS_RED"], "size": 22}},
-                gauge={
-                    "axis": {"range": [0, 60], "tickcolor": c["TEXT_MUTED"], "tickfont": {"size": 9}},
-                    "bar": {"color": c["STATUS_RED"]},
-                    "bgcolor": c["BORDER"],
-                    "steps": [
-                        {"range": [0, 15], "color": "rgba(255,102,0,0.2)"},
-                        {"range": [15, 30], "color": "rgba(255,140,58,0.2)"},
-                        {"range": [30, 60], "color": "rgba(255,68,68,0.2)"},
-                    ],
-                },
-                title={"text": "Severity", "font": {"color": c["TEXT_MUTED"], "size": 11}},
-            ))
-            fig_gauge.update_layout(**plotly_layout(
-                height=160,
-                margin={"l": 15, "r": 15, "t": 30, "b": 0},
-            ))
-            st.plotly_chart(fig_gauge, use_container_width=True, key=f"gauge_{building_id}")
+            st.progress(min(days_overdue / 60, 1.0),
+                        text=SEVERITY_LABELS[row["severity"]])
 
         # Last inspection info
         if row["last_inspection_date"]:
@@ -98,26 +355,26 @@ for idx, row in overdue_df.iterrows():
             st.session_state[schedule_key] = False
 
         if not st.session_state[schedule_key]:
-            if st.button(
+            st.button(
                 "📅 Mark as Scheduled",
                 key=f"btn_schedule_{building_id}",
                 use_container_width=True,
-            ):
-                st.session_state[schedule_key] = True
-                st.rerun()
+                on_click=open_schedule,
+                args=(building_id,),
+            )
         else:
             st.markdown("---")
             st.markdown("**Schedule Inspection**")
             s_col1, s_col2 = st.columns(2)
             with s_col1:
-                sched_date = st.date_input(
+                st.date_input(
                     "Inspection Date",
                     value=date.today() + timedelta(days=2),
                     min_value=date.today(),
                     key=f"date_{building_id}",
                 )
             with s_col2:
-                sched_tech = st.selectbox(
+                st.selectbox(
                     "Assign Technician",
                     TECHNICIANS,
                     key=f"tech_{building_id}",
@@ -125,28 +382,111 @@ for idx, row in overdue_df.iterrows():
 
             sc1, sc2 = st.columns(2)
             with sc1:
-                if st.button(
+                st.button(
                     "✅ Confirm Schedule",
                     key=f"confirm_{building_id}",
                     use_container_width=True,
-                ):
-                    schedule_inspection(
-                        building_id,
-                        sched_date.isoformat(),
-                        sched_tech,
-                    )
-                    st.session_state[schedule_key] = False
-                    st.success(
-                        f"✅ {row['building_name']} scheduled for "
-                        f"{sched_date.strftime('%B %d, %Y')} — "
-                        f"Assigned to {sched_tech}"
-                    )
-                    st.rerun()
+                    on_click=confirm_schedule,
+                    args=(building_id, row["building_name"]),
+                )
             with sc2:
-                if st.button(
+                st.button(
                     "❌ Cancel",
                     key=f"cancel_{building_id}",
                     use_container_width=True,
-                ):
-                    st.session_state[schedule_key] = False
-                    st.rerun()
+                    on_click=cancel_schedule,
+                    args=(building_id,),
+                )
+
+
+st.caption(
+    f"Showing {len(overdue_df)} of {result['total']} matching buildings · "
+    f"page {result['page']} of {result['pages']}"
+)
+
+
+def bulk_schedule_form(overdue_df):
+    """Editable table of the page; one submit schedules every selected row."""
+    default_date = date.today() + timedelta(days=2)
+    editor_df = overdue_df[[
+        "building_id", "building_name", "client_name", "area", "days_overdue",
+    ]].copy()
+    editor_df.insert(0, "select", False)
+    editor_df["scheduled_date"] = default_date
+    # Spread the default assignments across the team
+    editor_df["technician"] = [
+        TECHNICIANS[i % len(TECHNICIANS)] for i in range(len(editor_df))
+    ]
+
+    with st.form("bulk_schedule"):
+        select_all = st.checkbox("Select every building on this page")
+        edited_df = st.data_editor(
+            editor_df,
+            hide_index=True,
+            use_container_width=True,
+            disabled=["building_id", "building_name", "client_name", "area", "days_overdue"],
+            column_config={
+                "select": st.column_config.CheckboxColumn("Schedule", width="small"),
+                "building_id": None,
+                "building_name": "Building",
+                "client_name": "Client",
+                "area": "Area",
+                "days_overdue": st.column_config.NumberColumn("Days overdue"),
+                "scheduled_date": st.column_config.DateColumn(
+                    "Inspection Date", min_value=date.today(), required=True,
+                ),
+                "technician": st.column_config.SelectboxColumn(
+                    "Technician", options=TECHNICIANS, required=True,
+                ),
+            },
+            key=f"bulk_editor_{st.session_state.overdue_page}",
+        )
+        submitted = st.form_submit_button(
+            "📅 Schedule Selected", type="primary", use_container_width=True,
+        )
+
+    if not submitted:
+        return
+    chosen = edited_df if select_all else edited_df[edited_df["select"]]
+    if chosen.empty:
+        st.warning("Select at least one building to schedule.")
+        return
+    outcome = schedule_inspections(
+        (row.building_id, row.scheduled_date.isoformat(), row.technician)
+        for row in chosen.itertuples()
+    )
+    names = dict(zip(overdue_df["building_id"], overdue_df["building_name"]))
+    st.session_state.bulk_schedule_result = {
+        "scheduled": len(outcome["scheduled"]),
+        "rejected": [
+            f"{names.get(r['building_id'], r['building_id'])} ({r['reason']})"
+            for r in outcome["rejected"]
+        ],
+    }
+    st.rerun()
+
+
+if bulk_mode:
+    bulk_schedule_form(overdue_df)
+else:
+    for _, row in overdue_df.iterrows():
+        # A full rerun lists only buildings with no pending schedule, so a
+        # confirmation left over from an earlier schedule (since cancelled
+        # or completed) is stale; it only shows on the card's own rerun.
+        st.session_state.pop(f"scheduled_{row['building_id']}", None)
+        building_card(row)
+
+if result["pages"] > 1:
+    p_col1, p_col2, p_col3 = st.columns([1, 2, 1])
+    with p_col1:
+        st.button("◀ Previous", disabled=result["page"] <= 1,
+                  on_click=change_page, args=(-1,), use_container_width=True)
+    with p_col2:
+        st.markdown(
+            f'<p style="text-align: center; margin-top: 0.5rem;">'
+            f'Page {result["page"]} of {result["pages"]}</p>',
+            unsafe_allow_html=True,
+        )
+    with p_col3:
+        st.button("Next ▶", disabled=result["page"] >= result["pages"],
+                  on_click=change_page, args=(1,), use_container_width=True)
@@ -9,13 +9,13 @@ from datetime import date
 from database import (
     get_all_buildings,
     get_building_details,
-    get_equipment_by_building,
-    get_equipment_grouped_by_type,
+    get_inspection_report_data,
     insert_inspection,
     insert_complaint,
     TECHNICIANS,
 )
-from pdf_report import generate_inspection_pdf
+from checklist import Checklist
+from report_store import render_report, store_report
 from theme import get_colors, inject_css, plotly_layout
 
 c = get_colors()
@@ -63,93 +63,96 @@ st.divider()
 st.subheader("🔍 Equipment Checklist")
 st.caption(f"**{building['name']}** — {building['equipment_count']} items")
 
-equipment_df = get_equipment_by_building(building_id)
-grouped_df = get_equipment_grouped_by_type(building_id)
-
-# Track pass/fail per item using session state
-if "equip_status" not in st.session_state or st.session_state.get("equip_building_id") != building_id:
-    st.session_state.equip_status = {
-        str(eid): True for eid in equipment_df["id"].tolist()
-    }
-    st.session_state.equip_building_id = building_id
-
-equip_status = st.session_state.equip_status
-
-# Dynamic counter
-total = len(equipment_df)
-passed = sum(1 for v in equip_status.values() if v)
-failed = total - passed
-
-pcol1, pcol2, pcol3 = st.columns(3)
-with pcol1:
-    st.metric("Total Items", total)
-with pcol2:
-    st.metric("✅ Passed", passed)
-with pcol3:
-    st.metric("⚠️ Failed", failed, delta_color="inverse" if failed > 0 else "off")
-
-# Pass rate gauge (updates in real-time as checkboxes toggle)
-pass_rate = (passed / total * 100) if total > 0 else 100
-gauge_color = c["CHART_SECONDARY"] if pass_rate >= 80 else (
-    c["CHART_PRIMARY"] if pass_rate >= 50 else c["STATUS_RED"]
-)
+# Track pass/fail per item using session state; rebuilt only when the
+# building (or its equipment list) changes.
+checklist = st.session_state.get("checklist")
+if (
+    checklist is None
+    or checklist.building_id != building_id
+    or len(checklist) != building["equipment_count"]
+):
+    checklist = Checklist.for_building(building_id)
+    st.session_state.checklist = checklist
+
+
+def toggle_item(eid):
+    """Checkbox callback: apply the toggle before the fragment re-renders."""
+    checklist.set(eid, st.session_state[f"eq_{eid}"])
+
+
+@st.fragment
+def checklist_panel():
+    """Counters, pass-rate gauge and checklist. A checkbox toggle reruns only this."""
+    # Dynamic counter
+    total = len(checklist)
+    passed = checklist.passed
+    failed = checklist.failed
+
+    pcol1, pcol2, pcol3 = st.columns(3)
+    with pcol1:
+        st.metric("Total Items", total)
+    with pcol2:
+        st.metric("✅ Passed", passed)
+    with pcol3:
+        st.metric("⚠️ Failed", failed, delta_color="inverse" if failed > 0 else "off")
+
+    # Pass rate gauge (updates in real-time as checkboxes toggle)
+    pass_rate = (passed / total * 100) if total > 0 else 100
+    gauge_color = c["CHART_SECONDARY"] if pass_rate >= 80 else (
+        c["CHART_PRIMARY"] if pass_rate >= 50 else c["STATUS_RED"]
+    )
 
-fig_gauge = go.Figure(go.Indicator(
-    mode="gauge+number",
-    value=pass_rate,
-    number={"suffix": "%", "font": {"color": gauge_color, "size": 36}},
-    gauge={
-        "axis": {"range": [0, 100], "tickcolor": c["TEXT_MUTED"]},
-        "bar": {"color": gauge_color},
-        "bgcolor": c["BORDER"],
-        "steps": [
-            {"range": [0, 50], "color": "rgba(255,68,68,0.15)"},
-            {"range": [50, 80], "color": "rgba(255,102,0,0.15)"},
-            {"range": [80, 100], "color": "rgba(52,211,153,0.15)"},
-        ],
-        "threshold": {
-            "line": {"color": c["STATUS_RED"], "width": 2},
-            "thickness": 0.75,
-            "value": 80,
+    fig_gauge = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=pass_rate,
+        number={"suffix": "%", "font": {"color": gauge_color, "size": 36}},
+        gauge={
+            "axis": {"range": [0, 100], "tickcolor": c["TEXT_MUTED"]},
+            "bar": {"color": gauge_color},
+            "bgcolor": c["BORDER"],
+            "steps": [
+                {"range": [0, 50], "color": "rgba(255,68,68,0.15)"},
+                {"range": [50, 80], "color": "rgba(255,102,0,0.15)"},
+                {"range": [80, 100], "color": "rgba(52,211,153,0.15)"},
+            ],
+            "threshold": {
+                "line": {"color": c["STATUS_RED"], "width": 2},
+                "thickness": 0.75,
+                "value": 80,
+            },
         },
-    },
-    title={"text": "Pass Rate", "font": {"color": c["TEXT_MUTED"], "size": 14}},
-))
-fig_gauge.update_layout(**plotly_layout(
-    height=220,
-    margin={"l": 30, "r": 30, "t": 40, "b": 0},
-))
-st.plotly_chart(fig_gauge, use_container_width=True)
-
-st.markdown("---")
-
-# Grouped equipment with expanders
-for _, group in grouped_df.iterrows():
-    eq_type = group["type"]
-    count = group["count"]
-    item_ids = group["item_ids"].split(",")
-
-    # Count passed in this group
-    group_passed = sum(1 for eid in item_ids if equip_status.get(eid, True))
-    group_failed = count - group_passed
-
-    status_badge = "✅" if group_failed == 0 else f"⚠️ {group_failed} failed"
-
-    with st.expander(f"{eq_type} ({count} items) — {status_badge}"):
-        for eid in item_ids:
-            equip_row = equipment_df[equipment_df["id"] == int(eid)].iloc[0]
-            equip_status[eid] = st.checkbox(
-                f"{eq_type} #{eid}",
-                value=equip_status.get(eid, True),
-                key=f"eq_{eid}",
-            )
-
-# Update session state
-st.session_state.equip_status = equip_status
-
-# Recalculate after checkboxes
-passed = sum(1 for v in equip_status.values() if v)
-failed = total - passed
+        title={"text": "Pass Rate", "font": {"color": c["TEXT_MUTED"], "size": 14}},
+    ))
+    fig_gauge.update_layout(**plotly_layout(
+        height=220,
+        margin={"l": 30, "r": 30, "t": 40, "b": 0},
+    ))
+    st.plotly_chart(fig_gauge, use_container_width=True)
+
+    st.markdown("---")
+
+    # Grouped equipment with expanders
+    for eq_type, item_ids in checklist.groups.items():
+        group_failed = checklist.group_failed(eq_type)
+        status_badge = "✅" if group_failed == 0 else f"⚠️ {group_failed} failed"
+
+        with st.expander(f"{eq_type} ({len(item_ids)} items) — {status_badge}"):
+            for eid in item_ids:
+                st.checkbox(
+                    f"{eq_type} #{eid}",
+                    value=checklist.results[eid],
+                    key=f"eq_{eid}",
+                    on_change=toggle_item,
+                    args=(eid,),
+                )
+
+
+checklist_panel()
+
+# Totals for the submission (full reruns only)
+total = len(checklist)
+passed = checklist.passed
+failed = checklist.failed
 
 st.divider()
 
@@ -171,6 +174,7 @@ if st.button("✅ Submit Inspection", use_container_width=True, type="primary"):
         items_passed=passed,
         items_failed=failed,
         notes=notes,
+        item_results=checklist.item_results(),
     )
 
     st.success(f"✅ Inspection for **{building['name']}** submitted successfully!")
@@ -197,30 +201,12 @@ if st.button("✅ Submit Inspection", use_container_width=True, type="primary"):
     # ---- PDF Report Download ----
     st.subheader("📄 Inspection Report")
 
-    # Build equipment details for PDF
-    equipment_details = []
-    for _, eq_row in equipment_df.iterrows():
-        eid = str(eq_row["id"])
-        status = "Passed" if equip_status.get(eid, True) else "Failed"
-        equipment_details.append({
-            "type": eq_row["type"],
-            "status": status,
-        })
+    # Build the report from the stored inspection so later downloads match it
+    report_payload = get_inspection_report_data(inspection_ids=[inspection_id])[0]
 
     try:
-        pdf_bytes = generate_inspection_pdf(
-            building_name=building["name"],
-            client_name=building["client_name"],
-            inspection_date=inspection_date.isoformat(),
-            technician=technician,
-            items_checked=total,
-            items_passed=passed,
-            items_failed=failed,
-            equipment_details=equipment_details,
-            notes=notes or "",
-        )
-
-        filename = f"TTS_Inspection_{building['name'].replace(' ', '_')}_{inspection_date.isoformat()}.pdf"
+        filename, pdf_bytes = render_report(report_payload)
+        store_report(report_payload, filename, pdf_bytes)
         st.download_button(
             label="📥 Download Inspection Report (PDF)",
             data=pdf_bytes,
@@ -230,7 +216,8 @@ if st.button("✅ Submit Inspection", use_container_width=True, type="primary"):
         )
     except Exception as e:
         st.error(f"⚠️ PDF generation failed: {e}")
-        st.caption("The inspection was saved successfully. PDF report can be regenerated later.")
+        st.caption("The inspection was saved successfully. PDF report can be regenerated "
+                   "later from Reports → Past Reports.")
 
     # ---- Create Complaint Ticket (if failures) ----
     if failed > 0:
@@ -238,18 +225,10 @@ if st.button("✅ Submit Inspection", use_container_width=True, type="primary"):
         st.subheader("🎫 Create Complaint Ticket")
         st.warning(f"⚠️ {failed} items failed inspection — create a follow-up ticket?")
 
-        # Build failure message
-        failed_items = []
-        for _, eq_row in equipment_df.iterrows():
-            eid = str(eq_row["id"])
-            if not equip_status.get(eid, True):
-                failed_items.append(eq_row["type"])
-
-        # Count by type
-        from collections import Counter
-        fail_counts = Counter(failed_items)
+        # Build failure message, counted by type
         fail_msg = "Failed items during inspection: " + ", ".join(
-            f"{count}x {etype}" for etype, count in fail_counts.items()
+            f"{checklist.group_failed(etype)}x {etype}"
+            for etype in checklist.groups if checklist.group_failed(etype)
         )
 
         complaint_msg = st.text_area(
@@ -10,7 +10,7 @@ from database import (
     get_all_clients,
     get_buildings_by_client,
     get_client_financial_detail,
-    get_overdue_inspections,
+    compute_building_status,
 )
 from theme import get_colors, inject_css, plotly_layout
 
@@ -23,7 +23,9 @@ st.markdown(
 )
 
 clients_df = get_all_clients()
-overdue_df = get_overdue_inspections()
+status_df = compute_building_status()
+status_by_building = status_df.set_index("building_id")
+overdue_ids = set(status_df.loc[status_df["status"] == "overdue", "building_id"])
 today = date.today()
 
 for _, client in clients_df.iterrows():
@@ -55,18 +57,16 @@ for _, client in clients_df.iterrows():
         if len(buildings_df) > 0:
             display_data = []
             for _, bld in buildings_df.iterrows():
-                # Check overdue status
-                is_overdue = len(
-                    overdue_df[overdue_df["building_id"] == bld["id"]]
-                ) > 0
-
                 # Compute status
-                if is_overdue:
+                if bld["id"] in overdue_ids:
                     status = "🔴 Overdue"
                 elif bld["last_inspection"]:
-                    days_since = (today - date.fromisoformat(bld["last_inspection"])).days
-                    interval = 365 / (bld["visits_per_year"] or 4)
-                    days_left = int(interval - days_since)
+                    if bld["id"] in status_by_building.index:
+                        days_left = int(status_by_building.at[bld["id"], "days_until_next"])
+                    else:
+                        days_since = (today - date.fromisoformat(bld["last_inspection"])).days
+                        interval = 365 / (bld["visits_per_year"] or 4)
+                        days_left = int(interval - days_since)
                     if days_left <= 14:
                         status = f"🟡 Due in {days_left}d"
                     else:
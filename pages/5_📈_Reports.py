@@ -1,6 +1,8 @@
 """
 TTS Guard — Reports Page
 Monthly compliance reports with interactive Plotly charts (6 months depth).
+Summary figures, charts and failure analytics are read from precomputed
+snapshots (see precompute.py); inspection listings are queried live.
 """
 
 import streamlit as st
@@ -9,9 +11,13 @@ import plotly.graph_objects as go
 from datetime import date
 from database import (
     get_inspections_by_month,
-    get_complaints_by_month,
     get_all_clients,
+    get_report_artifacts,
+    get_report_store_stats,
 )
+from precompute import load_snapshot, report_months
+from report_batch import generate_reports_zip
+from report_store import get_or_render_report
 from theme import get_colors, inject_css, plotly_layout
 
 c = get_colors()
@@ -25,15 +31,7 @@ st.markdown(
 # ---------------------------------------------------------------------------
 # MONTH SELECTOR (last 6 months)
 # ---------------------------------------------------------------------------
-today = date.today()
-month_options = []
-for i in range(6):
-    m = today.month - i
-    y = today.year
-    while m <= 0:
-        m += 12
-        y -= 1
-    month_options.append((y, m, date(y, m, 1).strftime("%B %Y")))
+month_options = report_months()
 
 selected_month = st.selectbox(
     "Select Month",
@@ -48,21 +46,23 @@ st.divider()
 # ---------------------------------------------------------------------------
 # DATA
 # ---------------------------------------------------------------------------
+report, computed_at = load_snapshot(f"monthly_report:{year}-{month:02d}")
 inspections_df = get_inspections_by_month(year, month)
-complaints_df = get_complaints_by_month(year, month)
+listed_inspections = len(inspections_df)   # live; the snapshot may lag behind
 
 # ---------------------------------------------------------------------------
 # SUMMARY METRICS
 # ---------------------------------------------------------------------------
 st.subheader(f"📊 Summary — {label}")
+st.caption(f"Computed at {computed_at.replace('T', ' ')}")
 
-total_inspections = len(inspections_df)
-total_equipment = int(inspections_df["items_checked"].sum()) if total_inspections > 0 else 0
-total_passed = int(inspections_df["items_passed"].sum()) if total_inspections > 0 else 0
+total_inspections = report["inspections"]
+total_equipment = report["equipment_checked"]
+total_passed = report["equipment_passed"]
 compliance_rate = (total_passed / total_equipment * 100) if total_equipment > 0 else 0
 
-total_complaints = len(complaints_df)
-resolved_complaints = len(complaints_df[complaints_df["status"] == "resolved"]) if total_complaints > 0 else 0
+total_complaints = report["complaints"]
+resolved_complaints = report["resolved_complaints"]
 
 col1, col2, col3, col4 = st.columns(4)
 with col1:
@@ -113,11 +113,7 @@ chart_left, chart_right = st.columns(2)
 with chart_left:
     st.subheader("Inspections by Client")
     if total_inspections > 0:
-        by_client = (
-            inspections_df.groupby("client_name")
-            .size()
-            .reset_index(name="Inspections")
-        )
+        by_client = report["by_client"]
         fig_client = go.Figure(data=[go.Bar(
             x=by_client["client_name"],
             y=by_client["Inspections"],
@@ -136,14 +132,7 @@ with chart_left:
 with chart_right:
     st.subheader("Complaints by Priority")
     if total_complaints > 0:
-        by_priority = (
-            complaints_df.groupby("priority")
-            .size()
-            .reset_index(name="Count")
-        )
-        priority_order = {"high": 0, "medium": 1, "low": 2}
-        by_priority["order"] = by_priority["priority"].map(priority_order)
-        by_priority = by_priority.sort_values("order").drop(columns=["order"])
+        by_priority = report["by_priority"]
 
         # Semantic colors per priority
         priority_colors = {
@@ -170,11 +159,101 @@ with chart_right:
 
 st.divider()
 
+# ---------------------------------------------------------------------------
+# EQUIPMENT FAILURE ANALYTICS (per-item results, 6 months)
+# ---------------------------------------------------------------------------
+st.subheader("🧯 Equipment Failure Analytics")
+
+failures, failures_computed_at = load_snapshot("failure_analytics")
+analytics_start = date.fromisoformat(failures["since"])
+
+if failures["checks"] > 0:
+    st.caption(
+        f"{failures['checks']:,} item checks since {analytics_start.strftime('%B %Y')} "
+        f"· computed at {failures_computed_at.replace('T', ' ')}."
+    )
+    fail_left, fail_right = st.columns(2)
+
+    with fail_left:
+        by_type = failures["by_type"]
+        fig_type = go.Figure(data=[go.Bar(
+            x=by_type["failure_rate"],
+            y=by_type["type"],
+            orientation="h",
+            marker_color=c["STATUS_RED"],
+            customdata=by_type[["failures", "checks"]],
+            hovertemplate="<b>%{y}</b><br>Failure rate: %{x:.1f}%"
+                          "<br>%{customdata[0]} of %{customdata[1]} checks<extra></extra>",
+        )])
+        fig_type.update_layout(**plotly_layout(
+            height=350,
+            title="Failure Rate by Equipment Type",
+            xaxis_title="Failure rate (%)",
+            yaxis_title="",
+        ))
+        st.plotly_chart(fig_type, use_container_width=True)
+
+    with fail_right:
+        rolling = failures["rolling_by_type"].set_index("month")
+        fig_rolling = go.Figure()
+        for i, eq_type in enumerate(rolling.columns):
+            fig_rolling.add_trace(go.Scatter(
+                x=rolling.index,
+                y=rolling[eq_type],
+                name=eq_type,
+                mode="lines+markers",
+                line={"color": c["CHART_SEQUENCE"][i % len(c["CHART_SEQUENCE"])]},
+                hovertemplate=f"<b>{eq_type}</b><br>%{{x}}: %{{y:.1f}}%<extra></extra>",
+            ))
+        fig_rolling.update_layout(**plotly_layout(
+            height=350,
+            title="3-Month Rolling Failure Rate",
+            xaxis_title="",
+            yaxis_title="Failure rate (%)",
+        ))
+        st.plotly_chart(fig_rolling, use_container_width=True)
+
+    dimension_labels = {
+        "client": "Client", "building": "Building", "area": "Area", "technician": "Technician",
+    }
+    dimension = st.selectbox(
+        "Failure rate by",
+        options=list(dimension_labels),
+        format_func=dimension_labels.get,
+    )
+    breakdown = failures["breakdowns"][dimension]
+    breakdown = breakdown.drop(columns=[dimension] if dimension in ("client", "building") else [])
+    breakdown = breakdown.rename(columns={
+        "client_name": "Client", "building_name": "Building", "area": "Area",
+        "technician": "Technician", "type": "Equipment Type", "checks": "Checks",
+        "failures": "Failures", "failure_rate": "Failure Rate (%)",
+    })
+    st.dataframe(breakdown, use_container_width=True, hide_index=True)
+
+    st.markdown("**Repeat failures** — units that failed at least twice")
+    repeats = failures["repeats"]
+    if len(repeats) > 0:
+        repeats = repeats[[
+            "equipment_id", "equipment_type", "building_name", "checks", "failures",
+            "current_streak", "longest_streak", "last_failure",
+        ]]
+        repeats.columns = [
+            "Unit #", "Equipment Type", "Building", "Checks", "Failures",
+            "Failing Streak", "Longest Streak", "Last Failure",
+        ]
+        st.dataframe(repeats, use_container_width=True, hide_index=True)
+    else:
+        st.success("No unit has failed more than once.")
+else:
+    st.info("No item-level inspection results recorded yet.")
+
+st.divider()
+
 # ---------------------------------------------------------------------------
 # INSPECTION DETAIL TABLE
 # ---------------------------------------------------------------------------
 st.subheader("Inspection Details")
-if total_inspections > 0:
+if listed_inspections > 0:
     detail_df = inspections_df[
         ["inspection_date", "client_name", "building_name", "technician",
          "items_checked", "items_passed", "items_failed"]
@@ -186,3 +265,99 @@ if total_inspections > 0:
     st.dataframe(detail_df, use_container_width=True, hide_index=True)
 else:
     st.info(f"No inspection data for {label}.")
+
+st.divider()
+
+# ---------------------------------------------------------------------------
+# BATCH PDF EXPORT
+# ---------------------------------------------------------------------------
+st.subheader("📦 Export Inspection Reports")
+st.caption(f"Regenerate the PDF report for every inspection in {label} as one ZIP archive.")
+
+if listed_inspections > 0:
+    if st.button(f"📄 Generate {listed_inspections} Reports", use_container_width=True):
+        progress_bar = st.progress(0.0, text="Rendering reports...")
+        batch = generate_reports_zip(
+            year=year,
+            month=month,
+            progress=lambda done, total: progress_bar.progress(
+                done / total, text=f"Rendered {done}/{total} reports"
+            ),
+        )
+        progress_bar.empty()
+        st.session_state.report_batch = (label, batch)
+
+    if st.session_state.get("report_batch", (None,))[0] == label:
+        batch = st.session_state.report_batch[1]
+        st.download_button(
+            label=f"📥 Download {batch['rendered']} Reports (ZIP)",
+            data=batch["zip"],
+            file_name=f"TTS_Inspection_Reports_{year}-{month:02d}.zip",
+            mime="application/zip",
+            use_container_width=True,
+        )
+        if batch["errors"]:
+            st.warning(f"⚠️ {len(batch['errors'])} reports failed to render.")
+            st.dataframe(batch["errors"], use_container_width=True, hide_index=True)
+else:
+    st.info(f"No inspections to export for {label}.")
+
+st.divider()
+
+# ---------------------------------------------------------------------------
+# PAST REPORTS (served from the report store when unchanged)
+# ---------------------------------------------------------------------------
+st.subheader("🗂️ Past Reports")
+
+if listed_inspections > 0:
+    report_options = inspections_df[["id", "inspection_date", "building_name"]].to_dict("records")
+    chosen = st.selectbox(
+        f"Inspection in {label}",
+        options=report_options,
+        format_func=lambda r: f"{r['inspection_date']} — {r['building_name']} (#{r['id']})",
+    )
+    if st.button("📄 Get Report", use_container_width=True):
+        try:
+            st.session_state.past_report = (chosen["id"], *get_or_render_report(chosen["id"]))
+        except Exception as e:
+            st.error(f"⚠️ PDF generation failed: {e}")
+
+    past = st.session_state.get("past_report")
+    if past and past[0] == chosen["id"]:
+        _, filename, pdf_bytes, from_store = past
+        st.download_button(
+            label="📥 Download Inspection Report (PDF)",
+            data=pdf_bytes,
+            file_name=filename,
+            mime="application/pdf",
+            use_container_width=True,
+        )
+        st.caption("Served from the report store." if from_store else "Rendered and stored.")
+
+clients_df = get_all_clients()
+client_filter = st.selectbox(
+    "Stored reports for",
+    options=[None] + clients_df["id"].tolist(),
+    format_func=lambda cid: "All clients" if cid is None else
+        clients_df.loc[clients_df["id"] == cid, "name"].iloc[0],
+)
+stored_df = get_report_artifacts(client_id=client_filter)
+store_stats = get_report_store_stats()
+st.caption(
+    f"{store_stats['count']} reports stored "
+    f"({store_stats['bytes'] / (1024 * 1024):.1f} MB); least recently downloaded "
+    f"reports are evicted first when the store is full."
+)
+if len(stored_df) > 0:
+    stored_view = stored_df[
+        ["inspection_date", "client_name", "building_name", "technician",
+         "created_at", "download_count", "size_bytes"]
+    ].copy()
+    stored_view["size_bytes"] = (stored_view["size_bytes"] / 1024).round(1)
+    stored_view.columns = [
+        "Inspection Date", "Client", "Building", "Technician",
+        "Generated", "Downloads", "Size (KB)",
+    ]
+    st.dataframe(stored_view, use_container_width=True, hide_index=True)
+else:
+    st.info("No stored reports yet.")
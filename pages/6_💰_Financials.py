@@ -2,20 +2,23 @@
 TTS Guard — Financials Page
 Revenue tracking, payment status, collection rate, client breakdown,
 payment history, and outstanding invoices with interactive Plotly charts.
+The totals and the client breakdown come from one precomputed snapshot
+(see precompute.py), so they always agree.
 """
 
 import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 from database import (
-    get_financial_summary,
-    get_client_financial_breakdown,
     get_payment_history,
     get_monthly_revenue,
     get_outstanding_invoices,
 )
+from precompute import load_snapshot
+from profiler import start_profile
 from theme import get_colors, inject_css, plotly_layout
 
+profile = start_profile("Financials", "Theme & header")
 c = get_colors()
 inject_css()
 
@@ -28,7 +31,10 @@ st.caption("Revenue tracking and payment status for all AMC contracts")
 # ---------------------------------------------------------------------------
 # TOP ROW — 4 Financial Metrics
 # ---------------------------------------------------------------------------
-financials = get_financial_summary()
+profile.mark("Metric cards")
+snapshot, computed_at = load_snapshot("financials")
+financials = snapshot["summary"]
+st.caption(f"Figures computed at {computed_at.replace('T', ' ')}")
 
 col1, col2, col3, col4 = st.columns(4)
 with col1:
@@ -61,6 +67,7 @@ with col4:
 # ---------------------------------------------------------------------------
 # COLLECTION BREAKDOWN DONUT
 # ---------------------------------------------------------------------------
+profile.mark("Collection donut")
 collection_pct = financials["collection_pct"]
 collected = financials["total_collected"]
 outstanding_val = financials["total_outstanding"]
@@ -94,9 +101,10 @@ st.divider()
 # ---------------------------------------------------------------------------
 # CLIENT FINANCIAL SUMMARY TABLE + HORIZONTAL BAR
 # ---------------------------------------------------------------------------
+profile.mark("Client summary")
 st.subheader("📊 Client Financial Summary")
 
-client_fin_raw = get_client_financial_breakdown()
+client_fin_raw = snapshot["clients"]
 if len(client_fin_raw) > 0:
     # Display copy with formatted currency
     client_fin_display = client_fin_raw.copy()
@@ -150,6 +158,7 @@ st.divider()
 # ---------------------------------------------------------------------------
 # MONTHLY COLLECTIONS CHART
 # ---------------------------------------------------------------------------
+profile.mark("Monthly collections")
 st.subheader("📈 Monthly Collections")
 
 monthly_rev = get_monthly_revenue(6)
@@ -175,6 +184,7 @@ st.divider()
 # ---------------------------------------------------------------------------
 # RECENT PAYMENTS TABLE
 # ---------------------------------------------------------------------------
+profile.mark("Recent payments")
 st.subheader("💳 Recent Payments")
 
 payments_df = get_payment_history(20)
@@ -203,6 +213,7 @@ st.divider()
 # ---------------------------------------------------------------------------
 # OUTSTANDING INVOICES
 # ---------------------------------------------------------------------------
+profile.mark("Outstanding invoices")
 with st.expander("📋 View Outstanding Invoices"):
     outstanding_df = get_outstanding_invoices()
     if len(outstanding_df) > 0:
@@ -222,3 +233,5 @@ with st.expander("📋 View Outstanding Invoices"):
         st.dataframe(outstanding_df, use_container_width=True, hide_index=True)
     else:
         st.success("No outstanding invoices!")
+
+profile.finish()
@@ -0,0 +1,165 @@
+"""
+TTS Guard — Diagnostics Page
+Per-query latency (p50/p95/p99 over a rolling window), rows returned, the
+issuing function and page, and the slow-query log with EXPLAIN QUERY PLAN.
+Instrumentation is off unless TTS_GUARD_QUERY_STATS=1 is set or it is
+switched on here; connection pool and query cache counters and the state of
+the precomputed snapshots are always shown.
+"""
+
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from database import (
+    disable_query_stats,
+    enable_query_stats,
+    get_cache_stats,
+    get_pool_stats,
+    get_query_stats,
+    get_slow_queries,
+    get_slow_query_threshold,
+    query_stats_enabled,
+    reset_query_stats,
+)
+from precompute import get_snapshot_status
+from theme import get_colors, inject_css, plotly_layout
+
+SLOW_LOG_SHOWN = 50
+TOP_STATEMENTS = 15
+
+c = get_colors()
+inject_css()
+
+st.markdown(
+    '<h1 class="fire-header">🩺 Diagnostics</h1>',
+    unsafe_allow_html=True,
+)
+st.caption("Where page time goes in the database layer")
+
+# ---------------------------------------------------------------------------
+# POOL & CACHE
+# ---------------------------------------------------------------------------
+pool = get_pool_stats()
+cache = get_cache_stats()
+lookups = cache["hits"] + cache["misses"]
+
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.metric("Connections in use", f"{pool['in_use']} / {pool['max_size']}",
+              help=f"{pool['idle']} idle, {pool['opens']} opened, {pool['recycled']} recycled")
+with col2:
+    st.metric("Pool waits", pool["waits"], help="Checkouts that queued for a free connection")
+with col3:
+    st.metric("Cache hit rate", f"{cache['hits'] / lookups:.0%}" if lookups else "—",
+              help=f"{cache['hits']} hits, {cache['misses']} misses")
+with col4:
+    st.metric("Cached results", f"{cache['size']} / {cache['max_entries']}",
+              help=f"{cache['evictions']} evicted, {cache['invalidations']} invalidated")
+
+snapshots_df = get_snapshot_status()
+with st.expander(f"🗂️ Precomputed snapshots ({len(snapshots_df)})"):
+    if len(snapshots_df) > 0:
+        snapshots_df["elapsed_ms"] = snapshots_df["elapsed_ms"].round(1)
+        snapshots_df.columns = ["Snapshot", "For Day", "Computed At", "Compute Time (ms)"]
+        st.dataframe(snapshots_df, use_container_width=True, hide_index=True)
+    else:
+        st.info("No snapshots yet — they are computed when a page first needs them.")
+
+st.markdown("---")
+
+# ---------------------------------------------------------------------------
+# QUERY INSTRUMENTATION CONTROLS
+# ---------------------------------------------------------------------------
+def set_threshold():
+    enable_query_stats(slow_ms=st.session_state.slow_query_ms)
+
+
+if not query_stats_enabled():
+    st.info(
+        "Query instrumentation is off. Start the app with `TTS_GUARD_QUERY_STATS=1` "
+        "(and optionally `TTS_GUARD_SLOW_QUERY_MS`) or switch it on for this process."
+    )
+    st.button("▶️ Start Instrumenting Queries", on_click=enable_query_stats, type="primary")
+    st.stop()
+
+ctrl1, ctrl2, ctrl3 = st.columns([2, 1, 1])
+with ctrl1:
+    st.number_input(
+        "Slow-query threshold (ms)", min_value=1.0, step=10.0,
+        value=float(get_slow_query_threshold()), key="slow_query_ms", on_change=set_threshold,
+    )
+with ctrl2:
+    st.button("🔄 Reset Statistics", on_click=reset_query_stats, use_container_width=True)
+with ctrl3:
+    st.button("⏹️ Stop Instrumenting", on_click=disable_query_stats, use_container_width=True)
+
+stats = get_query_stats()
+if not stats:
+    st.info("No queries recorded yet — open a few pages, then come back.")
+    st.stop()
+
+stats_df = pd.DataFrame(stats)
+slow = get_slow_queries()
+
+# ---------------------------------------------------------------------------
+# QUERY LATENCY
+# ---------------------------------------------------------------------------
+col1, col2, col3 = st.columns(3)
+with col1:
+    st.metric("Statements", len(stats_df))
+with col2:
+    st.metric("Queries", f"{stats_df['calls'].sum():,}",
+              help=f"{stats_df['total_ms'].sum() / 1000:,.1f} s in total")
+with col3:
+    st.metric("Slow queries logged", len(slow))
+
+pages = sorted({p for row in stats_df["pages"].dropna() for p in row.split(", ")})
+page_filter = st.selectbox("Page", ["All pages"] + pages)
+if page_filter != "All pages":
+    stats_df = stats_df[stats_df["pages"].fillna("").str.split(", ").apply(
+        lambda ps: page_filter in ps)]
+
+top = stats_df.head(TOP_STATEMENTS).iloc[::-1]
+fig = go.Figure(go.Bar(
+    x=top["total_ms"], y=top["function"] + " · " + top["sql"].str[:40],
+    orientation="h",
+    marker_color=c["CHART_PRIMARY"],
+    customdata=top[["calls", "p95_ms"]],
+    hovertemplate="%{y}<br>%{x:,.0f} ms total<br>%{customdata[0]} calls, "
+                  "p95 %{customdata[1]:.1f} ms<extra></extra>",
+))
+fig.update_layout(**plotly_layout(
+    height=max(250, 28 * len(top)),
+    title="Total time by statement",
+    xaxis_title="ms",
+    margin={"l": 10, "r": 10, "t": 40, "b": 10},
+))
+st.plotly_chart(fig, use_container_width=True)
+
+view = stats_df[["function", "pages", "calls", "rows_per_call", "p50_ms", "p95_ms",
+                 "p99_ms", "max_ms", "total_ms", "sql"]].copy()
+view.columns = ["Function", "Pages", "Calls", "Rows / Call", "p50 (ms)", "p95 (ms)",
+                "p99 (ms)", "Max (ms)", "Total (ms)", "Statement"]
+st.dataframe(
+    view.round({"Rows / Call": 1, "p50 (ms)": 2, "p95 (ms)": 2, "p99 (ms)": 2,
+                "Max (ms)": 2, "Total (ms)": 1}),
+    use_container_width=True, hide_index=True,
+)
+
+# ---------------------------------------------------------------------------
+# SLOW-QUERY LOG
+# ---------------------------------------------------------------------------
+st.markdown("---")
+st.subheader(f"🐢 Slow Queries (≥ {get_slow_query_threshold():.0f} ms)")
+if not slow:
+    st.success("No query has crossed the threshold.")
+for entry in slow[:SLOW_LOG_SHOWN]:
+    with st.expander(
+        f"{entry['elapsed_ms']:,.1f} ms · {entry['function']} · "
+        f"{entry['page'] or 'no page'} · {entry['rows']:,} rows · {entry['at']}"
+    ):
+        st.code(entry["sql"], language="sql")
+        if entry["plan"]:
+            st.code(entry["plan"], language="text")
+        else:
+            st.caption("No query plan (batch statement or plan unavailable).")
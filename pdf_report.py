@@ -3,14 +3,34 @@ TTS Guard — PDF Inspection Report Generator
 Generates professional PDF reports with TTS branding and Civil Defence reference.
 """
 
+import functools
 import os
 from datetime import date
 from fpdf import FPDF
+from PIL import Image
 
 ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
 LOGO_PATH = os.path.join(ASSETS_DIR, "logo.png")
 
 
+@functools.lru_cache(maxsize=1)
+def _load_logo():
+    """
+    Decode the logo once per process.
+
+    Returns a loaded PIL image for FPDF.image(), or None when the logo is
+    missing or unreadable (the header then falls back to text only).
+    """
+    if not os.path.exists(LOGO_PATH):
+        return None
+    try:
+        with Image.open(LOGO_PATH) as img:
+            img.load()
+            return img.copy()
+    except Exception:
+        return None
+
+
 class InspectionReport(FPDF):
     """Custom PDF class for TTS inspection reports."""
 
@@ -29,9 +49,10 @@ class InspectionReport(FPDF):
         self.rect(0, 12, 210, 1.5, "F")
 
         # Logo or text fallback
-        if os.path.exists(LOGO_PATH):
+        logo = _load_logo()
+        if logo is not None:
             try:
-                self.image(LOGO_PATH, 10, 16, 35)
+                self.image(logo, 10, 16, 35)
                 x_start = 50
             except Exception:
                 x_start = 10
@@ -0,0 +1,430 @@
+"""
+TTS Guard — Snapshot Precomputation
+Heavy page aggregates (the Dashboard snapshot with its per-client overview,
+the Financials totals and client breakdown, the monthly report figures and
+the equipment failure analytics) are computed off the request path and
+stored as JSON in the snapshots table. Pages read them with load_snapshot(),
+which falls back to computing when a snapshot is missing, from an earlier
+day, or older than this process's latest write to a table it reads, so a
+user's own change shows up on the next rerun.
+
+SnapshotWorker keeps the table fresh: it polls PRAGMA data_version on its
+own connection, which changes whenever any other connection (this process
+or another) commits, refreshes every snapshot after a write (at most once
+per MIN_REFRESH_GAP) and at least every REFRESH_INTERVAL; writes made by
+other processes reach pages through it. It runs as a thread in the
+Streamlit server process (ensure_worker()) unless TTS_GUARD_PRECOMPUTE is
+"external" (a separate worker process is running) or "off":
+
+    python -m precompute            # refresh continuously
+    python -m precompute --once     # refresh every snapshot and exit
+"""
+
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import types
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+import database
+from analytics import FailureAnalytics
+from database import (
+    ClientOverview,
+    DashboardSnapshot,
+    RecentComplaint,
+    UpcomingInspection,
+    get_all_buildings,
+    get_all_clients,
+    get_client_financial_breakdown,
+    get_complaints_by_month,
+    get_dashboard_snapshot,
+    get_financial_summary,
+    get_inspection_item_results,
+    get_inspections_by_month,
+)
+
+REFRESH_INTERVAL = 300.0   # seconds; full refresh even without writes (date-relative figures)
+MIN_REFRESH_GAP = 10.0     # seconds between write-triggered refreshes
+POLL_INTERVAL = 2.0        # seconds between PRAGMA data_version checks
+REPORT_MONTHS = 6
+DASHBOARD_DUE_WITHIN = 14
+FAILURE_DIMENSIONS = ("client", "building", "area", "technician")
+
+_log = logging.getLogger("tts_guard.precompute")
+
+# Frozen dataclasses that may appear in a snapshot payload
+_DATACLASSES = {
+    cls.__name__: cls
+    for cls in (DashboardSnapshot, UpcomingInspection, RecentComplaint, ClientOverview)
+}
+
+
+# ---------------------------------------------------------------------------
+# SNAPSHOT DEFINITIONS
+# ---------------------------------------------------------------------------
+
+@dataclasses.dataclass(frozen=True)
+class Snapshot:
+    """How to compute one snapshot, and the tables whose writes make it stale."""
+
+    tables: frozenset
+    compute: object   # () -> value
+
+
+def _tables(*reads):
+    """Union of the tables read by @_cached database functions."""
+    return frozenset().union(*(read.tables for read in reads))
+
+
+def report_months(today=None, count=REPORT_MONTHS):
+    """(year, month, label) for the current and previous months, newest first."""
+    today = today or date.today()
+    months = []
+    for i in range(count):
+        y, m = divmod(today.year * 12 + today.month - 1 - i, 12)
+        months.append((y, m + 1, date(y, m + 1, 1).strftime("%B %Y")))
+    return months
+
+
+def monthly_report(year, month):
+    """Summary figures and chart data for one month of the Reports page."""
+    inspections_df = get_inspections_by_month(year, month)
+    complaints_df = get_complaints_by_month(year, month)
+    by_priority = complaints_df.groupby("priority").size().reset_index(name="Count")
+    by_priority = by_priority.sort_values(
+        "priority", key=lambda p: p.map({"high": 0, "medium": 1, "low": 2})
+    ).reset_index(drop=True)
+    return {
+        "inspections": len(inspections_df),
+        "equipment_checked": int(inspections_df["items_checked"].sum()),
+        "equipment_passed": int(inspections_df["items_passed"].sum()),
+        "complaints": len(complaints_df),
+        "resolved_complaints": int((complaints_df["status"] == "resolved").sum()),
+        "by_client": inspections_df.groupby("client_name").size().reset_index(name="Inspections"),
+        "by_priority": by_priority,
+    }
+
+
+def failure_report(since):
+    """Every equipment failure table the Reports page shows, for checks since `since`."""
+    failures = FailureAnalytics.load(since=since)
+    report = {"since": since.isoformat(), "checks": len(failures)}
+    if len(failures) == 0:
+        return report
+    report["by_type"] = failures.failure_rates("type").sort_values("failure_rate")
+    report["rolling_by_type"] = failures.rolling_failure_rates(by="type", window=3).reset_index()
+    report["breakdowns"] = {
+        dimension: failures.with_names(failures.failure_rates([dimension, "type"]))
+        for dimension in FAILURE_DIMENSIONS
+    }
+    report["repeats"] = failures.with_names(failures.repeat_failures(min_failures=2))
+    return report
+
+
+def financials():
+    """Financials page totals and per-client rows, stored together so they agree."""
+    return {"summary": get_financial_summary(), "clients": get_client_financial_breakdown()}
+
+
+def snapshot_definitions(today=None):
+    """Snapshot name -> Snapshot."""
+    months = report_months(today)
+    oldest_year, oldest_month, _ = months[-1]
+    definitions = {
+        "dashboard": Snapshot(
+            _tables(get_dashboard_snapshot),
+            lambda: get_dashboard_snapshot(due_within=DASHBOARD_DUE_WITHIN),
+        ),
+        "financials": Snapshot(
+            _tables(get_financial_summary, get_client_financial_breakdown), financials,
+        ),
+        "failure_analytics": Snapshot(
+            _tables(get_all_buildings, get_all_clients, get_inspection_item_results),
+            lambda: failure_report(date(oldest_year, oldest_month, 1)),
+        ),
+    }
+    for year, month, _ in months:
+        definitions[f"monthly_report:{year}-{month:02d}"] = Snapshot(
+            _tables(get_inspections_by_month, get_complaints_by_month),
+            lambda year=year, month=month: monthly_report(year, month),
+        )
+    return definitions
+
+
+# ---------------------------------------------------------------------------
+# PAYLOAD ENCODING
+# ---------------------------------------------------------------------------
+# JSON with tagged objects for DataFrames, tuples, read-only mappings and the
+# snapshot dataclasses, so values come back as the types pages expect.
+
+def _encode(value):
+    if isinstance(value, pd.DataFrame):
+        return {"__frame__": value.to_dict(orient="split", index=False)}
+    if dataclasses.is_dataclass(value):
+        return {"__dataclass__": type(value).__name__, "fields": {
+            f.name: _encode(getattr(value, f.name)) for f in dataclasses.fields(value)
+        }}
+    if isinstance(value, types.MappingProxyType):
+        return {"__mapping__": _encode(dict(value))}
+    if isinstance(value, tuple):
+        return {"__tuple__": [_encode(v) for v in value]}
+    if isinstance(value, dict):
+        return {k: _encode(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode(value):
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if "__frame__" in value:
+        frame = value["__frame__"]
+        return pd.DataFrame(frame["data"], columns=frame["columns"])
+    if "__dataclass__" in value:
+        fields = {k: _decode(v) for k, v in value["fields"].items()}
+        return _DATACLASSES[value["__dataclass__"]](**fields)
+    if "__mapping__" in value:
+        return types.MappingProxyType(_decode(value["__mapping__"]))
+    if "__tuple__" in value:
+        return tuple(_decode(v) for v in value["__tuple__"])
+    return {k: _decode(v) for k, v in value.items()}
+
+
+# ---------------------------------------------------------------------------
+# STORAGE
+# ---------------------------------------------------------------------------
+
+def _open_connection(db_path):
+    """A dedicated connection: its own commits do not change its data_version."""
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    database._apply_storage_profile(conn)
+    return conn
+
+
+def _store(conn, name, payload, started_at, elapsed_ms, as_of):
+    """Write one snapshot row. Returns its computed_at."""
+    computed_at = datetime.now().isoformat(timespec="seconds")
+    with database._write_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                INSERT OR REPLACE INTO snapshots
+                    (name, as_of, payload, computed_at, elapsed_ms, started_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (name, as_of, payload, computed_at, elapsed_ms, started_at))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    return computed_at
+
+
+def _compute(conn, name, snapshot):
+    """Compute one snapshot and store it. Returns (parsed, computed_at, elapsed_ms)."""
+    as_of = date.today().isoformat()
+    started_at = time.time()
+    started = time.perf_counter()
+    value = snapshot.compute()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    parsed = _encode(value)
+    computed_at = _store(conn, name, json.dumps(parsed, separators=(",", ":")),
+                         started_at, elapsed_ms, as_of)
+    return parsed, computed_at, elapsed_ms
+
+
+def refresh_snapshot(conn, name, snapshot):
+    """Compute one snapshot and store it. Returns the elapsed milliseconds."""
+    return _compute(conn, name, snapshot)[2]
+
+
+def refresh_all(conn, clear_cache=False):
+    """Refresh every snapshot and drop ones that left the report window.
+
+    clear_cache empties this process's query cache first. Only a worker in
+    its own process needs it: that cache never sees the app's writes, while
+    in the app process writes already invalidate the entries they touch.
+
+    Returns {name: elapsed_ms}; a snapshot that fails is logged and skipped.
+    """
+    if clear_cache:
+        database.invalidate_cache()
+    definitions = snapshot_definitions()
+    timings = {}
+    for name, snapshot in definitions.items():
+        try:
+            timings[name] = refresh_snapshot(conn, name, snapshot)
+        except Exception:
+            _log.exception("refreshing snapshot %s failed", name)
+    with database._write_lock:
+        conn.execute(
+            f"DELETE FROM snapshots WHERE name NOT IN ({','.join('?' * len(definitions))})",
+            list(definitions),
+        )
+        conn.commit()
+    return timings
+
+
+# Parsed payloads by name: (started_at, computed_at, parsed), reused while
+# the stored row's started_at is unchanged
+_parsed = {}
+_parsed_lock = threading.Lock()
+
+
+def load_snapshot(name):
+    """
+    Return (value, computed_at) for a snapshot.
+
+    Reads the snapshots table. A missing snapshot, one computed on an earlier
+    day, or one whose reads began before this process last wrote a table it
+    depends on is computed now and stored (the first visitor pays once).
+    """
+    ensure_worker()
+    snapshot = snapshot_definitions()[name]
+    cached = None
+    with database._connection() as conn:
+        row = conn.execute(
+            "SELECT as_of, started_at FROM snapshots WHERE name = ?", (name,)
+        ).fetchone()
+        if (row is not None and row["as_of"] == date.today().isoformat()
+                and row["started_at"] > database.last_write_time(snapshot.tables)):
+            with _parsed_lock:
+                cached = _parsed.get(name)
+            if cached is None or cached[0] != row["started_at"]:
+                stored = conn.execute(
+                    "SELECT started_at, computed_at, payload FROM snapshots WHERE name = ?",
+                    (name,),
+                ).fetchone()
+                cached = (stored["started_at"], stored["computed_at"],
+                          json.loads(stored["payload"]))
+                with _parsed_lock:
+                    _parsed[name] = cached
+    if cached is not None:
+        return _decode(cached[2]), cached[1]
+
+    writer = _open_connection(database.DB_PATH)
+    try:
+        parsed, computed_at, _ = _compute(writer, name, snapshot)
+    finally:
+        writer.close()
+    return _decode(parsed), computed_at
+
+
+def get_snapshot_status():
+    """Name, day, computed_at and compute time of every stored snapshot."""
+    with database._connection() as conn:
+        df = pd.read_sql_query(
+            "SELECT name, as_of, computed_at, elapsed_ms FROM snapshots ORDER BY name", conn
+        )
+    return df
+
+
+# ---------------------------------------------------------------------------
+# WORKER
+# ---------------------------------------------------------------------------
+
+class SnapshotWorker(threading.Thread):
+    """Refreshes every snapshot after writes and on a fixed interval."""
+
+    def __init__(self, db_path, interval=REFRESH_INTERVAL, min_gap=MIN_REFRESH_GAP,
+                 poll=POLL_INTERVAL, clear_cache=False):
+        super().__init__(name="tts-guard-precompute", daemon=True)
+        self.db_path = db_path
+        self.clear_cache = clear_cache
+        self.interval = interval
+        self.min_gap = min_gap
+        self.poll = poll
+        self.last_refresh = None   # {name: elapsed_ms} of the latest pass
+        self._stop_event = threading.Event()
+
+    def run(self):
+        conn = _open_connection(self.db_path)
+        seen_version = None
+        refreshed_at = float("-inf")
+        try:
+            while True:
+                version = conn.execute("PRAGMA data_version").fetchone()[0]
+                since = time.monotonic() - refreshed_at
+                if since >= self.interval or (version != seen_version and since >= self.min_gap):
+                    seen_version = version
+                    refreshed_at = time.monotonic()
+                    try:
+                        self.last_refresh = refresh_all(conn, self.clear_cache)
+                        _log.info("refreshed %d snapshots in %.0f ms", len(self.last_refresh),
+                                  (time.monotonic() - refreshed_at) * 1000)
+                    except Exception:
+                        _log.exception("snapshot refresh failed")
+                if self._stop_event.wait(self.poll):
+                    return
+        finally:
+            conn.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def ensure_worker():
+    """Start the in-process worker for the current database (once)."""
+    global _worker
+    if os.environ.get("TTS_GUARD_PRECOMPUTE", "thread") != "thread":
+        return None
+    with _worker_lock:
+        if _worker is not None and _worker.db_path == database.DB_PATH and _worker.is_alive():
+            return _worker
+        if _worker is not None:
+            _worker.stop()
+        with database._connection():   # make sure the schema is migrated
+            pass
+        _worker = SnapshotWorker(database.DB_PATH)
+        _worker.start()
+        return _worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="refresh every snapshot and exit")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL)
+    parser.add_argument("--min-gap", type=float, default=MIN_REFRESH_GAP)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    with database._connection():   # create / migrate the schema first
+        pass
+    if args.once:
+        conn = _open_connection(database.DB_PATH)
+        try:
+            for name, elapsed_ms in refresh_all(conn, clear_cache=True).items():
+                print(f"{name:<28} {elapsed_ms:>9.1f} ms")
+        finally:
+            conn.close()
+        return
+
+    worker = SnapshotWorker(database.DB_PATH, interval=args.interval, min_gap=args.min_gap,
+                            clear_cache=True)
+    worker.start()
+    print(f"Refreshing snapshots in {database.DB_PATH} (Ctrl-C to stop)")
+    try:
+        while worker.is_alive():
+            worker.join(1.0)
+    except KeyboardInterrupt:
+        worker.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+TTS Guard — Page Render Profiler
+Opt-in per-rerun profiling for page scripts. Open a page with ?profile=1
+(sampling) or ?profile=cprofile (sampling + cProfile), or start the app with
+TTS_GUARD_PROFILE=1, and every rerun is split into the page's sections
+(timed between profile.mark() calls) while a sampler thread records the
+script thread's stacks. A sidebar panel shows time per section and per
+kind of work (database, pandas, Plotly, Streamlit calls, theme CSS, page
+code); each rerun's stacks are written as a collapsed-stack file for
+flamegraph.pl or speedscope, keeping the latest KEEP_PROFILES per page. ?profile=0 switches it off again.
+
+Pages call:
+
+    profile = start_profile("Dashboard", "Theme & header")
+    profile.mark("Metric cards")
+    ...
+    profile.finish()
+
+When profiling is off start_profile() returns a no-op profiler.
+"""
+
+import collections
+import cProfile
+import glob
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import streamlit as st
+
+PROFILE_DIR = os.environ.get(
+    "TTS_GUARD_PROFILE_DIR", os.path.join(tempfile.gettempdir(), "tts_guard_profiles")
+)
+SAMPLE_INTERVAL = 0.002     # seconds between stack samples
+MAX_PROFILE_SECONDS = 300   # a rerun that never reaches finish() stops sampling here
+TOP_FUNCTIONS = 12
+KEEP_PROFILES = 20          # most recent reruns' files kept per page
+
+# First module (below the page script) on a sampled stack -> kind of work
+CATEGORIES = (
+    ("database", "Database"),
+    ("sqlite3", "Database"),
+    ("theme", "Theme CSS"),
+    ("pandas", "pandas"),
+    ("numpy", "pandas"),
+    ("plotly", "Plotly"),
+    ("streamlit", "Streamlit calls"),
+)
+
+
+def _profile_mode():
+    """None, "sample" or "cprofile" from ?profile=..., the session, or the env."""
+    requested = st.query_params.get("profile")
+    if requested is not None:
+        st.session_state.profile_mode = {
+            "0": None, "": None, "cprofile": "cprofile",
+        }.get(requested, "sample")
+    if "profile_mode" in st.session_state:
+        return st.session_state.profile_mode
+    env = os.environ.get("TTS_GUARD_PROFILE", "")
+    if env in ("", "0"):
+        return None
+    return "cprofile" if env == "cprofile" else "sample"
+
+
+def _frame_label(frame):
+    module = frame.f_globals.get("__name__", "?")
+    if module == "__main__":
+        module = os.path.basename(frame.f_code.co_filename)[:-3]
+    return f"{module}:{frame.f_code.co_qualname}"
+
+
+def _category(module):
+    for prefix, category in CATEGORIES:
+        if module == prefix or module.startswith(prefix + "."):
+            return category
+    return "Other libraries"
+
+
+def _prune_profiles(prefix):
+    """Delete all but the latest KEEP_PROFILES reruns' files for one page."""
+    # The timestamp after the page prefix sorts chronologically
+    paths = glob.glob(glob.escape(prefix) + "-" + "[0-9]" * 8 + "-*")
+    runs = sorted({os.path.splitext(path)[0] for path in paths})
+    for stem in runs[:-KEEP_PROFILES]:
+        for path in glob.glob(glob.escape(stem) + ".*"):
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # already removed by another session's rerun
+
+
+class _StackSampler(threading.Thread):
+    """Samples one thread's stack below the page script frame.
+
+    Each sample is weighted by the time since the previous one, so samples
+    delayed by the GIL still account for the time they cover.
+    """
+
+    def __init__(self, profiler, thread_id):
+        super().__init__(name="tts-guard-profiler", daemon=True)
+        self.profiler = profiler
+        self.thread_id = thread_id
+        self.stacks = collections.Counter()       # (section, frames...) -> µs
+        self.categories = collections.Counter()   # category -> µs
+        self._stop_event = threading.Event()
+
+    def run(self):
+        last = time.perf_counter()
+        deadline = last + MAX_PROFILE_SECONDS
+        while not self._stop_event.wait(SAMPLE_INTERVAL):
+            now = time.perf_counter()
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or now > deadline:
+                return
+            self._record(frame, int((now - last) * 1_000_000))
+            last = now
+
+    def _record(self, frame, weight):
+        frames = []
+        while frame is not None and frame.f_code.co_filename != self.profiler.script_path:
+            frames.append(frame)
+            frame = frame.f_back
+        if frame is None:   # not inside the page script (yet / any more)
+            return
+        frames.reverse()
+        if frames:
+            category = _category(frames[0].f_globals.get("__name__", ""))
+        else:
+            category = "Page code"
+        self.categories[category] += weight
+        self.stacks[
+            (self.profiler.page, self.profiler.current_section,
+             *(_frame_label(f) for f in frames))
+        ] += weight
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class _NoProfiler:
+    """Stand-in used when profiling is off; every call is a no-op."""
+
+    def mark(self, section):
+        pass
+
+    def finish(self):
+        pass
+
+
+class PageProfiler:
+    """Times one rerun of a page script, section by section."""
+
+    def __init__(self, page, script_path, mode, first_section):
+        self.page = page
+        self.script_path = script_path
+        self.mode = mode
+        self.current_section = first_section
+        self.sections = []            # [section, seconds]
+        self.started = time.perf_counter()
+        self._section_started = self.started
+        self._sampler = _StackSampler(self, threading.get_ident())
+        self._cprofile = cProfile.Profile() if mode == "cprofile" else None
+        self.finished = False
+
+    def start(self):
+        self._sampler.start()
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def mark(self, section):
+        """End the current section and start timing `section`."""
+        now = time.perf_counter()
+        self.sections.append([self.current_section, now - self._section_started])
+        self.current_section = section
+        self._section_started = now
+
+    def stop(self):
+        if self.finished:
+            return
+        self.finished = True
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        self.mark(None)
+        self._sampler.stop()
+
+    def finish(self):
+        """Stop profiling, write the profile files and render the sidebar panel."""
+        self.stop()
+        st.session_state._active_profile = None
+        elapsed = time.perf_counter() - self.started
+        paths = self._write_files()
+        self._render_panel(elapsed, paths)
+
+    def _write_files(self):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        prefix = os.path.join(PROFILE_DIR, self.page.lower().replace(' ', '_'))
+        stem = f"{prefix}-{datetime.now():%Y%m%d-%H%M%S-%f}"
+        paths = [stem + ".collapsed"]
+        with open(paths[0], "w") as f:
+            for stack, micros in self._sampler.stacks.most_common():
+                f.write(";".join(stack) + f" {micros}\n")
+        if self._cprofile is not None:
+            paths.append(stem + ".prof")
+            self._cprofile.dump_stats(paths[1])
+        _prune_profiles(prefix)
+        return paths
+
+    def _top_functions(self):
+        stats = pstats.Stats(self._cprofile)
+        rows = []
+        for (filename, line, name), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({
+                "Function": f"{os.path.basename(filename)}:{line}({name})",
+                "Calls": calls,
+                "Own (ms)": round(own * 1000, 1),
+                "Cumulative (ms)": round(cumulative * 1000, 1),
+            })
+        rows.sort(key=lambda r: r["Own (ms)"], reverse=True)
+        return rows[:TOP_FUNCTIONS]
+
+    def _render_panel(self, elapsed, paths):
+        total_ms = elapsed * 1000
+        sampled = sum(self._sampler.categories.values()) or 1
+        with st.sidebar.expander(f"⏱️ Render profile · {total_ms:,.0f} ms", expanded=True):
+            st.caption("Sections")
+            st.dataframe(
+                [{"Section": name, "ms": round(seconds * 1000, 1),
+                  "%": round(seconds * 1000 / total_ms * 100, 1)}
+                 for name, seconds in self.sections],
+                hide_index=True, use_container_width=True,
+            )
+            st.caption("Kind of work (sampled)")
+            st.dataframe(
+                [{"Work": category, "ms": round(micros / 1000, 1),
+                  "%": round(micros / sampled * 100, 1)}
+                 for category, micros in self._sampler.categories.most_common()],
+                hide_index=True, use_container_width=True,
+            )
+            if self._cprofile is not None:
+                st.caption("Top functions by own time (cProfile)")
+                st.dataframe(self._top_functions(), hide_index=True, use_container_width=True)
+            st.caption("Profile files: " + ", ".join(f"`{p}`" for p in paths))
+
+
+def start_profile(page, first_section="Setup"):
+    """Start profiling this rerun of the calling page script if enabled."""
+    mode = _profile_mode()
+    previous = st.session_state.get("_active_profile")
+    if previous is not None:
+        previous.stop()   # the last rerun stopped before reaching finish()
+        st.session_state._active_profile = None
+    if mode is None:
+        return _NoProfiler()
+    profiler = PageProfiler(page, sys._getframe(1).f_code.co_filename, mode, first_section)
+    st.session_state._active_profile = profiler
+    profiler.start()
+    return profiler
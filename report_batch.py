@@ -0,0 +1,158 @@
+"""
+TTS Guard — Batch PDF Report Generation
+Renders many inspection reports in parallel across worker processes and
+streams them into a ZIP archive, e.g. for quarter-end Civil Defence filings.
+
+    python -m report_batch --client 3 --month 2026-09 -o reports.zip
+"""
+
+import io
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from database import get_inspection_report_data
+from report_store import lookup_reports, render_report, report_filename, store_report
+
+# Below this many reports the process pool start-up costs more than it saves.
+MIN_PARALLEL_REPORTS = 4
+
+
+def _pool_context():
+    """
+    Start workers without fork(): the Streamlit server is multi-threaded
+    (pool, write and precompute locks may be held mid-fork). The forkserver
+    imports the rendering modules once and forks each worker from there.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(["report_store"])
+    return context
+
+
+def generate_reports_zip(inspection_ids=None, client_id=None, building_id=None,
+                         year=None, month=None, output=None, max_workers=None,
+                         progress=None, use_store=True):
+    """
+    Render every matching inspection report into a ZIP archive.
+
+    Args:
+        inspection_ids: Explicit inspection IDs (combined with other filters)
+        client_id / building_id: Restrict to one client or building
+        year, month: Restrict to inspections in that month
+        output: File path or binary file object; defaults to an in-memory buffer
+        max_workers: Worker processes (defaults to the CPU count)
+        progress: Optional callback(done, total) invoked as reports finish
+        use_store: Serve unchanged reports from the report store and store
+            newly rendered ones (see report_store.py)
+
+    Returns:
+        dict with zip (bytes when writing in memory, else None), rendered
+        count, cached count (served from the store), total count and errors (list of dicts: inspection_id,
+        building_name, error). Failed items are also listed in errors.txt
+        inside the archive.
+    """
+    payloads = get_inspection_report_data(
+        inspection_ids=inspection_ids, client_id=client_id,
+        building_id=building_id, year=year, month=month,
+    )
+    total = len(payloads)
+    buffer = io.BytesIO() if output is None else None
+    errors = []
+    rendered = 0
+    cached = 0
+
+    # fpdf2 already compresses page content, so store entries as-is.
+    with zipfile.ZipFile(buffer or output, "w", zipfile.ZIP_STORED) as archive:
+        def collect(payload, result=None, exc=None, from_store=False):
+            nonlocal rendered, cached
+            if exc is None:
+                name, pdf_bytes = result
+                archive.writestr(name, pdf_bytes)
+                if from_store:
+                    cached += 1
+                elif use_store:
+                    store_report(payload, name, pdf_bytes)
+                rendered += 1
+            else:
+                errors.append({
+                    "inspection_id": payload["inspection_id"],
+                    "building_name": payload["building_name"],
+                    "error": f"{type(exc).__name__}: {exc}",
+                })
+            if progress:
+                progress(rendered + len(errors), total)
+
+        pending = []
+        stored_reports = lookup_reports(payloads) if use_store else [None] * total
+        for payload, stored in zip(payloads, stored_reports):
+            if stored is not None:
+                collect(payload, result=stored, from_store=True)
+            else:
+                pending.append(payload)
+
+        workers = max_workers or os.cpu_count() or 1
+        if len(pending) < MIN_PARALLEL_REPORTS or workers == 1:
+            for payload in pending:
+                try:
+                    collect(payload, result=render_report(payload))
+                except Exception as exc:
+                    collect(payload, exc=exc)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context()) as pool:
+                futures = {pool.submit(render_report, p): p for p in pending}
+                for future in as_completed(futures):
+                    try:
+                        collect(futures[future], result=future.result())
+                    except Exception as exc:
+                        collect(futures[future], exc=exc)
+
+        if errors:
+            archive.writestr("errors.txt", "\n".join(
+                f"{e['inspection_id']}\t{e['building_name']}\t{e['error']}"
+                for e in errors
+            ))
+
+    return {
+        "zip": buffer.getvalue() if buffer is not None else None,
+        "rendered": rendered,
+        "cached": cached,
+        "total": total,
+        "errors": errors,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Batch-render inspection PDFs into a ZIP")
+    parser.add_argument("--client", type=int, help="client ID")
+    parser.add_argument("--building", type=int, help="building ID")
+    parser.add_argument("--month", help="YYYY-MM")
+    parser.add_argument("--ids", help="comma-separated inspection IDs")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--no-store", action="store_true",
+                        help="always re-render; do not read or fill the report store")
+    parser.add_argument("-o", "--output", default="inspection_reports.zip")
+    args = parser.parse_args()
+
+    year = month = None
+    if args.month:
+        year, month = (int(part) for part in args.month.split("-"))
+    ids = [int(i) for i in args.ids.split(",")] if args.ids else None
+
+    started = time.perf_counter()
+    result = generate_reports_zip(
+        inspection_ids=ids, client_id=args.client, building_id=args.building,
+        year=year, month=month, output=args.output, max_workers=args.workers,
+        progress=lambda done, total: print(f"\r{done}/{total}", end="", flush=True),
+        use_store=not args.no_store,
+    )
+    print(f"\nWrote {result['rendered']}/{result['total']} reports "
+          f"({result['cached']} from the report store) to "
+          f"{args.output} in {time.perf_counter() - started:.1f}s")
+    for error in result["errors"]:
+        print(f"  failed #{error['inspection_id']} {error['building_name']}: {error['error']}")
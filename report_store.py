@@ -0,0 +1,103 @@
+"""
+TTS Guard — Inspection Report Store
+Persists rendered inspection PDFs in the report_artifacts table, keyed by a
+hash of the data they were rendered from, so repeat downloads skip fpdf.
+
+A changed inspection, checklist or notes hashes differently and is rendered
+afresh (replacing the old artifact); editing or deleting an inspection also
+drops its artifact via triggers. The stored PDF keeps the report date it was
+first generated with.
+"""
+
+import hashlib
+import json
+
+from database import (
+    get_inspection_report_data,
+    get_report_artifact,
+    get_report_artifacts_by_hash,
+    save_report_artifact,
+)
+from pdf_report import generate_inspection_pdf
+
+# Bump when the PDF layout changes so stored artifacts are re-rendered.
+REPORT_FORMAT_VERSION = 1
+
+# Least recently downloaded reports are evicted beyond this total size.
+REPORT_STORE_MAX_BYTES = 128 * 1024 * 1024
+
+
+def report_filename(payload):
+    """Return the download / ZIP entry name for a report payload."""
+    building = payload["building_name"].replace(" ", "_").replace("/", "-")
+    return (
+        f"TTS_Inspection_{building}_{payload['inspection_date']}"
+        f"_{payload['inspection_id']}.pdf"
+    )
+
+
+def render_report(payload):
+    """Render one report payload. Returns (filename, pdf_bytes)."""
+    kwargs = {k: v for k, v in payload.items() if k != "inspection_id"}
+    return report_filename(payload), generate_inspection_pdf(**kwargs)
+
+
+def report_hash(payload):
+    """Content hash of a report payload (see get_inspection_report_data)."""
+    canonical = json.dumps(
+        [REPORT_FORMAT_VERSION, payload], sort_keys=True, default=str,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def lookup_report(payload):
+    """Return (filename, pdf_bytes) from the store, or None on a miss."""
+    artifact = get_report_artifact(report_hash(payload))
+    if artifact is None:
+        return None
+    return artifact["filename"], artifact["pdf"]
+
+
+def lookup_reports(payloads):
+    """lookup_report() for many payloads at once; a list of results in order."""
+    hashes = [report_hash(payload) for payload in payloads]
+    artifacts = get_report_artifacts_by_hash(hashes)
+    return [
+        (artifacts[h]["filename"], artifacts[h]["pdf"]) if h in artifacts else None
+        for h in hashes
+    ]
+
+
+def store_report(payload, filename, pdf_bytes):
+    """Persist a rendered report for its payload."""
+    save_report_artifact(
+        report_hash(payload), payload["inspection_id"], filename, pdf_bytes,
+        max_bytes=REPORT_STORE_MAX_BYTES,
+    )
+
+
+def get_or_render(payload):
+    """
+    Serve a report payload from the store, rendering and storing on a miss.
+
+    Returns (filename, pdf_bytes, cached).
+    """
+    stored = lookup_report(payload)
+    if stored is not None:
+        return (*stored, True)
+    filename, pdf_bytes = render_report(payload)
+    store_report(payload, filename, pdf_bytes)
+    return filename, pdf_bytes, False
+
+
+def get_or_render_report(inspection_id):
+    """
+    Return (filename, pdf_bytes, cached) for one stored inspection.
+
+    Raises KeyError when the inspection does not exist.
+    """
+    payloads = get_inspection_report_data(inspection_ids=[inspection_id])
+    if not payloads:
+        raise KeyError(f"Inspection {inspection_id} not found")
+    return get_or_render(payloads[0])
@@ -0,0 +1,360 @@
+"""
+TTS Guard — Weekly Inspection Planner
+Builds a week of technician routes over overdue and soon-due buildings:
+visits are clustered by area, each visit lasts in proportion to the
+building's equipment count, and workload is balanced across technicians
+within a working day's capacity.
+
+A greedy pass places buildings most-urgent first into the cheapest
+technician/day slot; a local search then relocates and swaps visits while
+that lowers the plan cost (travel + workload imbalance + delay + anything
+left unplanned). The plan is written through schedule_inspections().
+
+    python -m scheduler --start 2026-10-19            # print the plan
+    python -m scheduler --start 2026-10-19 --commit   # and schedule it
+"""
+
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+import pandas as pd
+
+from database import TECHNICIANS, compute_building_status, schedule_inspections
+
+# Visit duration: fixed set-up plus time per equipment item (minutes)
+VISIT_BASE_MINUTES = 30
+MINUTES_PER_ITEM = 4
+# Travel before a visit: within the area the technician is already in, or
+# into a new area (minutes)
+SAME_AREA_TRAVEL = 15
+NEW_AREA_TRAVEL = 45
+DAY_CAPACITY_MINUTES = 8 * 60
+WORKING_WEEKDAYS = (0, 1, 2, 3, 4)  # Monday–Friday
+
+# Plan cost weights, in minutes-equivalent
+BALANCE_WEIGHT = 0.5        # x (technician weekly load)^2 / day capacity
+DELAY_WEIGHT = 10           # per day of waiting, x urgency
+LATE_WEIGHT = 60            # per day a due-soon building passes its due date
+UNPLANNED_WEIGHT = 1000     # per building left out, x urgency
+
+LOCAL_SEARCH_SECONDS = 0.5  # time budget for the improvement phase
+
+
+def working_days(start, days=5):
+    """The next `days` working days from `start` (inclusive)."""
+    result, day = [], start
+    while len(result) < days:
+        if day.weekday() in WORKING_WEEKDAYS:
+            result.append(day)
+        day += timedelta(days=1)
+    return result
+
+
+def visit_minutes(equipment_count):
+    """On-site time for a building with this much equipment."""
+    return VISIT_BASE_MINUTES + MINUTES_PER_ITEM * int(equipment_count)
+
+
+def load_candidates(as_of=None, horizon_days=7):
+    """
+    Buildings to plan: overdue, plus those due within `horizon_days`.
+    Buildings with a pending scheduled inspection are excluded.
+    """
+    status_df = compute_building_status(as_of=as_of, due_within=horizon_days)
+    return status_df[status_df["status"].isin(["overdue", "due_soon"])].reset_index(drop=True)
+
+
+class _Slot:
+    """One technician's working day."""
+
+    __slots__ = ("tech", "day", "visits", "work", "areas")
+
+    def __init__(self, tech, day):
+        self.tech = tech
+        self.day = day
+        self.visits = set()
+        self.work = 0
+        self.areas = Counter()
+
+    @property
+    def travel(self):
+        return (len(self.areas) * NEW_AREA_TRAVEL
+                + (len(self.visits) - len(self.areas)) * SAME_AREA_TRAVEL)
+
+    @property
+    def minutes(self):
+        return self.work + self.travel
+
+
+class WeekPlan:
+    """Result of plan_week(): visits, unplanned buildings and plan statistics."""
+
+    def __init__(self, visits, unplanned, days, technicians, stats):
+        self.visits = visits
+        self.unplanned = unplanned
+        self.days = days
+        self.technicians = technicians
+        self.stats = stats
+
+    def workload(self):
+        """Planned minutes (visits + travel) per technician (rows) and day."""
+        if self.visits.empty:
+            return pd.DataFrame(0, index=self.technicians, columns=self.days)
+        minutes = self.visits.pivot_table(
+            index="technician", columns="scheduled_date", values="minutes",
+            aggfunc="sum", fill_value=0,
+        )
+        return minutes.reindex(index=self.technicians, columns=self.days, fill_value=0)
+
+    def commit(self):
+        """Schedule every planned visit. Returns the schedule_inspections() result."""
+        return schedule_inspections(
+            (row.building_id, row.scheduled_date.isoformat(), row.technician)
+            for row in self.visits.itertuples()
+        )
+
+
+class _Planner:
+    """Mutable assignment state shared by the greedy and local-search phases."""
+
+    def __init__(self, candidates, technicians, days, as_of):
+        self.technicians = list(technicians)
+        self.days = days
+        n = len(candidates)
+        self.area = candidates["area"].fillna("").tolist()
+        self.work = [visit_minutes(c) for c in candidates["equipment_count"].tolist()]
+        until_next = candidates["days_until_next"].tolist()
+        overdue = [s == "overdue" for s in candidates["status"].tolist()]
+        # Urgency grows with days overdue (never-inspected counts as a year)
+        self.urgency = [
+            1 + min(-u if u > -999 else 365, 365) / 30 if o else 0.5
+            for u, o in zip(until_next, overdue)
+        ]
+        self.day_cost = [
+            [
+                DELAY_WEIGHT * self.urgency[i] * d
+                + (0 if overdue[i] else
+                   LATE_WEIGHT * max(0, (day - as_of).days - until_next[i]))
+                for d, day in enumerate(days)
+            ]
+            for i in range(n)
+        ]
+        self.slots = [
+            _Slot(t, d) for t in range(len(self.technicians)) for d in range(len(days))
+        ]
+        self.load = [0] * len(self.technicians)
+        self.assigned = [None] * n
+
+    # -- cost ---------------------------------------------------------------
+    def _balance(self, tech):
+        return BALANCE_WEIGHT * self.load[tech] ** 2 / DAY_CAPACITY_MINUTES
+
+    def _visit_cost(self, i):
+        slot = self.assigned[i]
+        if slot is None:
+            return UNPLANNED_WEIGHT * self.urgency[i]
+        return self.day_cost[i][slot.day]
+
+    def _cost(self, slots, visits):
+        """Cost of the plan components touched by a move."""
+        techs = {slot.tech for slot in slots}
+        return (sum(slot.travel for slot in slots)
+                + sum(self._balance(t) for t in techs)
+                + sum(self._visit_cost(i) for i in visits))
+
+    def total_cost(self):
+        return self._cost(self.slots, range(len(self.assigned)))
+
+    # -- moves --------------------------------------------------------------
+    def _add(self, i, slot):
+        before = slot.minutes
+        slot.visits.add(i)
+        slot.work += self.work[i]
+        slot.areas[self.area[i]] += 1
+        self.load[slot.tech] += slot.minutes - before
+        self.assigned[i] = slot
+
+    def _remove(self, i):
+        slot = self.assigned[i]
+        before = slot.minutes
+        slot.visits.discard(i)
+        slot.work -= self.work[i]
+        slot.areas[self.area[i]] -= 1
+        if not slot.areas[self.area[i]]:
+            del slot.areas[self.area[i]]
+        self.load[slot.tech] += slot.minutes - before
+        self.assigned[i] = None
+
+    def _relocate(self, moves):
+        """Apply [(visit, target slot or None)]; keep it only if it is feasible
+        and lowers the cost. Returns True when kept."""
+        slots = {self.assigned[i] for i, _ in moves} | {t for _, t in moves}
+        slots.discard(None)
+        visits = [i for i, _ in moves]
+        before = self._cost(slots, visits)
+        origin = [(i, self.assigned[i]) for i, _ in moves]
+        for i, _ in moves:
+            if self.assigned[i] is not None:
+                self._remove(i)
+        for i, target in moves:
+            if target is not None:
+                self._add(i, target)
+        if (all(slot.minutes <= DAY_CAPACITY_MINUTES for slot in slots)
+                and self._cost(slots, visits) < before - 1e-9):
+            return True
+        for i, _ in moves:
+            if self.assigned[i] is not None:
+                self._remove(i)
+        for i, slot in origin:
+            if slot is not None:
+                self._add(i, slot)
+        return False
+
+    # -- phases -------------------------------------------------------------
+    def _insertion_cost(self, i, slot):
+        """Added cost of putting an unplanned visit into a slot, or None."""
+        travel = SAME_AREA_TRAVEL if self.area[i] in slot.areas else NEW_AREA_TRAVEL
+        added = self.work[i] + travel
+        if slot.minutes + added > DAY_CAPACITY_MINUTES:
+            return None
+        load = self.load[slot.tech]
+        return (travel + self.day_cost[i][slot.day]
+                + BALANCE_WEIGHT * ((load + added) ** 2 - load ** 2) / DAY_CAPACITY_MINUTES)
+
+    def greedy(self, order):
+        for i in order:
+            best, best_cost = None, None
+            for slot in self.slots:
+                cost = self._insertion_cost(i, slot)
+                if cost is not None and (best_cost is None or cost < best_cost):
+                    best, best_cost = slot, cost
+            if best is not None:
+                self._add(i, best)
+
+    def local_search(self, deadline):
+        """Relocate / swap / insert until no move improves or time runs out."""
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+            for i in range(len(self.assigned)):
+                if time.perf_counter() >= deadline:
+                    break
+                current = self.assigned[i]
+                # Relocate (or insert an unplanned visit) to any other slot
+                for slot in self.slots:
+                    if slot is not current and self._relocate([(i, slot)]):
+                        improved = True
+                        current = slot
+                if current is None:
+                    continue
+                # Swap with a visit in a slot already working in i's area,
+                # which moves i into that cluster
+                for slot in self.slots:
+                    if slot is current or self.area[i] not in slot.areas:
+                        continue
+                    for j in list(slot.visits):
+                        if self.area[j] == self.area[i]:
+                            continue
+                        if self._relocate([(i, slot), (j, current)]):
+                            improved = True
+                            break
+                    if self.assigned[i] is not current:
+                        break
+
+
+def plan_week(candidates, technicians=None, start=None, days=5, as_of=None,
+              search_seconds=LOCAL_SEARCH_SECONDS):
+    """
+    Plan a week of inspections.
+
+    Args:
+        candidates: Rows shaped like compute_building_status() (see
+            load_candidates()): building_id, building_name, client_name,
+            area, equipment_count, days_until_next, status
+        technicians: Names to plan for (default TECHNICIANS)
+        start: First day of the plan (default: as_of)
+        days: Working days to plan
+        as_of: Date the candidates' days_until_next are relative to
+            (default today)
+        search_seconds: Local-search time budget; 0 keeps the greedy plan
+
+    Returns:
+        WeekPlan. visits has one row per planned visit: technician,
+        scheduled_date, stop (route order within the day), building columns,
+        minutes (visit + travel) and days_overdue; unplanned lists the
+        candidates that did not fit.
+    """
+    started = time.perf_counter()
+    technicians = list(technicians or TECHNICIANS)
+    as_of = as_of or date.today()
+    plan_days = working_days(start or as_of, days)
+    candidates = candidates.reset_index(drop=True)
+
+    planner = _Planner(candidates, technicians, plan_days, as_of)
+    order = sorted(range(len(candidates)),
+                   key=lambda i: (-planner.urgency[i], planner.area[i], -planner.work[i]))
+    planner.greedy(order)
+    greedy_cost = planner.total_cost()
+    if search_seconds:
+        planner.local_search(time.perf_counter() + search_seconds)
+
+    rows = []
+    for slot in planner.slots:
+        # Route: one area at a time, most urgent first within an area
+        route = sorted(slot.visits, key=lambda i: (planner.area[i], -planner.urgency[i]))
+        previous_area = None
+        for stop, i in enumerate(route, start=1):
+            travel = SAME_AREA_TRAVEL if planner.area[i] == previous_area else NEW_AREA_TRAVEL
+            previous_area = planner.area[i]
+            rows.append({
+                "technician": technicians[slot.tech],
+                "scheduled_date": plan_days[slot.day],
+                "stop": stop,
+                "index": i,
+                "minutes": planner.work[i] + travel,
+            })
+    columns = ["building_id", "building_name", "client_name", "area", "equipment_count"]
+    visits = pd.DataFrame(rows, columns=["technician", "scheduled_date", "stop", "index", "minutes"])
+    until_next = candidates["days_until_next"].to_numpy()
+    visits["days_overdue"] = [max(0, -int(until_next[i])) for i in visits["index"]]
+    visits = visits.join(candidates[columns], on="index").drop(columns="index")
+    visits = visits.sort_values(["scheduled_date", "technician", "stop"]).reset_index(drop=True)
+
+    unplanned = candidates.loc[[i for i, s in enumerate(planner.assigned) if s is None]]
+    loads = pd.Series(planner.load, dtype=float)
+    stats = {
+        "candidates": len(candidates),
+        "planned": len(visits),
+        "unplanned": len(unplanned),
+        "travel_minutes": sum(slot.travel for slot in planner.slots),
+        "area_changes": sum(len(slot.areas) for slot in planner.slots),
+        "load_spread_minutes": float(loads.max() - loads.min()) if len(loads) else 0.0,
+        "greedy_cost": round(greedy_cost, 1),
+        "cost": round(planner.total_cost(), 1),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    return WeekPlan(visits, unplanned.reset_index(drop=True), plan_days, technicians, stats)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Plan a week of inspections")
+    parser.add_argument("--start", type=date.fromisoformat, default=None,
+                        help="first day of the plan (YYYY-MM-DD, default today)")
+    parser.add_argument("--horizon", type=int, default=7,
+                        help="also plan buildings due within this many days")
+    parser.add_argument("--commit", action="store_true",
+                        help="schedule the planned visits")
+    args = parser.parse_args()
+
+    plan = plan_week(load_candidates(horizon_days=args.horizon), start=args.start)
+    with pd.option_context("display.width", 160, "display.max_rows", 500):
+        print(plan.visits.to_string(index=False))
+        print()
+        print(plan.workload())
+    print("\n" + ", ".join(f"{k}={v}" for k, v in plan.stats.items()))
+    if args.commit:
+        result = plan.commit()
+        print(f"Scheduled {len(result['scheduled'])}, rejected {len(result['rejected'])}")
@@ -2,415 +2,714 @@
 TTS Guard — Seed Data
 Generates realistic demo data with dates as offsets from today.
 Covers 6 months of history for rich reports and charts.
+
+seed_scale() generates portfolios of any size from the same distributions
+and status targeting for load and scale testing:
+
+    python -m seed_data                      # demo data (8 clients, 18 buildings)
+    python -m seed_data --clients 2000 --buildings 100000 --years 10 \
+        --equipment-per-building 20 --seed 1 -o scale.db
 """
 
 import sqlite3
 import random
+import time
 from datetime import date, timedelta
-from database import get_connection, TECHNICIANS
+import database
+from database import invalidate_cache, TECHNICIANS
 
 random.seed(42)  # Reproducible but realistic
 
 TODAY = date.today()
 
-
-def seed():
-    """Seed the database with all demo data."""
-    conn = get_connection()
-    cursor = conn.cursor()
-
-    # ----- CLIENTS -----
-    clients = [
-        ("First Abu Dhabi Bank", "FAB", "Ahmad Al-Mazrouei", "+971 2 610 1111", "ahmad.m@fab.ae"),
-        ("Farnek Services", "Farnek", "Hassan Al-Hosani", "+971 2 555 7890", "hassan@farnek.com"),
-        ("Khidmah LLC", "Khidmah", "Sara Al-Ketbi", "+971 2 446 2345", "sara.k@khidmah.com"),
-        ("MPM Properties", "MPM", "Omar Rashed", "+971 2 633 4567", "omar.r@mpm.ae"),
-        ("United Real Estate", "URE", "Fatima Al-Ali", "+971 2 621 8901", "fatima@ure.ae"),
-        ("Al Reef Villas", "ARV", "Khalid Al-Mansoori", "+971 2 557 2345", "khalid@alreef.ae"),
-        ("Reem Island Tower Mgmt", "RITM", "Noura Al-Shamsi", "+971 2 444 6789", "noura@reemtowers.ae"),
-        ("Yas Plaza Hotels", "YPH", "Rashid Al-Dhaheri", "+971 2 496 1234", "rashid@yasplaza.ae"),
-    ]
-    cursor.executemany(
-        "INSERT INTO clients (name, short_name, contact_person, phone, email) VALUES (?,?,?,?,?)",
-        clients,
+# ---------------------------------------------------------------------------
+# DISTRIBUTIONS (shared by the demo data and seed_scale)
+# ---------------------------------------------------------------------------
+AREAS = [
+    "Al Maryah Island", "Al Wahda", "Khalifa City", "Musaffah", "ICAD",
+    "Al Reem Island", "Al Reef", "Hamdan Street", "Corniche Road",
+    "Tourist Club", "Yas Island",
+]
+
+EQUIPMENT_TYPES = [
+    "Fire Alarm Panel", "Smoke Detector", "Fire Extinguisher DCP",
+    "Fire Extinguisher CO2", "Sprinkler System", "Emergency Light",
+    "Hose Reel", "Exit Sign", "FM200 System",
+]
+
+# Equipment mix after the one fire alarm panel every building has
+EQUIPMENT_WEIGHTS = {
+    "Smoke Detector": 0.25,
+    "Fire Extinguisher DCP": 0.15,
+    "Fire Extinguisher CO2": 0.08,
+    "Sprinkler System": 0.05,
+    "Emergency Light": 0.18,
+    "Hose Reel": 0.08,
+    "Exit Sign": 0.15,
+    "FM200 System": 0.06,
+}
+
+INSPECTION_NOTES = [
+    "All systems functioning normally.",
+    "Minor issues noted, follow-up recommended.",
+    "Equipment in good condition. Batteries replaced on smoke detectors.",
+    "Sprinkler pressure tested. All readings within range.",
+    "Fire extinguishers serviced. New tags attached.",
+    "Emergency lights tested. Two units need bulb replacement.",
+    "Exit signs illumination checked. All operational.",
+    "Fire alarm panel tested. Zone 3 sensor cleaned.",
+    "Full system check completed. No issues found.",
+    "Hose reels tested. Water pressure satisfactory.",
+]
+
+# Status targeting, as in the demo portfolio (4 / 5 / 9 of 18 buildings):
+# days since the last inspection for each target status, with visits_per_year
+# = 4 (due every ~91 days), and the gap between earlier inspections.
+STATUS_MIX = {"overdue": 4, "due_soon": 5, "completed": 9}
+LAST_INSPECTION_DAYS_AGO = {"overdue": (95, 130), "due_soon": (78, 88), "completed": (1, 20)}
+INSPECTION_GAP_DAYS = (85, 100)
+
+# Payment standing of the current contract (6 / 5 / 4 / 3 of 18 contracts)
+PAYMENT_MIX = {"fully_paid": 6, "partially_paid": 5, "overdue_payment": 4, "partial_amount": 3}
+PAYMENT_TERMS_MIX = {"quarterly": 2, "semi_annual": 4, "annual": 2}  # per client
+PAYMENT_METHODS = ["bank_transfer", "cheque", "bank_transfer", "online"]
+
+
+def calc_annual_value(equip_count, rng=random):
+    """Annual contract value, proportional to the equipment count."""
+    if equip_count <= 12:
+        return rng.randint(15, 22) * 1000
+    elif equip_count <= 28:
+        return rng.randint(25, 35) * 1000
+    else:
+        return rng.randint(38, 55) * 1000
+
+
+def distribute_equipment(count, rng=random):
+    """Generate a realistic equipment mix for a given count."""
+    items = ["Fire Alarm Panel"]  # always at least 1 fire alarm panel
+    types_list = list(EQUIPMENT_WEIGHTS.keys())
+    type_weights = list(EQUIPMENT_WEIGHTS.values())
+    for _ in range(count - 1):
+        items.append(rng.choices(types_list, weights=type_weights, k=1)[0])
+    return items
+
+
+def inspection_row(building_id, inspection_date, equip_count, rng=random):
+    """One inspections row: every item checked, 90-100% passing."""
+    tech = rng.choice(TECHNICIANS)
+    fail_rate = rng.uniform(0, 0.10)
+    items_failed = int(equip_count * fail_rate)
+    notes = rng.choice(INSPECTION_NOTES)
+    return (
+        building_id,
+        inspection_date.isoformat(),
+        tech,
+        equip_count, equip_count - items_failed, items_failed,
+        notes,
     )
 
-    # ----- BUILDINGS -----
-    # (client_index_1based, name, area, equip_count)
-    buildings_spec = [
-        (1, "FAB HQ Tower", "Al Maryah Island", 24),
-        (1, "FAB Al Wahda Branch", "Al Wahda", 8),
-        (1, "FAB Khalifa City Branch", "Khalifa City", 6),
-        (2, "Farnek HQ", "Musaffah", 18),
-        (2, "Staff Accommodation", "ICAD", 12),
-        (3, "Tower A", "Al Reem Island", 32),
-        (3, "Tower B", "Al Reem Island", 28),
-        (3, "Community Center", "Al Reef", 10),
-        (4, "Office Complex", "Hamdan Street", 14),
-        (4, "Warehouse", "Mussafah", 8),
-        (5, "Commercial Tower", "Corniche Road", 22),
-        (5, "Residential Block", "Tourist Club", 16),
-        (6, "Cluster A - 50 Villas", "Al Reef", 50),
-        (6, "Cluster B - 45 Villas", "Al Reef", 45),
-        (7, "Reem Heights", "Al Reem Island", 38),
-        (7, "Reem Plaza Mall", "Al Reem Island", 26),
-        (8, "Hotel Main", "Yas Island", 42),
-        (8, "Conference Center", "Yas Island", 20),
+
+def item_results(inspection_id, equipment_ids, weights, items_failed, rng):
+    """inspection_items rows; failures favour the building's weak units."""
+    failed_ids = set()
+    while len(failed_ids) < min(items_failed, len(equipment_ids)):
+        failed_ids.add(rng.choices(equipment_ids, weights=weights, k=1)[0])
+    return [
+        (inspection_id, eid, "Failed" if eid in failed_ids else "Passed")
+        for eid in equipment_ids
     ]
 
-    building_ids = []
-    for client_idx, bname, area, _ in buildings_spec:
-        cursor.execute(
-            "INSERT INTO buildings (client_id, name, area) VALUES (?,?,?)",
-            (client_idx, bname, area),
-        )
-        building_ids.append(cursor.lastrowid)
-
-    # ----- CONTRACTS -----
-    # Payment terms: Large clients quarterly, medium semi-annual, small annual
-    # Client 1 (FAB) = quarterly, Client 3 (Khidmah) = quarterly
-    # Client 2,5,7,8 = semi-annual
-    # Client 4,6 = annual
-    client_payment_terms = {
-        1: "quarterly", 3: "quarterly",
-        2: "semi_annual", 5: "semi_annual", 7: "semi_annual", 8: "semi_annual",
-        4: "annual", 6: "annual",
-    }
-
-    # Annual values proportional to equipment count
-    def calc_annual_value(equip_count):
-        if equip_count <= 12:
-            return random.randint(15, 22) * 1000
-        elif equip_count <= 28:
-            return random.randint(25, 35) * 1000
-        else:
-            return random.randint(38, 55) * 1000
-
-    contract_ids = []
-    for i, (client_idx, bname, area, equip_count) in enumerate(buildings_spec):
-        start = TODAY - timedelta(days=random.randint(200, 300))
-        end = start + timedelta(days=365)
-        annual_value = calc_annual_value(equip_count)
-        payment_terms = client_payment_terms[client_idx]
-        cursor.execute(
-            """INSERT INTO contracts
-               (building_id, start_date, end_date, visits_per_year,
-                annual_value, payment_terms, status)
-               VALUES (?,?,?,?,?,?,?)""",
-            (building_ids[i], start.isoformat(), end.isoformat(), 4,
-             annual_value, payment_terms, "active"),
+
+def payment_reference(client_short, year, month):
+    return f"{client_short}-TRF-{year}-{month:02d}"
+
+
+def payment_rows_for(contract_id, payment_dates, installment, standing, client_short, rng):
+    """
+    payments rows for one contract's installments given its standing
+    (see PAYMENT_MIX): all received, latest pending, latest overdue, or
+    every installment part-paid (60-80%).
+    """
+    rows = []
+    for j, pdate in enumerate(payment_dates):
+        method = rng.choice(PAYMENT_METHODS)
+        ref = payment_reference(client_short, pdate.year, pdate.month)
+        amount, status, notes = installment, "received", None
+        is_latest = j == len(payment_dates) - 1
+        if standing == "partially_paid" and is_latest:
+            status = "pending"
+        elif standing == "overdue_payment" and is_latest:
+            status = "overdue"
+        elif standing == "partial_amount":
+            partial_pct = rng.uniform(0.6, 0.8)
+            amount = round(installment * partial_pct, 2)
+            status = "partial"
+            notes = f"Partial payment ({partial_pct:.0%} of AED {installment:,.0f})"
+        rows.append((contract_id, pdate.isoformat(), amount, method, ref, status, notes))
+    return rows
+
+
+def seed():
+    """Seed the database with all demo data."""
+    with database._connection() as conn:
+        cursor = conn.cursor()
+
+        # ----- CLIENTS -----
+        clients = [
+            ("First Abu Dhabi Bank", "FAB", "Ahmad Al-Mazrouei", "+971 2 610 1111", "ahmad.m@fab.ae"),
+            ("Farnek Services", "Farnek", "Hassan Al-Hosani", "+971 2 555 7890", "hassan@farnek.com"),
+            ("Khidmah LLC", "Khidmah", "Sara Al-Ketbi", "+971 2 446 2345", "sara.k@khidmah.com"),
+            ("MPM Properties", "MPM", "Omar Rashed", "+971 2 633 4567", "omar.r@mpm.ae"),
+            ("United Real Estate", "URE", "Fatima Al-Ali", "+971 2 621 8901", "fatima@ure.ae"),
+            ("Al Reef Villas", "ARV", "Khalid Al-Mansoori", "+971 2 557 2345", "khalid@alreef.ae"),
+            ("Reem Island Tower Mgmt", "RITM", "Noura Al-Shamsi", "+971 2 444 6789", "noura@reemtowers.ae"),
+            ("Yas Plaza Hotels", "YPH", "Rashid Al-Dhaheri", "+971 2 496 1234", "rashid@yasplaza.ae"),
+        ]
+        cursor.executemany(
+            "INSERT INTO clients (name, short_name, contact_person, phone, email) VALUES (?,?,?,?,?)",
+            clients,
         )
-        contract_ids.append(cursor.lastrowid)
 
-    # ----- EQUIPMENT -----
-    equipment_types = [
-        "Fire Alarm Panel", "Smoke Detector", "Fire Extinguisher DCP",
-        "Fire Extinguisher CO2", "Sprinkler System", "Emergency Light",
-        "Hose Reel", "Exit Sign", "FM200 System",
-    ]
+        # ----- BUILDINGS -----
+        # (client_index_1based, name, area, equip_count)
+        buildings_spec = [
+            (1, "FAB HQ Tower", "Al Maryah Island", 24),
+            (1, "FAB Al Wahda Branch", "Al Wahda", 8),
+            (1, "FAB Khalifa City Branch", "Khalifa City", 6),
+            (2, "Farnek HQ", "Musaffah", 18),
+            (2, "Staff Accommodation", "ICAD", 12),
+            (3, "Tower A", "Al Reem Island", 32),
+            (3, "Tower B", "Al Reem Island", 28),
+            (3, "Community Center", "Al Reef", 10),
+            (4, "Office Complex", "Hamdan Street", 14),
+            (4, "Warehouse", "Mussafah", 8),
+            (5, "Commercial Tower", "Corniche Road", 22),
+            (5, "Residential Block", "Tourist Club", 16),
+            (6, "Cluster A - 50 Villas", "Al Reef", 50),
+            (6, "Cluster B - 45 Villas", "Al Reef", 45),
+            (7, "Reem Heights", "Al Reem Island", 38),
+            (7, "Reem Plaza Mall", "Al Reem Island", 26),
+            (8, "Hotel Main", "Yas Island", 42),
+            (8, "Conference Center", "Yas Island", 20),
+        ]
 
-    # Distribution weights (larger buildings get more variety)
-    def distribute_equipment(count):
-        """Generate a realistic equipment mix for a given count."""
-        items = []
-        # Always at least 1 fire alarm panel
-        items.append("Fire Alarm Panel")
-        remaining = count - 1
-        # Weighted distribution
-        weights = {
-            "Smoke Detector": 0.25,
-            "Fire Extinguisher DCP": 0.15,
-            "Fire Extinguisher CO2": 0.08,
-            "Sprinkler System": 0.05,
-            "Emergency Light": 0.18,
-            "Hose Reel": 0.08,
-            "Exit Sign": 0.15,
-            "FM200 System": 0.06,
+        building_ids = []
+        for client_idx, bname, area, _ in buildings_spec:
+            cursor.execute(
+                "INSERT INTO buildings (client_id, name, area) VALUES (?,?,?)",
+                (client_idx, bname, area),
+            )
+            building_ids.append(cursor.lastrowid)
+
+        # ----- CONTRACTS -----
+        # Payment terms: Large clients quarterly, medium semi-annual, small annual
+        # Client 1 (FAB) = quarterly, Client 3 (Khidmah) = quarterly
+        # Client 2,5,7,8 = semi-annual
+        # Client 4,6 = annual
+        client_payment_terms = {
+            1: "quarterly", 3: "quarterly",
+            2: "semi_annual", 5: "semi_annual", 7: "semi_annual", 8: "semi_annual",
+            4: "annual", 6: "annual",
         }
-        types_list = list(weights.keys())
-        type_weights = list(weights.values())
-        for _ in range(remaining):
-            chosen = random.choices(types_list, weights=type_weights, k=1)[0]
-            items.append(chosen)
-        return items
-
-    for i, (_, _, _, equip_count) in enumerate(buildings_spec):
-        items = distribute_equipment(equip_count)
-        for eq_type in items:
+
+        contract_ids = []
+        contract_terms = []
+        for i, (client_idx, bname, area, equip_count) in enumerate(buildings_spec):
+            start = TODAY - timedelta(days=random.randint(200, 300))
+            end = start + timedelta(days=365)
+            annual_value = calc_annual_value(equip_count)
+            payment_terms = client_payment_terms[client_idx]
             cursor.execute(
-                "INSERT INTO equipment (building_id, type, status) VALUES (?,?,?)",
-                (building_ids[i], eq_type, "OK"),
+                """INSERT INTO contracts
+                   (building_id, start_date, end_date, visits_per_year,
+                    annual_value, payment_terms, status)
+                   VALUES (?,?,?,?,?,?,?)""",
+                (building_ids[i], start.isoformat(), end.isoformat(), 4,
+                 annual_value, payment_terms, "active"),
             )
+            contract_ids.append(cursor.lastrowid)
+            contract_terms.append((annual_value, payment_terms))
+
+        # ----- EQUIPMENT -----
+        equipment_rows = []
+        for i, (_, _, _, equip_count) in enumerate(buildings_spec):
+            for eq_type in distribute_equipment(equip_count):
+                equipment_rows.append((building_ids[i], eq_type, "OK"))
+        cursor.executemany(
+            "INSERT INTO equipment (building_id, type, status) VALUES (?,?,?)",
+            equipment_rows,
+        )
 
-    # ----- INSPECTIONS (6 months of history + status targeting) -----
-    #
-    # With visits_per_year=4, next inspection due every ~91 days.
-    #
-    # Target status distribution:
-    #   4 buildings OVERDUE (last inspection > 91 days ago, no schedule)
-    #   5 buildings DUE WITHIN 14 DAYS (next due within 14 days)
-    #   9 buildings COMPLETED RECENTLY (inspected within last 20 days)
-    #
-    # Building indices (0-based): 0-17
-    #   Overdue: indices 1, 4, 9, 11    (FAB Wahda, Farnek Staff, MPM Warehouse, URE Residential)
-    #   Due soon: indices 3, 7, 10, 14, 16  (Farnek HQ, Khidmah Community, URE Commercial, Reem Heights, Hotel Main)
-    #   Completed: indices 0, 2, 5, 6, 8, 12, 13, 15, 17
-
-    overdue_indices = [1, 4, 9, 11]
-    due_soon_indices = [3, 7, 10, 14, 16]
-    completed_indices = [0, 2, 5, 6, 8, 12, 13, 15, 17]
-
-    def gen_inspection(building_idx, inspection_date, equip_count):
-        """Generate a single inspection record."""
-        tech = random.choice(TECHNICIANS)
-        items_checked = equip_count
-        # 90-100% pass rate
-        fail_rate = random.uniform(0, 0.10)
-        items_failed = int(equip_count * fail_rate)
-        items_passed = items_checked - items_failed
-        notes_options = [
-            "All systems functioning normally.",
-            "Minor issues noted, follow-up recommended.",
-            "Equipment in good condition. Batteries replaced on smoke detectors.",
-            "Sprinkler pressure tested. All readings within range.",
-            "Fire extinguishers serviced. New tags attached.",
-            "Emergency lights tested. Two units need bulb replacement.",
-            "Exit signs illumination checked. All operational.",
-            "Fire alarm panel tested. Zone 3 sensor cleaned.",
-            "Full system check completed. No issues found.",
-            "Hose reels tested. Water pressure satisfactory.",
-        ]
-        notes = random.choice(notes_options)
-        return (
-            building_ids[building_idx],
-            inspection_date.isoformat(),
-            tech,
-            items_checked, items_passed, items_failed,
-            notes,
+        # ----- INSPECTIONS (6 months of history + status targeting) -----
+        #
+        # With visits_per_year=4, next inspection due every ~91 days.
+        #
+        # Target status distribution:
+        #   4 buildings OVERDUE (last inspection > 91 days ago, no schedule)
+        #   5 buildings DUE WITHIN 14 DAYS (next due within 14 days)
+        #   9 buildings COMPLETED RECENTLY (inspected within last 20 days)
+        #
+        # Building indices (0-based): 0-17
+        #   Overdue: indices 1, 4, 9, 11    (FAB Wahda, Farnek Staff, MPM Warehouse, URE Residential)
+        #   Due soon: indices 3, 7, 10, 14, 16  (Farnek HQ, Khidmah Community, URE Commercial, Reem Heights, Hotel Main)
+        #   Completed: indices 0, 2, 5, 6, 8, 12, 13, 15, 17
+
+        overdue_indices = [1, 4, 9, 11]
+        due_soon_indices = [3, 7, 10, 14, 16]
+        completed_indices = [0, 2, 5, 6, 8, 12, 13, 15, 17]
+
+        def gen_inspection(building_idx, inspection_date, equip_count):
+            """Generate a single inspection record."""
+            return inspection_row(building_ids[building_idx], inspection_date, equip_count)
+
+        # Generate 6 months of historical inspections for all buildings
+        # Each building gets ~2 historical inspections (quarterly = every 91 days)
+        all_inspections = []
+
+        for idx in range(18):
+            equip_count = buildings_spec[idx][3]
+
+            if idx in overdue_indices:
+                # Last inspection was 95-130 days ago (overdue by 5-35 days)
+                days_ago = random.randint(95, 130)
+                last_date = TODAY - timedelta(days=days_ago)
+                all_inspections.append(gen_inspection(idx, last_date, equip_count))
+                # Also add one ~6 months ago
+                older = last_date - timedelta(days=random.randint(85, 100))
+                all_inspections.append(gen_inspection(idx, older, equip_count))
+
+            elif idx in due_soon_indices:
+                # Last inspection was 78-88 days ago (due in 3-13 days)
+                days_ago = random.randint(78, 88)
+                last_date = TODAY - timedelta(days=days_ago)
+                all_inspections.append(gen_inspection(idx, last_date, equip_count))
+                # Also add one ~6 months ago
+                older = last_date - timedelta(days=random.randint(85, 100))
+                all_inspections.append(gen_inspection(idx, older, equip_count))
+
+            else:  # completed recently
+                # Last inspection was 1-20 days ago
+                days_ago = random.randint(1, 20)
+                last_date = TODAY - timedelta(days=days_ago)
+                all_inspections.append(gen_inspection(idx, last_date, equip_count))
+                # Also add one ~3 months ago
+                mid = last_date - timedelta(days=random.randint(85, 100))
+                all_inspections.append(gen_inspection(idx, mid, equip_count))
+                # And one ~6 months ago
+                older = mid - timedelta(days=random.randint(85, 100))
+                all_inspections.append(gen_inspection(idx, older, equip_count))
+
+        cursor.executemany(
+            """INSERT INTO inspections
+               (building_id, inspection_date, technician,
+                items_checked, items_passed, items_failed, notes)
+               VALUES (?,?,?,?,?,?,?)""",
+            all_inspections,
         )
 
-    # Generate 6 months of historical inspections for all buildings
-    # Each building gets ~2 historical inspections (quarterly = every 91 days)
-    all_inspections = []
-
-    for idx in range(18):
-        equip_count = buildings_spec[idx][3]
-
-        if idx in overdue_indices:
-            # Last inspection was 95-130 days ago (overdue by 5-35 days)
-            days_ago = random.randint(95, 130)
-            last_date = TODAY - timedelta(days=days_ago)
-            all_inspections.append(gen_inspection(idx, last_date, equip_count))
-            # Also add one ~6 months ago
-            older = last_date - timedelta(days=random.randint(85, 100))
-            all_inspections.append(gen_inspection(idx, older, equip_count))
-
-        elif idx in due_soon_indices:
-            # Last inspection was 78-88 days ago (due in 3-13 days)
-            days_ago = random.randint(78, 88)
-            last_date = TODAY - timedelta(days=days_ago)
-            all_inspections.append(gen_inspection(idx, last_date, equip_count))
-            # Also add one ~6 months ago
-            older = last_date - timedelta(days=random.randint(85, 100))
-            all_inspections.append(gen_inspection(idx, older, equip_count))
-
-        else:  # completed recently
-            # Last inspection was 1-20 days ago
-            days_ago = random.randint(1, 20)
-            last_date = TODAY - timedelta(days=days_ago)
-            all_inspections.append(gen_inspection(idx, last_date, equip_count))
-            # Also add one ~3 months ago
-            mid = last_date - timedelta(days=random.randint(85, 100))
-            all_inspections.append(gen_inspection(idx, mid, equip_count))
-            # And one ~6 months ago
-            older = mid - timedelta(days=random.randint(85, 100))
-            all_inspections.append(gen_inspection(idx, older, equip_count))
-
-    cursor.executemany(
-        """INSERT INTO inspections
-           (building_id, inspection_date, technician,
-            items_checked, items_passed, items_failed, notes)
-           VALUES (?,?,?,?,?,?,?)""",
-        all_inspections,
-    )
+        # ----- INSPECTION ITEMS (per-equipment results) -----
+        # Failures concentrate on a few weak units per building so that repeat
+        # failures show up in analytics. Own RNG: keeps the rest of the data as is.
+        item_rng = random.Random(7)
+        equipment_by_building = {}
+        for equipment_id, building_id in cursor.execute(
+            "SELECT id, building_id FROM equipment ORDER BY id"
+        ).fetchall():
+            equipment_by_building.setdefault(building_id, []).append(equipment_id)
+        weak_units = {
+            bid: set(item_rng.sample(ids, max(1, len(ids) // 10)))
+            for bid, ids in equipment_by_building.items()
+        }
+        items = []
+        for inspection_id, building_id, items_failed in cursor.execute(
+            "SELECT id, building_id, items_failed FROM inspections ORDER BY id"
+        ).fetchall():
+            ids = equipment_by_building.get(building_id, [])
+            weights = [8 if eid in weak_units[building_id] else 1 for eid in ids]
+            items.extend(item_results(inspection_id, ids, weights, items_failed, item_rng))
+        cursor.executemany(
+            "INSERT INTO inspection_items (inspection_id, equipment_id, result) VALUES (?,?,?)",
+            items,
+        )
 
-    # ----- COMPLAINTS -----
-    complaints = [
-        (
-            f"TTS-{TODAY.year}-0001", 3, building_ids[5],
-            "Fire alarm panel showing fault code E-14 on 3rd floor. Panel beeping intermittently.",
-            "high", "open", None, None,
-            (TODAY - timedelta(days=2)).isoformat(),
-        ),
-        (
-            f"TTS-{TODAY.year}-0002", 1, building_ids[0],
-            "Two emergency lights on parking level B2 not functioning during monthly test.",
-            "medium", "assigned", "Suresh Kumar", None,
-            (TODAY - timedelta(days=5)).isoformat(),
-        ),
-        (
-            f"TTS-{TODAY.year}-0003", 8, building_ids[16],
-            "Kitchen hood suppression system requires inspection after minor grease fire incident.",
-            "high", "in_progress", "Mohammed Al-Rashid", None,
-            (TODAY - timedelta(days=8)).isoformat(),
-        ),
-        (
-            f"TTS-{TODAY.year}-0004", 6, building_ids[12],
-            "Annual fire extinguisher servicing reminder for villas 12-25.",
-            "low", "resolved", "Ahmed Mansoor", None,
-            (TODAY - timedelta(days=15)).isoformat(),
-        ),
-        (
-            f"TTS-{TODAY.year}-0005", 7, building_ids[14],
-            "Sprinkler system pressure gauge reading below normal on floors 15-18.",
-            "medium", "open", None, None,
-            (TODAY - timedelta(days=3)).isoformat(),
-        ),
-    ]
-    cursor.executemany(
-        """INSERT INTO complaints
-           (ticket_number, client_id, building_id, message,
-            priority, status, assigned_technician, inspection_id, created_at)
-           VALUES (?,?,?,?,?,?,?,?,?)""",
-        complaints,
-    )
+        # ----- COMPLAINTS -----
+        complaints = [
+            (
+                f"TTS-{TODAY.year}-0001", 3, building_ids[5],
+                "Fire alarm panel showing fault code E-14 on 3rd floor. Panel beeping intermittently.",
+                "high", "open", None, None,
+                (TODAY - timedelta(days=2)).isoformat(),
+            ),
+            (
+                f"TTS-{TODAY.year}-0002", 1, building_ids[0],
+                "Two emergency lights on parking level B2 not functioning during monthly test.",
+                "medium", "assigned", "Suresh Kumar", None,
+                (TODAY - timedelta(days=5)).isoformat(),
+            ),
+            (
+                f"TTS-{TODAY.year}-0003", 8, building_ids[16],
+                "Kitchen hood suppression system requires inspection after minor grease fire incident.",
+                "high", "in_progress", "Mohammed Al-Rashid", None,
+                (TODAY - timedelta(days=8)).isoformat(),
+            ),
+            (
+                f"TTS-{TODAY.year}-0004", 6, building_ids[12],
+                "Annual fire extinguisher servicing reminder for villas 12-25.",
+                "low", "resolved", "Ahmed Mansoor", None,
+                (TODAY - timedelta(days=15)).isoformat(),
+            ),
+            (
+                f"TTS-{TODAY.year}-0005", 7, building_ids[14],
+                "Sprinkler system pressure gauge reading below normal on floors 15-18.",
+                "medium", "open", None, None,
+                (TODAY - timedelta(days=3)).isoformat(),
+            ),
+        ]
+        cursor.executemany(
+            """INSERT INTO complaints
+               (ticket_number, client_id, building_id, message,
+                priority, status, assigned_technician, inspection_id, created_at)
+               VALUES (?,?,?,?,?,?,?,?,?)""",
+            complaints,
+        )
 
-    # ----- PAYMENTS (6 months of history, mixed terms) -----
-    #
-    # Payment schedule per client type:
-    #   Quarterly: 4 payments/year, each = annual_value / 4
-    #   Semi-annual: 2 payments/year, each = annual_value / 2
-    #   Annual: 1 payment/year = annual_value
-    #
-    # Status distribution:
-    #   6 contracts fully paid
-    #   5 contracts partially paid (current installments received, next pending)
-    #   4 contracts have overdue payments
-    #   3 contracts have partial payments (60-80%)
-
-    # Assign payment status categories to buildings
-    # Fully paid: 0(FAB HQ), 2(FAB Khalifa), 5(Khidmah A), 6(Khidmah B), 16(Hotel), 17(Conference)
-    # Partially paid: 3(Farnek HQ), 10(URE Commercial), 12(Al Reef A), 14(Reem Heights), 15(Reem Mall)
-    # Overdue: 1(FAB Wahda), 4(Farnek Staff), 9(MPM Warehouse), 11(URE Residential)
-    # Partial amount: 7(Khidmah Community), 8(MPM Office), 13(Al Reef B)
-
-    fully_paid = {0, 2, 5, 6, 16, 17}
-    partially_paid = {3, 10, 12, 14, 15}
-    overdue_payment = {1, 4, 9, 11}
-    partial_amount = {7, 8, 13}
-
-    payment_methods = ["bank_transfer", "cheque", "bank_transfer", "online"]
-
-    def gen_ref(client_short, year, month):
-        return f"{client_short}-TRF-{year}-{month:02d}"
-
-    for i, (client_idx, bname, area, equip_count) in enumerate(buildings_spec):
-        contract_id = contract_ids[i]
-        # Get contract details
-        cursor.execute("SELECT * FROM contracts WHERE id = ?", (contract_id,))
-        contract = dict(cursor.fetchone())
-        annual_value = contract["annual_value"]
-        payment_terms = contract["payment_terms"]
-        client_short = clients[client_idx - 1][1]
-
-        if payment_terms == "quarterly":
-            installment = annual_value / 4
-            # Generate payments going back 6 months
-            payment_dates = []
-            base = TODAY - timedelta(days=180)
-            for q in range(3):  # 3 quarters in 6 months
-                pdate = base + timedelta(days=q * 91)
-                if pdate <= TODAY:
-                    payment_dates.append(pdate)
-
-        elif payment_terms == "semi_annual":
-            installment = annual_value / 2
-            payment_dates = [
-                TODAY - timedelta(days=150),
-                TODAY - timedelta(days=30) if i not in overdue_payment else TODAY - timedelta(days=60),
-            ]
-
-        else:  # annual
-            installment = annual_value
-            payment_dates = [TODAY - timedelta(days=120)]
-
-        for j, pdate in enumerate(payment_dates):
-            method = random.choice(payment_methods)
-            ref = gen_ref(client_short, pdate.year, pdate.month)
-
-            if i in fully_paid:
-                cursor.execute(
-                    """INSERT INTO payments
-                       (contract_id, payment_date, amount, method,
-                        reference_number, status)
-                       VALUES (?,?,?,?,?,?)""",
-                    (contract_id, pdate.isoformat(), installment,
-                     method, ref, "received"),
-                )
+        # ----- PAYMENTS (6 months of history, mixed terms) -----
+        #
+        # Payment schedule per client type:
+        #   Quarterly: 4 payments/year, each = annual_value / 4
+        #   Semi-annual: 2 payments/year, each = annual_value / 2
+        #   Annual: 1 payment/year = annual_value
+        #
+        # Status distribution:
+        #   6 contracts fully paid
+        #   5 contracts partially paid (current installments received, next pending)
+        #   4 contracts have overdue payments
+        #   3 contracts have partial payments (60-80%)
+
+        # Assign payment status categories to buildings
+        # Fully paid: 0(FAB HQ), 2(FAB Khalifa), 5(Khidmah A), 6(Khidmah B), 16(Hotel), 17(Conference)
+        # Partially paid: 3(Farnek HQ), 10(URE Commercial), 12(Al Reef A), 14(Reem Heights), 15(Reem Mall)
+        # Overdue: 1(FAB Wahda), 4(Farnek Staff), 9(MPM Warehouse), 11(URE Residential)
+        # Partial amount: 7(Khidmah Community), 8(MPM Office), 13(Al Reef B)
+
+        fully_paid = {0, 2, 5, 6, 16, 17}
+        partially_paid = {3, 10, 12, 14, 15}
+        overdue_payment = {1, 4, 9, 11}
+        partial_amount = {7, 8, 13}
+
+        payment_rows = []
+        for i, (client_idx, bname, area, equip_count) in enumerate(buildings_spec):
+            contract_id = contract_ids[i]
+            annual_value, payment_terms = contract_terms[i]
+            client_short = clients[client_idx - 1][1]
+
+            if payment_terms == "quarterly":
+                installment = annual_value / 4
+                # Generate payments going back 6 months
+                payment_dates = []
+                base = TODAY - timedelta(days=180)
+                for q in range(3):  # 3 quarters in 6 months
+                    pdate = base + timedelta(days=q * 91)
+                    if pdate <= TODAY:
+                        payment_dates.append(pdate)
+
+            elif payment_terms == "semi_annual":
+                installment = annual_value / 2
+                payment_dates = [
+                    TODAY - timedelta(days=150),
+                    TODAY - timedelta(days=30) if i not in overdue_payment else TODAY - timedelta(days=60),
+                ]
+
+            else:  # annual
+                installment = annual_value
+                payment_dates = [TODAY - timedelta(days=120)]
+
+            standing = (
+                "fully_paid" if i in fully_paid
+                else "partially_paid" if i in partially_paid
+                else "overdue_payment" if i in overdue_payment
+                else "partial_amount"
+            )
+            payment_rows.extend(payment_rows_for(
+                contract_id, payment_dates, installment, standing, client_short, random,
+            ))
+
+        cursor.executemany(
+            """INSERT INTO payments
+               (contract_id, payment_date, amount, method,
+                reference_number, status, notes)
+               VALUES (?,?,?,?,?,?,?)""",
+            payment_rows,
+        )
 
-            elif i in partially_paid:
-                if j < len(payment_dates) - 1:
-                    # Earlier payments received
-                    cursor.execute(
-                        """INSERT INTO payments
-                           (contract_id, payment_date, amount, method,
-                            reference_number, status)
-                           VALUES (?,?,?,?,?,?)""",
-                        (contract_id, pdate.isoformat(), installment,
-                         method, ref, "received"),
-                    )
-                else:
-                    # Latest payment pending
-                    cursor.execute(
-                        """INSERT INTO payments
-                           (contract_id, payment_date, amount, method,
-                            reference_number, status)
-                           VALUES (?,?,?,?,?,?)""",
-                        (contract_id, pdate.isoformat(), installment,
-                         method, ref, "pending"),
-                    )
-
-            elif i in overdue_payment:
-                if j < len(payment_dates) - 1:
-                    cursor.execute(
-                        """INSERT INTO payments
-                           (contract_id, payment_date, amount, method,
-                            reference_number, status)
-                           VALUES (?,?,?,?,?,?)""",
-                        (contract_id, pdate.isoformat(), installment,
-                         method, ref, "received"),
-                    )
-                else:
-                    # Latest payment overdue
-                    cursor.execute(
-                        """INSERT INTO payments
-                           (contract_id, payment_date, amount, method,
-                            reference_number, status)
-                           VALUES (?,?,?,?,?,?)""",
-                        (contract_id, pdate.isoformat(), installment,
-                         method, ref, "overdue"),
-                    )
-
-            else:  # partial_amount
-                # Pay 60-80% of the first installment
-                partial_pct = random.uniform(0.6, 0.8)
-                paid_amount = round(installment * partial_pct, 2)
-                cursor.execute(
-                    """INSERT INTO payments
-                       (contract_id, payment_date, amount, method,
-                        reference_number, status, notes)
-                       VALUES (?,?,?,?,?,?,?)""",
-                    (contract_id, pdate.isoformat(), paid_amount,
-                     method, ref, "partial",
-                     f"Partial payment ({partial_pct:.0%} of AED {installment:,.0f})"),
+        conn.commit()
+    invalidate_cache()
+
+
+# ---------------------------------------------------------------------------
+# SCALE DATA
+# ---------------------------------------------------------------------------
+BUILDING_KINDS = [
+    "Tower", "Residential Block", "Office Complex", "Villa Cluster",
+    "Warehouse", "Branch", "Hotel", "Mall", "Staff Accommodation",
+]
+COMPLAINT_MESSAGES = [
+    "Fire alarm panel showing fault code; panel beeping intermittently.",
+    "Emergency lights not functioning during monthly test.",
+    "Suppression system requires inspection after minor incident.",
+    "Fire extinguisher servicing reminder.",
+    "Sprinkler pressure gauge reading below normal.",
+    "Exit sign illumination failure reported by facility manager.",
+]
+COMPLAINTS_PER_BUILDING_YEAR = 0.3
+COMPLAINT_PRIORITIES = {"high": 2, "medium": 2, "low": 1}
+INSTALLMENTS = {"quarterly": (4, 91), "semi_annual": (2, 182), "annual": (1, 365)}
+SCALE_CHUNK_BUILDINGS = 2000  # buildings generated and committed per transaction
+
+
+def _weighted(mix):
+    return list(mix), list(mix.values())
+
+
+def seed_scale(clients=50, buildings=1000, years=3, equipment_per_building=20,
+               seed=42, item_years=1, progress=None):
+    """
+    Generate a large synthetic portfolio into an empty database at DB_PATH.
+
+    Buildings get one contract per year of history (the current one active,
+    earlier ones expired), quarterly inspections back to `years` ago and the
+    demo data's status / payment targeting. Per-item results are written for
+    the last `item_years` of inspections.
+
+    Rows are written with executemany, SCALE_CHUNK_BUILDINGS buildings per
+    transaction, on a dedicated connection with synchronous=OFF. Secondary
+    indexes and triggers are dropped for the load and recreated afterwards,
+    even when the load fails part way; building_stats, ledger_summary and
+    ticket_sequences are then rebuilt in one pass each. Returns row counts
+    per table.
+    """
+    rng = random.Random(seed)
+    database._db_initialized = True  # skip get_connection()'s demo auto-seed
+    database.init_db()
+    if database.has_data():
+        raise ValueError(f"{database.DB_PATH} already has data; seed_scale needs an empty database")
+    database.close_all()
+
+    history_start = TODAY - timedelta(days=365 * years)
+    item_start = (TODAY - timedelta(days=365 * item_years)).isoformat()
+    statuses, status_weights = _weighted(STATUS_MIX)
+    standings, standing_weights = _weighted(PAYMENT_MIX)
+    terms, terms_weights = _weighted(PAYMENT_TERMS_MIX)
+    priorities, priority_weights = _weighted(COMPLAINT_PRIORITIES)
+    min_equipment = max(2, equipment_per_building // 3)
+    max_equipment = max(min_equipment, equipment_per_building * 5 // 3)
+
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")  # 256 MB
+    deferred = conn.execute(
+        "SELECT type, name, sql FROM sqlite_master "
+        "WHERE type IN ('index', 'trigger') AND sql IS NOT NULL"
+    ).fetchall()
+    for kind, name, _ in deferred:
+        conn.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+
+    try:
+        client_rows = []
+        client_terms = {}
+        for c in range(1, clients + 1):
+            client_rows.append((c, f"Client {c:05d} LLC", f"C{c:05d}", f"Contact {c}",
+                                f"+971 2 {rng.randint(100, 999)} {rng.randint(1000, 9999)}",
+                                f"facilities@client{c}.ae"))
+            client_terms[c] = rng.choices(terms, weights=terms_weights, k=1)[0]
+        conn.executemany(
+            "INSERT INTO clients (id, name, short_name, contact_person, phone, email) "
+            "VALUES (?,?,?,?,?,?)",
+            client_rows,
+        )
+        conn.commit()
+
+        counts = dict.fromkeys(
+            ["clients", "buildings", "contracts", "equipment", "inspections",
+             "inspection_items", "complaints", "payments"], 0)
+        counts["clients"] = clients
+        next_id = dict.fromkeys(["contract", "equipment", "inspection"], 1)
+        tickets = {}
+        started = time.perf_counter()
+
+        for chunk_start in range(0, buildings, SCALE_CHUNK_BUILDINGS):
+            rows = {table: [] for table in counts if table != "clients"}
+            for b in range(chunk_start, min(chunk_start + SCALE_CHUNK_BUILDINGS, buildings)):
+                building_id = b + 1
+                # Every client gets a building before any gets a second
+                client_id = building_id if building_id <= clients else rng.randint(1, clients)
+                rows["buildings"].append((
+                    building_id, client_id,
+                    f"{rng.choice(BUILDING_KINDS)} {building_id}", rng.choice(AREAS),
+                ))
+
+                # Equipment and its weak units
+                equip_count = rng.randint(min_equipment, max_equipment)
+                equipment_ids = list(range(next_id["equipment"], next_id["equipment"] + equip_count))
+                next_id["equipment"] += equip_count
+                rows["equipment"].extend(
+                    (eid, building_id, eq_type, "OK")
+                    for eid, eq_type in zip(equipment_ids, distribute_equipment(equip_count, rng))
                 )
-
-    conn.commit()
-    conn.close()
+                weak = set(rng.sample(equipment_ids, max(1, equip_count // 10)))
+                weights = [8 if eid in weak else 1 for eid in equipment_ids]
+
+                # Contracts: one per year of history, the current one active
+                payment_terms = client_terms[client_id]
+                standing = rng.choices(standings, weights=standing_weights, k=1)[0]
+                current_start = TODAY - timedelta(days=rng.randint(200, 300))
+                for k in range(years - 1, -1, -1):
+                    start = current_start - timedelta(days=365 * k)
+                    contract_id = next_id["contract"]
+                    next_id["contract"] += 1
+                    annual_value = calc_annual_value(equip_count, rng)
+                    rows["contracts"].append((
+                        contract_id, building_id, start.isoformat(),
+                        (start + timedelta(days=365)).isoformat(), 4, annual_value,
+                        payment_terms, "active" if k == 0 else "expired",
+                    ))
+                    installments, period = INSTALLMENTS[payment_terms]
+                    payment_dates = [
+                        start + timedelta(days=period * n) for n in range(installments)
+                        if start + timedelta(days=period * n) <= TODAY
+                    ]
+                    rows["payments"].extend(payment_rows_for(
+                        contract_id, payment_dates, annual_value / installments,
+                        standing if k == 0 else "fully_paid", f"C{client_id:05d}", rng,
+                    ))
+
+                # Inspections back from the status-targeted last visit
+                status = rng.choices(statuses, weights=status_weights, k=1)[0]
+                visit = TODAY - timedelta(days=rng.randint(*LAST_INSPECTION_DAYS_AGO[status]))
+                while visit >= history_start:
+                    inspection_id = next_id["inspection"]
+                    next_id["inspection"] += 1
+                    row = inspection_row(building_id, visit, equip_count, rng)
+                    rows["inspections"].append((inspection_id, *row))
+                    if row[1] >= item_start:
+                        rows["inspection_items"].extend(
+                            item_results(inspection_id, equipment_ids, weights, row[5], rng)
+                        )
+                    visit -= timedelta(days=rng.randint(*INSPECTION_GAP_DAYS))
+
+                # Complaints: recent ones still open, older ones closed out
+                for y in range(years):
+                    if rng.random() >= COMPLAINTS_PER_BUILDING_YEAR:
+                        continue
+                    created = TODAY - timedelta(days=rng.randint(365 * y, 365 * y + 364))
+                    tickets[created.year] = tickets.get(created.year, 0) + 1
+                    recent = (TODAY - created).days <= 30
+                    status = (rng.choice(["open", "assigned", "in_progress"]) if recent
+                              else rng.choice(["resolved", "closed"]))
+                    rows["complaints"].append((
+                        database.format_ticket_number(created.year, tickets[created.year]),
+                        client_id, building_id, rng.choice(COMPLAINT_MESSAGES),
+                        rng.choices(priorities, weights=priority_weights, k=1)[0], status,
+                        None if status == "open" else rng.choice(TECHNICIANS),
+                        created.isoformat(),
+                    ))
+
+            conn.executemany(
+                "INSERT INTO buildings (id, client_id, name, area) VALUES (?,?,?,?)",
+                rows["buildings"])
+            conn.executemany(
+                "INSERT INTO equipment (id, building_id, type, status) VALUES (?,?,?,?)",
+                rows["equipment"])
+            conn.executemany(
+                """INSERT INTO contracts
+                   (id, building_id, start_date, end_date, visits_per_year,
+                    annual_value, payment_terms, status)
+                   VALUES (?,?,?,?,?,?,?,?)""",
+                rows["contracts"])
+            conn.executemany(
+                """INSERT INTO payments
+                   (contract_id, payment_date, amount, method,
+                    reference_number, status, notes)
+                   VALUES (?,?,?,?,?,?,?)""",
+                rows["payments"])
+            conn.executemany(
+                """INSERT INTO inspections
+                   (id, building_id, inspection_date, technician,
+                    items_checked, items_passed, items_failed, notes)
+                   VALUES (?,?,?,?,?,?,?,?)""",
+                rows["inspections"])
+            conn.executemany(
+                "INSERT INTO inspection_items (inspection_id, equipment_id, result) VALUES (?,?,?)",
+                rows["inspection_items"])
+            conn.executemany(
+                """INSERT INTO complaints
+                   (ticket_number, client_id, building_id, message,
+                    priority, status, assigned_technician, created_at)
+                   VALUES (?,?,?,?,?,?,?,?)""",
+                rows["complaints"])
+            conn.commit()
+            for table, table_rows in rows.items():
+                counts[table] += len(table_rows)
+            if progress:
+                progress(f"{counts['buildings']:,}/{buildings:,} buildings "
+                         f"({time.perf_counter() - started:.0f}s)")
+    finally:
+        # Runs on failure too, so a partial load still leaves the schema's
+        # indexes and triggers in place and the derived tables consistent.
+        conn.rollback()
+        if progress:
+            progress("Rebuilding indexes and triggers")
+        for _, _, sql in deferred:
+            conn.execute(sql)
+        conn.commit()
+        conn.close()
+
+        if progress:
+            progress("Rebuilding building_stats, ledger_summary and ticket_sequences")
+        database.rebuild_building_stats()
+        database.rebuild_ledger()
+        database.rebuild_ticket_sequences()
+        invalidate_cache()
+    return counts
 
 
 if __name__ == "__main__":
-    from database import init_db, reset_db
-    reset_db()
-    seed()
-    print("Seed data loaded successfully!")
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(
+        description="Load demo data, or generate a large synthetic portfolio "
+                    "when --buildings is given")
+    parser.add_argument("--clients", type=int, default=None,
+                        help="clients (default: buildings / 50)")
+    parser.add_argument("--buildings", type=int, default=None)
+    parser.add_argument("--years", type=int, default=3, help="years of history")
+    parser.add_argument("--equipment-per-building", type=int, default=20,
+                        help="average equipment items per building")
+    parser.add_argument("--item-years", type=int, default=1,
+                        help="years of per-item inspection results")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", default=None,
+                        help="database file for scale data (must not exist)")
+    args = parser.parse_args()
+
+    if args.buildings is None:
+        from database import init_db, reset_db
+        reset_db()
+        seed()
+        print("Seed data loaded successfully!")
+    else:
+        if args.output:
+            if os.path.exists(args.output):
+                parser.error(f"{args.output} already exists")
+            database.DB_PATH = args.output
+        started = time.perf_counter()
+        counts = seed_scale(
+            clients=args.clients or max(1, args.buildings // 50),
+            buildings=args.buildings, years=args.years,
+            equipment_per_building=args.equipment_per_building,
+            seed=args.seed, item_years=args.item_years, progress=print,
+        )
+        print(", ".join(f"{table} {n:,}" for table, n in counts.items()))
+        print(f"Generated {database.DB_PATH} in {time.perf_counter() - started:.0f}s")